@@ -118,6 +118,16 @@ export const fetchWeatherData = (params) =>
 export const fetchLatestWeatherDataByCity = (cityId) =>
   api.get("weather-data/latest/", { params: { city: cityId } });
 
+/**
+ * Fetch a chart series for one metric, downsampled on the server so it has
+ * at most `max_points` points whatever the range.
+ * @param {number} cityId - ID of the city.
+ * @param {Object} params - metric (temp, feels_like, humidity, wind_speed),
+ *   source (observations or forecast), start, end and max_points.
+ */
+export const fetchTimeseries = (cityId, params = {}) =>
+  api.get("timeseries/", { params: { city: cityId, ...params } });
+
 /// --- Daily Summaries Endpoints --- ///
 
 /**
@@ -160,6 +170,32 @@ export const fetchAlerts = () => api.get("alerts/");
 export const fetchAlertsByCity = (cityId) =>
   api.get("alerts/", { params: { city: cityId } });
 
+/// --- Dashboard Endpoint --- ///
+
+/**
+ * Fetch everything the dashboard shows for a city in one request:
+ * latest weather, daily summaries, today's alerts and the forecast.
+ * @param {number} cityId - ID of the city to fetch data for.
+ */
+export const fetchCityDashboard = (cityId) => api.get(`dashboard/${cityId}/`);
+
+/// --- Live Updates --- ///
+
+/**
+ * Open a Server-Sent Events stream of live updates for the given cities.
+ * Events: "observation" (new latest weather), "alert" (new alert for the
+ * user), "forecast" and "daily_summary" (data refreshed; refetch it).
+ * EventSource cannot send headers, so the access token goes in the URL.
+ * @param {number[]} cityIds - IDs of the cities to subscribe to.
+ * @returns {EventSource}
+ */
+export const openLiveUpdates = (cityIds) => {
+  const url = new URL("live/", new URL(API_URL, window.location.origin));
+  url.searchParams.set("cities", cityIds.join(","));
+  url.searchParams.set("token", localStorage.getItem("access_token") || "");
+  return new EventSource(url.toString());
+};
+
 /// --- Thresholds Endpoints --- ///
 
 /**
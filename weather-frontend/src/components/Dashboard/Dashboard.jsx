@@ -10,10 +10,8 @@ import {
   fetchCities,
   addCity,
   deleteCity,
-  fetchDailySummariesByCity,
-  fetchLatestWeatherDataByCity,
-  fetchAlertsByCity,
-  fetchForecastDataByCity,
+  fetchCityDashboard,
+  openLiveUpdates,
 } from "../../api/api";
 import { UserPreferencesContext } from "../contexts/UserPreferencesContext";
 import windIcon from "../../assets/wind.png";
@@ -130,32 +128,22 @@ function Dashboard() {
    */
   const getCityData = async (cityId) => {
     try {
-      const { data: latestWeather } = await fetchLatestWeatherDataByCity(
-        cityId
-      );
-
-      const [dailyResponse, alertsResponse, forecastResponse] =
-        await Promise.all([
-          fetchDailySummariesByCity(cityId),
-          fetchAlertsByCity(cityId),
-          fetchForecastDataByCity(cityId),
-        ]);
-
-      const dailySummaries = Array.isArray(dailyResponse.data)
-        ? dailyResponse.data
-        : dailyResponse.data.results || [];
-
-      const alerts = Array.isArray(alertsResponse.data)
-        ? alertsResponse.data
-        : alertsResponse.data.results || [];
-
-      const forecast = Array.isArray(forecastResponse.data)
-        ? forecastResponse.data
-        : forecastResponse.data.results || [];
+      // One request returns the latest weather, summaries, alerts and forecast
+      const { data } = await fetchCityDashboard(cityId);
+
+      // The city is sent once; attach it to each row for the child components
+      const withCity = (rows) => rows.map((row) => ({ ...row, city: data.city }));
+      const latestWeather = data.latest_weather
+        ? { ...data.latest_weather, city: data.city }
+        : null;
+      const dailySummaries = withCity(data.daily_summaries);
+      const alerts = withCity(data.alerts);
+      const forecast = withCity(data.forecast);
 
       setCityData((prevData) => ({
         ...prevData,
         [cityId]: {
+          city: data.city,
           dailySummaries,
           latestWeather,
           alerts,
@@ -175,19 +163,81 @@ function Dashboard() {
     getCities();
   }, []);
 
-  // Fetch city data when selectedCityId changes and set up polling
+  // Fetch city data when selectedCityId changes and subscribe to live updates
   useEffect(() => {
-    if (selectedCityId !== null) {
-      setLoading(true);
-      getCityData(selectedCityId);
-
-      // Polling every 5 minutes for real-time updates
-      const interval = setInterval(() => {
-        getCityData(selectedCityId);
-      }, 300000); // 300,000 ms = 5 minutes
-
-      return () => clearInterval(interval);
-    }
+    if (selectedCityId === null) return undefined;
+
+    setLoading(true);
+    getCityData(selectedCityId);
+
+    let source = null;
+    let reconnectTimer = null;
+    let reconnectDelay = 5000;
+    let streaming = false;
+
+    // Poll every 5 minutes whenever the stream is not open (unsupported, failing, or the server is not ASGI)
+    const pollTimer = setInterval(() => {
+      if (!streaming) getCityData(selectedCityId);
+    }, 300000);
+
+    const applyUpdate = (update) =>
+      setCityData((prevData) => {
+        const current = prevData[selectedCityId];
+        return current
+          ? { ...prevData, [selectedCityId]: update(current) }
+          : prevData;
+      });
+
+    const connect = () => {
+      if (typeof EventSource === "undefined") return;
+      source = openLiveUpdates([selectedCityId]);
+
+      source.onopen = () => {
+        streaming = true;
+        reconnectDelay = 5000;
+      };
+
+      source.addEventListener("observation", (event) => {
+        const { data } = JSON.parse(event.data);
+        applyUpdate((current) => ({
+          ...current,
+          latestWeather: { ...data, city: current.city },
+        }));
+      });
+
+      source.addEventListener("alert", (event) => {
+        const { data } = JSON.parse(event.data);
+        applyUpdate((current) => ({
+          ...current,
+          alerts: [{ ...data, city: current.city }, ...current.alerts],
+        }));
+      });
+
+      // Forecasts and summaries are replaced in bulk; refetch them
+      source.addEventListener("forecast", () => getCityData(selectedCityId));
+      source.addEventListener("daily_summary", () => getCityData(selectedCityId));
+
+      // Reconnect with a fresh token if the stream drops, then catch up on missed data.
+      // Retries back off to the polling interval while the stream keeps failing
+      source.onerror = () => {
+        const wasStreaming = streaming;
+        streaming = false;
+        source.close();
+        reconnectTimer = setTimeout(() => {
+          if (wasStreaming) getCityData(selectedCityId);
+          connect();
+        }, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, 300000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      clearInterval(pollTimer);
+      clearTimeout(reconnectTimer);
+      if (source) source.close();
+    };
   }, [selectedCityId]);
 
   /**
@@ -629,7 +679,7 @@ function Dashboard() {
           {/* Forecast */}
           {Array.isArray(data.forecast) && data.forecast.length > 0 && (
             <div>
-              <Forecast forecast={data.forecast} />
+              <Forecast cityId={selectedCityId} forecast={data.forecast} />
             </div>
           )}
         </motion.section>
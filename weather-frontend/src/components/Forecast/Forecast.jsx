@@ -3,12 +3,14 @@ import PropTypes from "prop-types";
 import { UserPreferencesContext } from "../contexts/UserPreferencesContext";
 import { motion } from "framer-motion"; // Import Framer Motion
 import ForecastList from "./ForecastList"; // Import the card-based forecast list
+import HourlyForecastChart from "./HourlyForecastChart";
 
 /**
- * Component to display forecast data in card layout.
+ * Component to display forecast data as a chart and in card layout.
+ * @param {number} cityId - ID of the city the forecast is for.
  * @param {Array} forecast - Array of forecast data objects.
  */
-function Forecast({ forecast }) {
+function Forecast({ cityId, forecast }) {
   const preferences = useContext(UserPreferencesContext);
   const [hourlyForecast, setHourlyForecast] = useState([]);
 
@@ -59,6 +61,10 @@ function Forecast({ forecast }) {
       <h2 className="text-center text-xl font-semibold text-gray-800 mb-6">
         Hourly Forecast
       </h2>
+      {/* Chart of the downsampled forecast series, refetched when the forecast is refreshed */}
+      <div className="mb-6">
+        <HourlyForecastChart cityId={cityId} refreshKey={forecast} />
+      </div>
       {/* Forecast List rendered as cards */}
       <ForecastList forecast={hourlyForecast} />
     </motion.div>
@@ -66,6 +72,7 @@ function Forecast({ forecast }) {
 }
 
 Forecast.propTypes = {
+  cityId: PropTypes.number.isRequired,
   forecast: PropTypes.arrayOf(
     PropTypes.shape({
       id: PropTypes.number.isRequired,
@@ -1,3 +1,4 @@
+import { useContext, useEffect, useState } from "react";
 import PropTypes from "prop-types";
 import { Line } from "react-chartjs-2";
 import {
@@ -11,6 +12,8 @@ import {
   Legend,
 } from "chart.js";
 import { motion } from "framer-motion"; // Import Framer Motion
+import { fetchTimeseries } from "../../api/api";
+import { UserPreferencesContext } from "../contexts/UserPreferencesContext";
 
 // Register necessary Chart.js components
 ChartJS.register(
@@ -23,36 +26,84 @@ ChartJS.register(
   Legend
 );
 
+const METRICS = ["temp", "feels_like", "humidity", "wind_speed"];
+const MAX_POINTS = 120; // Enough for the chart's width; the server downsamples each series to this
+
 /**
- * Component to display hourly forecast data using Chart.js with animations.
- * @param {Array} hourlyData - Array of hourly forecast data objects.
+ * Format an epoch-milliseconds timestamp as a short local time.
+ * @param {number} timestamp - Epoch milliseconds.
+ * @returns {string} Formatted time.
  */
-function HourlyForecastChart({ hourlyData }) {
-  // Sort data by timestamp to ensure chronological order
-  const sortedData = [...hourlyData].sort(
-    (a, b) => new Date(a.timestamp) - new Date(b.timestamp)
-  );
+const formatTime = (timestamp) =>
+  new Date(timestamp).toLocaleTimeString([], {
+    weekday: "short",
+    hour: "numeric",
+    minute: "numeric",
+    hour12: true,
+  });
 
-  // Prepare labels and datasets for the chart
-  const labels = sortedData.map((entry) =>
-    new Date(entry.timestamp).toLocaleTimeString([], {
-      hour: "numeric",
-      minute: "numeric",
-      hour12: true,
-    })
-  );
+/**
+ * Component to display a city's hourly forecast using Chart.js with animations.
+ * Each metric is fetched as a downsampled series from the timeseries endpoint,
+ * so the payload stays bounded however long the forecast is.
+ * @param {number} cityId - ID of the city.
+ * @param {*} refreshKey - Changes whenever the forecast is refreshed; the series are fetched again.
+ */
+function HourlyForecastChart({ cityId, refreshKey }) {
+  const preferences = useContext(UserPreferencesContext);
+  const [series, setSeries] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
 
-  const temperatureData = sortedData.map((entry) => entry.temp);
-  const feelsLikeData = sortedData.map((entry) => entry.feels_like);
-  const humidityData = sortedData.map((entry) => entry.humidity);
-  const windSpeedData = sortedData.map((entry) => entry.wind_speed);
+    const getSeries = async () => {
+      try {
+        const responses = await Promise.all(
+          METRICS.map((metric) =>
+            fetchTimeseries(cityId, {
+              metric,
+              source: "forecast",
+              max_points: MAX_POINTS,
+            })
+          )
+        );
+        if (cancelled) return;
+        setSeries(
+          Object.fromEntries(
+            METRICS.map((metric, index) => {
+              const { timestamps, values } = responses[index].data;
+              return [metric, timestamps.map((x, i) => ({ x, y: values[i] }))];
+            })
+          )
+        );
+      } catch (err) {
+        console.error("Error fetching forecast series:", err);
+      }
+    };
+
+    getSeries();
+    return () => {
+      cancelled = true;
+    };
+  }, [cityId, refreshKey]);
+
+  if (!series) return null;
+
+  const fahrenheit = preferences.temp_unit === "Fahrenheit";
+  const unit = fahrenheit ? "°F" : "°C";
+  const convertTemperature = (points) =>
+    fahrenheit ? points.map(({ x, y }) => ({ x, y: (y * 9) / 5 + 32 })) : points;
+
+  const temperatureData = convertTemperature(series.temp);
+  const feelsLikeData = convertTemperature(series.feels_like);
+  const humidityData = series.humidity;
+  const windSpeedData = series.wind_speed;
 
   const data = {
-    labels,
     datasets: [
       {
         type: "line",
-        label: "Temperature (°C)",
+        label: `Temperature (${unit})`,
         data: temperatureData,
         borderColor: "#FF6347", // Coral for temperature
         backgroundColor: "transparent",
@@ -63,7 +114,7 @@ function HourlyForecastChart({ hourlyData }) {
       },
       {
         type: "line",
-        label: "Feels Like (°C)",
+        label: `Feels Like (${unit})`,
         data: feelsLikeData,
         borderColor: "#FFA07A", // Light Salmon for feels like
         backgroundColor: "transparent",
@@ -129,12 +180,13 @@ function HourlyForecastChart({ hourlyData }) {
       },
       tooltip: {
         callbacks: {
+          title: (tooltipItems) => formatTime(tooltipItems[0].parsed.x),
           label: (tooltipItem) => {
             const label = tooltipItem.dataset.label;
-            const value = tooltipItem.raw;
+            const value = tooltipItem.parsed.y;
 
             if (label.includes("Temperature") || label.includes("Feels Like")) {
-              return `${label}: ${value.toFixed(1)}°C`;
+              return `${label}: ${value.toFixed(1)}${unit}`;
             } else if (label === "Wind Speed (m/s)") {
               return `${label}: ${value.toFixed(1)} m/s`;
             } else {
@@ -146,7 +198,7 @@ function HourlyForecastChart({ hourlyData }) {
     },
     scales: {
       x: {
-        type: "category",
+        type: "linear",
         title: {
           display: true,
           text: "Time",
@@ -154,6 +206,7 @@ function HourlyForecastChart({ hourlyData }) {
           color: "#333",
         },
         ticks: {
+          callback: (value) => formatTime(value),
           maxRotation: 45,
           minRotation: 45,
           color: "#555", // Darker tick color
@@ -167,7 +220,7 @@ function HourlyForecastChart({ hourlyData }) {
         position: "left",
         title: {
           display: true,
-          text: "Temperature (°C)",
+          text: `Temperature (${unit})`,
           font: { size: 14 },
           color: "#FF6347", // Match Temperature line color
         },
@@ -229,15 +282,8 @@ function HourlyForecastChart({ hourlyData }) {
 }
 
 HourlyForecastChart.propTypes = {
-  hourlyData: PropTypes.arrayOf(
-    PropTypes.shape({
-      timestamp: PropTypes.string.isRequired,
-      temp: PropTypes.number.isRequired,
-      feels_like: PropTypes.number.isRequired,
-      humidity: PropTypes.number.isRequired,
-      wind_speed: PropTypes.number.isRequired,
-    })
-  ).isRequired,
+  cityId: PropTypes.number.isRequired,
+  refreshKey: PropTypes.any,
 };
 
 export default HourlyForecastChart;
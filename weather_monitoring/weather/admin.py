@@ -1,20 +1,30 @@
 from django.contrib import admin
-from .models import City, WeatherData, ForecastData, DailySummary, Threshold, Alert, UserPreference
+from .models import City, CityLatestObservation, WeatherCondition, WeatherData, ForecastData, DailySummary, Threshold, Alert, UserPreference
 
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin):
     list_display = ('name', 'country_code', 'latitude', 'longitude', 'altitude')
     search_fields = ('name', 'country_code')
 
+@admin.register(WeatherCondition)
+class WeatherConditionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
+
 @admin.register(WeatherData)
 class WeatherDataAdmin(admin.ModelAdmin):
     list_display = ('city', 'timestamp', 'main', 'temp', 'feels_like', 'humidity', 'wind_speed')
-    search_fields = ('city__name', 'main')
+    search_fields = ('city__name', 'condition__name')
+
+@admin.register(CityLatestObservation)
+class CityLatestObservationAdmin(admin.ModelAdmin):
+    list_display = ('city', 'timestamp', 'main', 'temp', 'feels_like', 'humidity', 'wind_speed')
+    search_fields = ('city__name',)
 
 @admin.register(ForecastData)
 class ForecastDataAdmin(admin.ModelAdmin):
     list_display = ('city', 'timestamp', 'main', 'temp', 'feels_like', 'humidity', 'wind_speed', 'description')
-    search_fields = ('city__name', 'main')
+    search_fields = ('city__name', 'condition__name')
 
 @admin.register(DailySummary)
 class DailySummaryAdmin(admin.ModelAdmin):
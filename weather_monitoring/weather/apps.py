@@ -6,4 +6,22 @@ class WeatherConfig(AppConfig):
     name = "weather"
 
     def ready(self):
-        import weather.signals
\ No newline at end of file
+        from celery import signals as celery_signals
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        import weather.signals
+        from weather import log, metrics, profiling
+        from weather.middleware import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+        celery_signals.task_prerun.connect(metrics.task_prerun, weak=False)
+        celery_signals.task_postrun.connect(metrics.task_postrun, weak=False)
+        celery_signals.worker_process_shutdown.connect(metrics.worker_process_shutdown, weak=False)
+        celery_signals.task_prerun.connect(profiling.task_prerun, weak=False)
+        celery_signals.task_postrun.connect(profiling.task_postrun, weak=False)
+        celery_signals.worker_init.connect(profiling.install_toggle, weak=False)
+        celery_signals.worker_process_init.connect(profiling.install_toggle, weak=False)
+
+        if settings.LOG_BACKGROUND:
+            log.start_background_logging(settings.LOGGING.get('loggers', {}))
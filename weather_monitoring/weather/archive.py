@@ -0,0 +1,226 @@
+"""
+Columnar archive of expired WeatherData.
+
+Before retention deletes observations they are appended to per-city,
+per-month directories of NumPy arrays:
+
+    <WEATHER_ARCHIVE_DIR>/<city_id>/<YYYY-MM>/timestamp.npy   int64 (UTC epoch seconds)
+                                             temp.npy        float32
+                                             feels_like.npy  float32
+                                             humidity.npy    float32 (NaN when missing)
+                                             wind_speed.npy  float32 (NaN when missing)
+                                             condition.npy   uint16 (index into conditions.json)
+                                             conditions.json
+
+Narrow dtypes and dictionary-encoded conditions keep a row at 26 bytes.
+The files are stored uncompressed so the reader can memory-map them and
+answer long-range history and rollup queries without loading whole months
+or touching the database.
+"""
+import json
+import os
+import shutil
+from datetime import date, timezone as dt_timezone
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone as dj_timezone
+
+from .conditions import name_for
+from .models import WeatherData
+
+COLUMNS = {
+    'timestamp': np.int64,
+    'temp': np.float32,
+    'feels_like': np.float32,
+    'humidity': np.float32,
+    'wind_speed': np.float32,
+    'condition': np.uint16,
+}
+CONDITIONS_FILE = 'conditions.json'
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _archive_dir(archive_dir=None):
+    return os.fspath(archive_dir or settings.WEATHER_ARCHIVE_DIR)
+
+
+def _month_key(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).strftime('%Y-%m')
+
+
+def _read_month(path, mmap_mode=None):
+    """Load one month directory as ({column: array}, [condition names])."""
+    arrays = {
+        column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mmap_mode)
+        for column in COLUMNS
+    }
+    with open(os.path.join(path, CONDITIONS_FILE)) as conditions_file:
+        conditions = json.load(conditions_file)
+    return arrays, conditions
+
+
+def _write_month(path, arrays, conditions):
+    """Write a month directory atomically by building it aside and swapping it in."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    old_path = f"{path}.old-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for column, dtype in COLUMNS.items():
+        np.save(os.path.join(tmp_path, f"{column}.npy"), np.ascontiguousarray(arrays[column], dtype=dtype))
+    with open(os.path.join(tmp_path, CONDITIONS_FILE), 'w') as conditions_file:
+        json.dump(conditions, conditions_file)
+
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def _append_month(path, rows):
+    """Merge `rows` (sorted by timestamp) into the month stored at `path`."""
+    conditions = []
+    if os.path.exists(path):
+        existing, conditions = _read_month(path)
+    else:
+        existing = None
+
+    condition_codes = {name: code for code, name in enumerate(conditions)}
+    new_codes = []
+    for row in rows:
+        name = name_for(row[2])
+        if name not in condition_codes:
+            condition_codes[name] = len(conditions)
+            conditions.append(name)
+        new_codes.append(condition_codes[name])
+
+    arrays = {
+        'timestamp': np.array([int(row[1].timestamp()) for row in rows], dtype=np.int64),
+        'temp': np.array([row[3] for row in rows], dtype=np.float32),
+        'feels_like': np.array([row[4] for row in rows], dtype=np.float32),
+        'humidity': np.array([np.nan if row[5] is None else row[5] for row in rows], dtype=np.float32),
+        'wind_speed': np.array([np.nan if row[6] is None else row[6] for row in rows], dtype=np.float32),
+        'condition': np.array(new_codes, dtype=np.uint16),
+    }
+    if existing is not None:
+        arrays = {column: np.concatenate([existing[column], arrays[column]]) for column in COLUMNS}
+        # Keep the most recently archived copy of any duplicate timestamp, sorted by time
+        order = np.argsort(arrays['timestamp'], kind='stable')[::-1]
+        _, first = np.unique(arrays['timestamp'][order], return_index=True)
+        keep = order[first]
+        arrays = {column: values[keep] for column, values in arrays.items()}
+
+    _write_month(path, arrays, conditions)
+
+
+def archive_weather_data(cutoff, archive_dir=None):
+    """
+    Append every WeatherData row older than `cutoff` to the archive.
+    Returns the number of rows archived.
+    """
+    root = _archive_dir(archive_dir)
+    rows = (
+        WeatherData.objects.filter(timestamp__lt=cutoff)
+        .order_by('city_id', 'timestamp')
+        .values_list('city_id', 'timestamp', 'condition_id', 'temp', 'feels_like', 'humidity', 'wind_speed')
+        .iterator(chunk_size=2000)
+    )
+    archived = 0
+    for (city_id, month), group in groupby(rows, key=lambda row: (row[0], _month_key(row[1]))):
+        group = list(group)
+        _append_month(os.path.join(root, str(city_id), month), group)
+        archived += len(group)
+    return archived
+
+
+class ArchiveReader:
+    """
+    Read-only access to the archive through memory-mapped arrays.
+    """
+
+    def __init__(self, archive_dir=None):
+        self.root = _archive_dir(archive_dir)
+
+    def months(self, city_id):
+        """Archived months (YYYY-MM) for a city, oldest first."""
+        city_dir = os.path.join(self.root, str(city_id))
+        if not os.path.isdir(city_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(city_dir)
+            if len(name) == 7 and os.path.isfile(os.path.join(city_dir, name, CONDITIONS_FILE))
+        )
+
+    def history(self, city_id, start, end):
+        """
+        Observations with start <= timestamp < end as a dict of arrays, with
+        condition names under 'condition'. Only the matching slice of each
+        month is read from disk.
+        """
+        start_ts, end_ts = int(start.timestamp()), int(end.timestamp())
+        first_month, last_month = _month_key(start), _month_key(end)
+        parts = {column: [] for column in COLUMNS}
+        for month in self.months(city_id):
+            if month < first_month or month > last_month:
+                continue
+            arrays, conditions = _read_month(os.path.join(self.root, str(city_id), month), mmap_mode='r')
+            timestamps = arrays['timestamp']
+            lo, hi = np.searchsorted(timestamps, [start_ts, end_ts])
+            if lo == hi:
+                continue
+            for column in COLUMNS:
+                if column == 'condition':
+                    parts[column].append(np.asarray(conditions, dtype=object)[arrays[column][lo:hi]])
+                else:
+                    parts[column].append(np.asarray(arrays[column][lo:hi]))
+
+        return {
+            column: np.concatenate(values) if values else np.empty(0, dtype=object if column == 'condition' else dtype)
+            for (column, dtype), values in zip(COLUMNS.items(), parts.values())
+        }
+
+    def daily_rollup(self, city_id, start, end):
+        """
+        Per-day aggregates shaped like DailySummary for start <= timestamp < end.
+        Days follow the current time zone, using its UTC offset at `start`.
+        """
+        history = self.history(city_id, start, end)
+        timestamps = history['timestamp']
+        if not len(timestamps):
+            return []
+
+        offset = int(dj_timezone.localtime(start).utcoffset().total_seconds())
+        days = (timestamps + offset) // SECONDS_PER_DAY
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate([[0], bounds])
+        counts = np.diff(np.concatenate([starts, [len(days)]]))
+
+        def nanmean(values):
+            valid = ~np.isnan(values)
+            totals = np.add.reduceat(np.where(valid, values, 0), starts, dtype=np.float64)
+            valid_counts = np.add.reduceat(valid.astype(np.int64), starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(valid_counts > 0, totals / np.maximum(valid_counts, 1), np.nan)
+
+        temp = history['temp']
+        avg_temp = np.add.reduceat(temp, starts, dtype=np.float64) / counts
+        max_temp = np.maximum.reduceat(temp, starts)
+        min_temp = np.minimum.reduceat(temp, starts)
+        avg_humidity = nanmean(history['humidity'])
+        avg_wind_speed = nanmean(history['wind_speed'])
+
+        rollup = []
+        for i, first in enumerate(starts):
+            names, occurrences = np.unique(history['condition'][first:first + counts[i]], return_counts=True)
+            rollup.append({
+                'date': date.fromordinal(date(1970, 1, 1).toordinal() + int(days[first])),
+                'avg_temp': float(avg_temp[i]),
+                'max_temp': float(max_temp[i]),
+                'min_temp': float(min_temp[i]),
+                'avg_humidity': None if np.isnan(avg_humidity[i]) else float(avg_humidity[i]),
+                'avg_wind_speed': None if np.isnan(avg_wind_speed[i]) else float(avg_wind_speed[i]),
+                'dominant_condition': str(names[occurrences.argmax()]),
+                'samples': int(counts[i]),
+            })
+        return rollup
@@ -0,0 +1,195 @@
+"""
+Async views, served by the ASGI application (e.g. `uvicorn weather_monitoring.asgi:application`).
+
+These are plain async Django views rather than DRF views, so long-lived
+connections and requests waiting on the database do not hold a worker
+thread. JWT authentication is done here with CachedJWTAuthentication directly.
+
+The read views under `async/` return the same JSON as their sync
+counterparts in `weather.views`, reading through the async ORM. They do
+not go through the response cache.
+"""
+import functools
+import logging
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.timezone import now
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from . import dashboard, live
+from .authentication import CachedJWTAuthentication
+from .conditions import aensure_known
+from .middleware import query_budget
+from .throttling import check as throttle_check, throttle_cost
+from .flat_serializers import city_serializer, forecast_data_serializer, latest_observation_serializer
+from .models import City, CityLatestObservation, ForecastData
+from .renderers import FastJSONRenderer
+
+logger = logging.getLogger('weather')
+
+
+async def authenticate(request):
+    """
+    User for the request's JWT access token, or None. The token is read
+    from the Authorization header or, for EventSource clients that cannot
+    set headers, the `token` query parameter.
+    """
+    header = request.headers.get('Authorization', '')
+    raw_token = header[len('Bearer '):] if header.startswith('Bearer ') else request.GET.get('token')
+    if not raw_token:
+        return None
+    authentication = CachedJWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return await sync_to_async(authentication.get_user)(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def login_required(view):
+    """Authenticate the JWT of an async view's request, answering 401 without one, and apply the rate limits."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({"error": "Authentication credentials were not provided or are invalid."}, status=401)
+        request.user = user
+        wait = await sync_to_async(throttle_check)(request, user)
+        if wait is not None:
+            response = JsonResponse({"error": "Request was throttled."}, status=429)
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _json(data, status=200):
+    # Encoded like the DRF views' responses
+    return HttpResponse(FastJSONRenderer().render(data), content_type='application/json', status=status)
+
+
+async def _rows(queryset):
+    """`.values()` rows of a queryset, with their condition codes loaded."""
+    rows = [row async for row in queryset]
+    await aensure_known([row.get(column) for row in rows for column in ('condition_id', 'detail_id')])
+    return rows
+
+
+@require_GET
+@login_required
+async def live_updates(request):
+    """
+    Server-Sent Events stream for `?cities=1,2`: new observations,
+    refreshed forecasts and daily summaries of those cities, and the
+    user's new alerts in them. Served only over ASGI: under WSGI the
+    stream would hold a worker thread without ever sending a byte.
+    """
+    user = request.user
+
+    city_ids = request.GET.get('cities', '').split(',')
+    if not all(city_id.isdigit() for city_id in city_ids):
+        return JsonResponse({"error": "Provide 'cities' as comma-separated city IDs."}, status=400)
+    city_ids = sorted({int(city_id) for city_id in city_ids})
+    if len(city_ids) > settings.LIVE_MAX_CITIES:
+        return JsonResponse({"error": f"Subscribe to at most {settings.LIVE_MAX_CITIES} cities."}, status=400)
+    if await City.objects.filter(id__in=city_ids).acount() != len(city_ids):
+        return JsonResponse({"error": "City not found."}, status=404)
+    if not isinstance(request, ASGIRequest):
+        # Clients fall back to polling
+        return JsonResponse({"error": "Live updates require the ASGI server."}, status=501)
+
+    channels = [live.city_channel(city_id) for city_id in city_ids]
+    channels += [live.user_city_channel(user.pk, city_id) for city_id in city_ids]
+    logger.info("User %s subscribed to live updates for cities %s.", user.username, city_ids)
+
+    response = StreamingHttpResponse(
+        live.event_stream(live.get_hub(), channels, settings.LIVE_HEARTBEAT_SECONDS),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+
+# Read views
+
+@query_budget(2)
+@require_GET
+@login_required
+async def city_list(request):
+    """Async version of `views.city_list`."""
+    cities = await _rows(city_serializer.values(City.objects.all()))
+    logger.info("User %s fetched city list.", request.user.username)
+    return _json(city_serializer.many(cities))
+
+
+@query_budget(3)
+@require_GET
+@login_required
+async def weather_data_latest(request):
+    """Async version of `views.weather_data_latest`."""
+    city_id = request.GET.get('city')
+    if city_id is None:
+        return _json({"error": "City ID not provided."}, status=400)
+    if not city_id.isdigit():
+        return _json({"error": "No weather data found for the specified city."}, status=404)
+    weather = await latest_observation_serializer.values(
+        CityLatestObservation.objects.filter(city_id=city_id)
+    ).afirst()
+    if weather is None:
+        return _json({"error": "No weather data found for the specified city."}, status=404)
+    await aensure_known([weather['condition_id']])
+    logger.info("User %s fetched latest weather data for city_id=%s.", request.user.username, city_id)
+    return _json(latest_observation_serializer.to_representation(weather))
+
+
+@throttle_cost(2)
+@query_budget(3)
+@require_GET
+@login_required
+async def latest_weather_all_cities(request):
+    """Async version of `views.latest_weather_all_cities`."""
+    latest = await _rows(latest_observation_serializer.values(CityLatestObservation.objects.order_by('city_id')))
+    logger.info("User %s fetched latest weather data for all cities.", request.user.username)
+    return _json(latest_observation_serializer.many(latest))
+
+
+@throttle_cost(5)
+@query_budget(4)
+@require_GET
+@login_required
+async def forecast_data_list(request):
+    """Async version of `views.forecast_data_list`."""
+    city_id = request.GET.get('city')
+    forecasts = ForecastData.objects.filter(timestamp__date__gte=now().date()).order_by('timestamp')
+    if city_id:
+        if not city_id.isdigit() or not await City.objects.filter(id=city_id).aexists():
+            return _json({"error": "City not found."}, status=404)
+        forecasts = forecasts.filter(city_id=city_id)
+    rows = await _rows(forecast_data_serializer.values(forecasts))
+    logger.info("User %s fetched forecast data list.", request.user.username)
+    return _json(forecast_data_serializer.many(rows))
+
+
+@throttle_cost(3)
+@query_budget(7)
+@require_GET
+@login_required
+async def city_dashboard(request, city_id):
+    """Async version of `views.city_dashboard`."""
+    try:
+        city = await dashboard.city_rows(city_id).aget()
+    except City.DoesNotExist:
+        return _json({"error": "City not found."}, status=404)
+    latest, summaries, alerts, forecasts = dashboard.dashboard_rows(city_id, request.user, now().date())
+    latest = await latest.afirst()
+    summaries, alerts, forecasts = await _rows(summaries), await _rows(alerts), await _rows(forecasts)
+    if latest is not None:
+        await aensure_known([latest['condition_id']])
+    logger.info("User %s fetched the dashboard for city_id=%s.", request.user.username, city_id)
+    return _json(dashboard.dashboard_payload(city, latest, summaries, alerts, forecasts))
@@ -0,0 +1,60 @@
+"""
+JWT authentication that resolves the token's user from the cache.
+
+simplejwt's JWTAuthentication loads the User row on every request. Here
+the user is cached for AUTH_USER_CACHE_TIMEOUT seconds under its id, so
+polling clients cost no authentication query. Saving or deleting a user
+drops its entry (see weather.signals); changes made with
+`QuerySet.update()` bypass that and apply once the entry expires.
+
+When the cache is unreachable the user is loaded from the database.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from redis import RedisError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def forget_user(user_id):
+    try:
+        cache.delete(user_cache_key(user_id))
+    except RedisError as e:
+        logger.warning("Could not drop cached user %s: %s", user_id, e)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        try:
+            user = cache.get(user_cache_key(user_id)) if user_id is not None else None
+        except RedisError as e:
+            logger.warning("User cache unavailable, loading user %s from the database: %s", user_id, e)
+            return super().get_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            try:
+                cache.set(user_cache_key(user_id), user, settings.AUTH_USER_CACHE_TIMEOUT)
+            except RedisError as e:
+                logger.warning("Could not cache user %s: %s", user_id, e)
+            return user
+
+        # The checks super().get_user() makes on a freshly loaded user
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,91 @@
+"""
+In-process cache of the WeatherCondition lookup table.
+
+Condition rows are append-only and there are only a few dozen of them, so
+each process keeps the whole code <-> name mapping in memory. Unknown codes
+(created by another process) trigger one reload of the table; unknown names
+are inserted. Hot paths (serializers, alert checks, daily aggregation) then
+work on integer codes without string comparisons or extra queries.
+"""
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+_lock = threading.Lock()
+_names = {}     # code -> name
+_codes = {}     # name -> code
+_matching = {}  # lower-cased name -> frozenset of codes
+
+
+def _remember(code, name):
+    with _lock:
+        _names[code] = name
+        _codes[name] = code
+        _matching.clear()
+
+
+def _load():
+    from .models import WeatherCondition
+    rows = list(WeatherCondition.objects.values_list('id', 'name'))
+    with _lock:
+        _names.update(rows)
+        _codes.update((name, code) for code, name in rows)
+        _matching.clear()
+
+
+def clear_cache():
+    with _lock:
+        _names.clear()
+        _codes.clear()
+        _matching.clear()
+
+
+def name_for(code):
+    """Condition name for a code, or None for a missing code."""
+    if code is None:
+        return None
+    name = _names.get(code)
+    if name is None:
+        _load()
+        name = _names.get(code)
+    return name
+
+
+def code_for(name):
+    """Code for a condition name, creating the lookup row if it is new."""
+    code = _codes.get(name)
+    if code is not None:
+        return code
+
+    from .models import WeatherCondition
+    condition, created = WeatherCondition.objects.get_or_create(name=name)
+    if created:
+        # Only cache a new code once it is committed, so a rollback cannot leave a dangling code behind
+        transaction.on_commit(lambda: _remember(condition.pk, condition.name))
+    else:
+        _remember(condition.pk, condition.name)
+    return condition.pk
+
+
+def ensure_known(codes):
+    """Reload the table once if any of `codes` has not been seen by this process."""
+    if any(code not in _names for code in codes if code is not None):
+        _load()
+
+
+async def aensure_known(codes):
+    """ensure_known for async views: only leaves the event loop when a code is unknown."""
+    if any(code not in _names for code in codes if code is not None):
+        await sync_to_async(_load)()
+
+
+def matching_codes(name):
+    """Codes of every known condition equal to `name`, ignoring case."""
+    key = name.lower()
+    codes = _matching.get(key)
+    if codes is None:
+        with _lock:
+            codes = frozenset(code for code, known in _names.items() if known.lower() == key)
+            _matching[key] = codes
+    return codes
@@ -0,0 +1,55 @@
+"""
+Queries and payload of the per-city dashboard, shared by the sync and
+async dashboard views.
+"""
+from .flat_serializers import (
+    alert_serializer,
+    city_serializer,
+    daily_summary_serializer,
+    forecast_data_serializer,
+    latest_observation_serializer,
+)
+from .models import Alert, City, CityLatestObservation, DailySummary, ForecastData
+
+DAILY_SUMMARIES = 10  # Same as the first page of the daily summaries list
+ALERTS = 10  # Same as the first page of the alert list
+
+
+def city_rows(city_id):
+    return city_serializer.values(City.objects.filter(pk=city_id))
+
+
+def dashboard_rows(city_id, user, today):
+    """
+    `.values()` querysets of the latest observation, recent daily
+    summaries, the user's alerts since `today` and the forecast from
+    `today` onwards, without the city columns.
+    """
+    latest = latest_observation_serializer.values(
+        CityLatestObservation.objects.filter(city_id=city_id), exclude=('city',)
+    )
+    summaries = daily_summary_serializer.values(
+        DailySummary.objects.filter(city_id=city_id).order_by('-date', '-id'), exclude=('city',)
+    )[:DAILY_SUMMARIES]
+    alerts = alert_serializer.values(
+        Alert.objects.filter(user=user, city_id=city_id, created_at__date__gte=today).order_by('-created_at', '-id'),
+        exclude=('city', 'user'),
+    )[:ALERTS]
+    forecasts = forecast_data_serializer.values(
+        ForecastData.objects.filter(city_id=city_id, timestamp__date__gte=today).order_by('timestamp'),
+        exclude=('city',),
+    )
+    return latest, summaries, alerts, forecasts
+
+
+def dashboard_payload(city, latest, summaries, alerts, forecasts):
+    """The dashboard response from the fetched rows; `latest` may be None."""
+    return {
+        'city': city_serializer.to_representation(city),
+        'latest_weather': (
+            latest_observation_serializer.to_representation(latest, exclude=('city',)) if latest else None
+        ),
+        'daily_summaries': daily_summary_serializer.many(summaries, exclude=('city',)),
+        'alerts': alert_serializer.many(alerts, exclude=('city', 'user')),
+        'forecast': forecast_data_serializer.many(forecasts, exclude=('city',)),
+    }
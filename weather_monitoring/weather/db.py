@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a process-local lock
+    fcntl = None
+
+# Used when there is no database file to lock (in-memory DB) or no fcntl.
+_local_writer_lock = threading.Lock()
+
+
+def _lock_path(connection):
+    """Path of the writer lock file that sits next to the SQLite database."""
+    if fcntl is None or connection.is_in_memory_db():
+        return None
+    return f"{connection.settings_dict['NAME']}-writer.lock"
+
+
+@contextmanager
+def _writer_lock(connection):
+    """
+    Hold the single-writer lock for the database behind `connection`.
+    Uses an exclusive flock so Celery workers and web processes on the same
+    node queue up behind each other instead of spinning on SQLITE_BUSY.
+    """
+    path = _lock_path(connection)
+    if path is None:
+        with _local_writer_lock:
+            yield
+        return
+
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """
+    Run a block of ORM writes as a single transaction.
+
+    When SQLITE_HIGH_CONCURRENCY is enabled, writers are serialized through
+    one lock per database file so that bursts of `update_or_create` calls
+    from ingest tasks are applied one transaction at a time. In WAL mode
+    readers never wait on this lock. On other backends (or when the mode is
+    off) this is just `transaction.atomic()`.
+    """
+    connection = connections[using]
+    serialize = (
+        settings.SQLITE_HIGH_CONCURRENCY
+        and connection.vendor == 'sqlite'
+        and not connection.in_atomic_block  # Nested blocks join the outer transaction
+    )
+    if not serialize:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    with _writer_lock(connection):
+        with transaction.atomic(using=using):
+            yield
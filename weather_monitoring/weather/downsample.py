@@ -0,0 +1,55 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for chart series.
+
+LTTB keeps the first and last points and picks one point per bucket in
+between: the one forming the largest triangle with the point picked in
+the previous bucket and the average of the next bucket. Unlike striding
+or averaging, it preserves peaks and troughs, so a chart of a few
+hundred points looks like the full series.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Indices of the points LTTB keeps from the series (x, y), sorted by x.
+    Returns every index when the series already fits in `max_points`.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if max_points >= n or n <= 2:
+        return np.arange(n)
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+
+    buckets = max_points - 2
+    # Bucket boundaries over the interior points 1 .. n-2; every bucket holds at least one point
+    edges = (np.arange(buckets + 1) * ((n - 2) / buckets)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The "next bucket" of the last bucket is the last point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y[i] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def lttb(x, y, max_points):
+    """Downsampled (x, y) arrays with at most `max_points` points."""
+    indices = lttb_indices(x, y, max_points)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
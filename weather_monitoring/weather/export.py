@@ -0,0 +1,97 @@
+"""
+Streaming bulk export of observations and forecasts as NDJSON or CSV.
+
+Rows are read through `.iterator(chunk_size=...)` (a server-side cursor
+on PostgreSQL, chunked fetches on SQLite) and encoded chunk by chunk, so
+memory use is bounded by the chunk size however many rows are exported.
+The same generator feeds the export endpoints and the management command.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+from .conditions import name_for
+from .flat_serializers import FlatSerializer, format_datetime
+from .models import ForecastData, WeatherData
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+_observation_columns = FlatSerializer(
+    'id',
+    'city_id',
+    ('city', 'city__name'),
+    ('timestamp', 'timestamp', format_datetime),
+    ('main', 'condition_id', name_for),
+    'temp',
+    'feels_like',
+    'humidity',
+    'wind_speed',
+)
+
+_forecast_columns = FlatSerializer(
+    'id',
+    'city_id',
+    ('city', 'city__name'),
+    ('timestamp', 'timestamp', format_datetime),
+    ('main', 'condition_id', name_for),
+    ('description', 'detail_id', name_for),
+    'temp',
+    'feels_like',
+    'humidity',
+    'wind_speed',
+)
+
+EXPORTS = {
+    'observations': (WeatherData, _observation_columns),
+    'forecasts': (ForecastData, _forecast_columns),
+}
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(kind, city_id=None, start=None, end=None):
+    """`.values()` rows of an export, filtered by city and start <= timestamp < end."""
+    model, columns = EXPORTS[kind]
+    queryset = model.objects.all()
+    if city_id is not None:
+        queryset = queryset.filter(city_id=city_id)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lt=end)
+    return columns.values(queryset.order_by('timestamp', 'id'))
+
+
+def stream_export(kind, file_format, city_id=None, start=None, end=None, chunk_size=None):
+    """
+    Yield the export as text chunks of about `chunk_size` rows each.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    _, columns = EXPORTS[kind]
+    rows = export_queryset(kind, city_id, start, end).iterator(chunk_size=chunk_size)
+
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        names = [name for name, _, _ in columns.fields]
+        yield writer.writerow(names)
+        encode = lambda data: writer.writerow(data.values())  # noqa: E731
+    else:
+        encode = lambda data: json.dumps(data, separators=(',', ':')) + '\n'  # noqa: E731
+
+    lines = []
+    for row in rows:
+        lines.append(encode(columns.to_representation(row)))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
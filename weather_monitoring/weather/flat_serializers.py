@@ -0,0 +1,142 @@
+"""
+Flat, high-throughput serialization for read endpoints.
+
+A FlatSerializer describes the same output as one of the ModelSerializers
+in `weather.serializers`, but reads `.values()` rows: related city/user
+columns are fetched through a single JOIN in the same query, and each row
+becomes a plain dict without the DRF field pipeline. The ModelSerializers
+are still used for writes and single-object endpoints.
+"""
+from django.utils import timezone as dj_timezone
+
+from .conditions import name_for
+
+
+def format_datetime(value):
+    """ISO 8601 in the current time zone, matching DRF's DateTimeField output."""
+    value = value.astimezone(dj_timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def format_date(value):
+    return value.isoformat()
+
+
+def instance_row(instance):
+    """A `.values()`-style row (column name -> value) for a model instance."""
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+class FlatSerializer:
+    """
+    Ordered output fields, each given as a name (copied from the column of
+    the same name), a (name, column, convert) tuple, or a (name, FlatSerializer)
+    pair for a nested related object read through `name__` lookups.
+    """
+
+    def __init__(self, *fields):
+        self.fields = []
+        for field in fields:
+            if isinstance(field, str):
+                field = (field, field, None)
+            elif len(field) == 2:
+                field = (field[0], field[1], None)
+            self.fields.append(field)
+
+    def columns(self, prefix='', exclude=()):
+        for name, source, _ in self.fields:
+            if name in exclude:
+                continue
+            if isinstance(source, FlatSerializer):
+                yield from source.columns(f"{prefix}{name}__")
+            else:
+                yield prefix + source
+
+    def values(self, queryset, exclude=()):
+        """The queryset as `.values()` rows holding every column this serializer reads."""
+        return queryset.values(*self.columns(exclude=exclude))
+
+    def to_representation(self, row, prefix='', extra=None, exclude=()):
+        data = {}
+        for name, source, convert in self.fields:
+            if name in exclude:
+                continue
+            if extra and name in extra:
+                data[name] = extra[name]
+            elif isinstance(source, FlatSerializer):
+                data[name] = source.to_representation(row, f"{prefix}{name}__")
+            else:
+                value = row[prefix + source]
+                data[name] = convert(value) if convert is not None and value is not None else value
+        return data
+
+    def many(self, rows, extra=None, exclude=()):
+        """
+        Serialize rows. Fields present in `extra` (e.g. a city shared by every
+        row) are emitted as given instead of being read from the rows, and
+        fields in `exclude` are left out.
+        """
+        return [self.to_representation(row, extra=extra, exclude=exclude) for row in rows]
+
+
+city_serializer = FlatSerializer('id', 'name', 'country_code', 'latitude', 'longitude', 'altitude')
+
+user_serializer = FlatSerializer('id', 'username', 'email')
+
+weather_data_serializer = FlatSerializer(
+    'id',
+    ('city', city_serializer),
+    ('timestamp', 'timestamp', format_datetime),
+    ('main', 'condition_id', name_for),
+    'temp',
+    'feels_like',
+    'humidity',
+    'wind_speed',
+)
+
+# Same output as weather_data_serializer, read from CityLatestObservation
+latest_observation_serializer = FlatSerializer(
+    ('id', 'observation_id'),
+    ('city', city_serializer),
+    ('timestamp', 'timestamp', format_datetime),
+    ('main', 'condition_id', name_for),
+    'temp',
+    'feels_like',
+    'humidity',
+    'wind_speed',
+)
+
+daily_summary_serializer = FlatSerializer(
+    'id',
+    ('city', city_serializer),
+    ('date', 'date', format_date),
+    'avg_temp',
+    'max_temp',
+    'min_temp',
+    'avg_humidity',
+    'avg_wind_speed',
+    'dominant_condition',
+    'dominant_reasoning',
+)
+
+alert_serializer = FlatSerializer(
+    'id',
+    ('user', user_serializer),
+    ('city', city_serializer),
+    ('created_at', 'created_at', format_datetime),
+    'message',
+)
+
+forecast_data_serializer = FlatSerializer(
+    'id',
+    ('city', city_serializer),
+    ('timestamp', 'timestamp', format_datetime),
+    'temp',
+    'feels_like',
+    'humidity',
+    'wind_speed',
+    ('main', 'condition_id', name_for),
+    ('description', 'detail_id', name_for),
+)
@@ -0,0 +1,218 @@
+"""
+Live updates pushed to subscribed clients over Server-Sent Events.
+
+Tasks publish small events (new observation, new alert, refreshed
+forecast or daily summary) to channels:
+
+    city:<city_id>                   events every subscriber of the city receives
+    user:<user_id>:city:<city_id>    alerts for one user in one city
+
+Each event is encoded once as an SSE frame at publish time. Every
+process keeps one Hub that fans frames out to the asyncio queues of its
+local subscribers. Publishing goes through Redis pub/sub (LIVE_REDIS_URL,
+REDIS_URL by default) and each web process holds a single pattern
+subscription, so tasks running in Celery workers reach clients connected
+to any web process. With LIVE_REDIS_URL empty, the hub is in-memory and
+only reaches subscribers in the publishing process (development with
+eager tasks, tests).
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL_PREFIX = 'weather:live:'
+
+
+def city_channel(city_id):
+    return f"city:{city_id}"
+
+
+def user_city_channel(user_id, city_id):
+    return f"user:{user_id}:city:{city_id}"
+
+
+def encode_event(event, data):
+    """Encode an SSE frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """
+    A bounded queue of frames for one client. When the client falls
+    behind, the oldest frames are dropped instead of growing memory.
+    """
+
+    def __init__(self, hub, channels, maxsize):
+        self.hub = hub
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, frame):
+        # Runs on the subscription's event loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    async def get(self, timeout=None):
+        """Next frame, or raise asyncio.TimeoutError after `timeout` seconds."""
+        if not self.queue.empty():
+            return self.queue.get_nowait()  # Skip the timeout machinery when a frame is waiting
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """
+    Per-process registry of subscriptions by channel. `publish` may be
+    called from any thread; delivery happens on each subscription's loop.
+    """
+
+    def __init__(self, redis_url=None, queue_size=100):
+        self.redis_url = redis_url
+        self.queue_size = queue_size
+        self._subscriptions = {}  # channel -> set of Subscription
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener = None
+        self.ready = None  # asyncio.Event set once the Redis listener is subscribed
+
+    def subscribe(self, channels):
+        """Subscribe to `channels`; must be called from a running event loop."""
+        subscription = Subscription(self, channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        if self.redis_url:
+            self._ensure_listener(subscription.loop)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subscribers in self._subscriptions.values() for sub in subscribers})
+
+    def dispatch(self, channel, frame):
+        """Deliver a frame to this process's subscribers of `channel`."""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        by_loop = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, batch in by_loop.items():
+            # One wake-up per event loop, however many subscribers it serves
+            loop.call_soon_threadsafe(_deliver, batch, frame)
+
+    def publish(self, channel, event, data):
+        """Publish an event to every subscriber of `channel` in any process."""
+        frame = encode_event(event, data)
+        if not self.redis_url:
+            self.dispatch(channel, frame)
+            return
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url)
+        self._redis.publish(REDIS_CHANNEL_PREFIX + channel, frame)
+
+    async def aclose(self):
+        """Stop the Redis listener, if any."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def _ensure_listener(self, loop):
+        if self._listener is not None and not self._listener.done() and self._listener.get_loop() is loop:
+            return
+        self.ready = asyncio.Event()
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + '*')
+                    self.ready.set()
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            channel = message['channel'].decode()[len(REDIS_CHANNEL_PREFIX):]
+                            self.dispatch(channel, message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Live update listener lost its Redis connection: %s; reconnecting.", e)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+def _deliver(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.put(frame)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = Hub(settings.LIVE_REDIS_URL, settings.LIVE_QUEUE_SIZE)
+    return _hub
+
+
+def publish_on_commit(channel, event, data):
+    """
+    Publish once the current transaction commits. Failures are logged and
+    never break the task that wrote the data.
+    """
+    def publish():
+        try:
+            get_hub().publish(channel, event, data)
+        except Exception as e:
+            logger.warning("Failed to publish live '%s' event to %s: %s", event, channel, e)
+
+    transaction.on_commit(publish)
+
+
+async def event_stream(hub, channels, heartbeat):
+    """
+    SSE frames for a new subscription to `channels`, with a comment line
+    every `heartbeat` seconds of silence so proxies keep the connection
+    open. The subscription is removed when the client disconnects.
+    """
+    subscription = hub.subscribe(channels)
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MS}\n: connected\n\n"
+        while True:
+            try:
+                yield await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        subscription.close()
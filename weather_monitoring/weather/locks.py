@@ -0,0 +1,95 @@
+"""
+Task-level locks and enqueue deduplication.
+
+Locks are cache keys set with `cache.add`, which is an atomic SET NX on
+the Redis cache shared by every web and worker process.
+
+- `SingletonTask` is a Celery base task that lets one run per task and
+  arguments at a time. An overlapping run is skipped, or with
+  `overlap='queue'` is queued to run once the current run is over.
+- `enqueue_once()` coalesces duplicate enqueues: while a task with the
+  same arguments is waiting in the queue, further enqueues are dropped.
+"""
+import hashlib
+import json
+import logging
+import uuid
+
+from celery import Task
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def task_key(prefix, name, args=(), kwargs=None):
+    signature = json.dumps([list(args), kwargs or {}], sort_keys=True, default=str)
+    return f"{prefix}:{name}:{hashlib.sha1(signature.encode()).hexdigest()}"
+
+
+def acquire(key, token, timeout):
+    """Take the lock `key` for `token`; False if someone else holds it. It expires after `timeout` seconds."""
+    return cache.add(key, token, timeout)
+
+
+def owner(key):
+    return cache.get(key)
+
+
+def release(key, token):
+    # Only the holder releases; a lock that expired and was taken by another run is left alone
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def enqueue_once(task, args=(), kwargs=None, countdown=None):
+    """
+    Enqueue `task` unless the same task and arguments is already waiting
+    to run. Returns the AsyncResult, or None when coalesced.
+    """
+    key = task_key('task-pending', task.name, args, kwargs)
+    task_id = uuid.uuid4().hex
+    timeout = getattr(task, 'lock_timeout', SingletonTask.lock_timeout) + (countdown or 0)
+    if not cache.add(key, task_id, timeout):
+        logger.info("%s%s is already queued. Skipping duplicate enqueue.", task.name, tuple(args))
+        return None
+    try:
+        return task.apply_async(args, kwargs, countdown=countdown, task_id=task_id)
+    except Exception:
+        cache.delete(key)
+        raise
+
+
+class SingletonTask(Task):
+    """
+    Base task running at most one instance per task and arguments.
+
+    overlap       'skip' drops a run that starts while another is running;
+                  'queue' enqueues it again (coalesced) to run afterwards
+    lock_timeout  seconds after which the lock of a run whose worker died
+                  is released
+    requeue_delay seconds before a queued run is retried
+    """
+    abstract = True
+    overlap = 'skip'
+    lock_timeout = 30 * 60
+    requeue_delay = 60
+
+    def __call__(self, *args, **kwargs):
+        token = self.request.id or uuid.uuid4().hex
+        # This message is no longer waiting, so the next enqueue must not be coalesced into it
+        release(task_key('task-pending', self.name, args, kwargs), token)
+        key = task_key('task-lock', self.name, args, kwargs)
+        acquired = acquire(key, token, self.lock_timeout)
+        # Eager retries re-enter with the same task id while the lock is held
+        if not acquired and owner(key) != token:
+            if self.overlap == 'queue':
+                enqueue_once(self, args, kwargs, countdown=self.requeue_delay)
+                logger.info("%s%s is already running. Queued to run again.", self.name, args)
+            else:
+                logger.info("%s%s is already running. Skipped.", self.name, args)
+            return None
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            if acquired:
+                release(key, token)
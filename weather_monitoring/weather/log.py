@@ -0,0 +1,123 @@
+"""
+Logging pipeline: structured JSON records, per-logger sampling and
+handlers that write from a background thread.
+
+With LOG_BACKGROUND on, `start_background_logging()` (called from
+WeatherConfig.ready) moves the handlers of the loggers in LOGGING behind
+a QueueHandler. Logging calls then only merge the message and enqueue
+the record; a QueueListener thread formats it and does the file and
+console I/O. Forked Celery worker processes start their own listener.
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with `extra` fields as top-level keys."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in `rate` records at or below `max_level`; records above it
+    (warnings and errors by default) always pass. Attach it to a logger
+    to sample that logger's own records.
+    """
+
+    def __init__(self, rate=1, max_level='INFO'):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.max_level = logging._checkLevel(max_level)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno > self.max_level or self.rate == 1:
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Merge the arguments now, as they may change once the call returns; formatting
+        # (timestamps, JSON, tracebacks) is left to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_pipelines = []  # (queue handler, listener) pairs
+_lock = threading.Lock()
+
+
+def _listen(handlers):
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return records, listener
+
+
+def start_background_logging(logger_names):
+    """
+    Put each group of loggers sharing the same handlers behind one
+    QueueHandler and listener thread. Safe to call more than once.
+    """
+    with _lock:
+        if _pipelines:
+            return
+        groups = {}
+        for name in logger_names:
+            logger = logging.getLogger(name)
+            if logger.handlers:
+                groups.setdefault(tuple(logger.handlers), []).append(logger)
+        for handlers, loggers in groups.items():
+            records, listener = _listen(handlers)
+            queue_handler = BackgroundQueueHandler(records)
+            for logger in loggers:
+                logger.handlers = [queue_handler]
+            _pipelines.append((queue_handler, listener))
+    atexit.register(stop_background_logging)
+
+
+def stop_background_logging():
+    """Flush queued records and stop the listener threads."""
+    with _lock:
+        for _, listener in _pipelines:
+            if listener._thread is not None:
+                listener.stop()
+
+
+def _restart_after_fork():
+    # A forked child has the queue but not the listener thread: give it its own
+    for index, (queue_handler, listener) in enumerate(_pipelines):
+        records, new_listener = _listen(listener.handlers)
+        queue_handler.queue = records
+        _pipelines[index] = (queue_handler, new_listener)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,113 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone as dj_timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from weather import response_cache
+from weather.models import Alert, City, CityLatestObservation, DailySummary, ForecastData, WeatherData
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Compares the four per-city dashboard requests with the single dashboard endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Dashboard loads per variant')
+        parser.add_argument('--cache', action='store_true', help='Keep the response cache enabled')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(
+                ALLOWED_HOSTS=['testserver'], RESPONSE_CACHE_ENABLED=options['cache'],
+                API_THROTTLE_ENABLED=False,  # Hundreds of loads by one user would be rate limited
+            ):
+                city, user = self._seed()
+                self._report(city, user, options['iterations'])
+                raise _Rollback  # Leave the database untouched
+        except _Rollback:
+            pass
+        # The rolled-back city id can be reused; drop any responses cached for it
+        response_cache.city_changed(city.id)
+
+    def _seed(self):
+        user = User.objects.create(username='__bench_dashboard__')
+        city = City.objects.create(name='__bench_dashboard_city__', latitude=0.0, longitude=0.0)
+        now = dj_timezone.now()
+        for hours in range(48):
+            observation = WeatherData.objects.create(city=city, main='Clear', temp=20.0, feels_like=19.0, humidity=50)
+            WeatherData.objects.filter(pk=observation.pk).update(timestamp=now - timedelta(hours=hours))
+        CityLatestObservation.record(WeatherData.objects.filter(city=city).order_by('-timestamp').first())
+        DailySummary.objects.bulk_create(
+            DailySummary(
+                city=city, date=(now - timedelta(days=days)).date(), avg_temp=20.0, max_temp=25.0,
+                min_temp=15.0, avg_humidity=50.0, avg_wind_speed=3.0, dominant_condition='Clear',
+            )
+            for days in range(30)
+        )
+        for hours in range(0, 24, 3):
+            ForecastData.objects.create(
+                city=city, timestamp=now + timedelta(hours=hours), main='Rain', description='light rain',
+                temp=18.0, feels_like=17.0,
+            )
+        for _ in range(5):
+            Alert.objects.create(user=user, city=city, message='Temperature exceeded threshold')
+        return city, user
+
+    def _run(self, client, urls, iterations):
+        latencies = []
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            for _ in range(iterations):
+                start = time.perf_counter()
+                for url, params in urls:
+                    response = client.get(url, params)
+                    assert response.status_code == 200, (url, response.status_code)
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, queries / iterations
+
+    def _report(self, city, user, iterations):
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        params = {'city': city.id}
+        variants = [
+            ('fan-out', [
+                (reverse('weatherdata-latest'), params),
+                (reverse('dailysummary-list'), params),
+                (reverse('alert-list'), params),
+                (reverse('forecast-data-list'), params),
+            ]),
+            ('dashboard', [(reverse('city-dashboard', args=[city.id]), None)]),
+        ]
+        self.stdout.write(
+            f"{'variant':<10} {'requests':>8} {'queries':>8} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}"
+        )
+        for label, urls in variants:
+            self._run(client, urls, 5)  # Warm up
+            latencies, queries = self._run(client, urls, iterations)
+            size = sum(len(client.get(url, params).content) for url, params in urls)
+            self.stdout.write(
+                f"{label:<10} {len(urls):>8} {queries:>8.1f} {statistics.median(latencies):>8.2f} "
+                f"{_percentile(latencies, 0.95):>8.2f} {size:>8}"
+            )
@@ -0,0 +1,126 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from weather.conditions import code_for
+from weather.flat_serializers import (
+    alert_serializer,
+    daily_summary_serializer,
+    forecast_data_serializer,
+    weather_data_serializer,
+)
+from weather.models import Alert, City, DailySummary, ForecastData, WeatherData
+from weather.renderers import FastJSONRenderer
+from weather.serializers import (
+    AlertSerializer,
+    DailySummarySerializer,
+    ForecastDataSerializer,
+    WeatherDataSerializer,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compares queries and ms per 1,000 rows for the DRF serializers and the flat serialization path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per model to serialize')
+        parser.add_argument('--cities', type=int, default=20, help='Cities the rows are spread over')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'], options['cities'])
+                self._report(options['rows'], options['repeat'])
+                raise _Rollback  # Leave the database untouched
+        except _Rollback:
+            pass
+
+    def _seed(self, rows, n_cities):
+        user = User.objects.create(username='__bench_serialization__')
+        cities = City.objects.bulk_create(
+            City(name=f'__bench_city_{i}__', latitude=0.0, longitude=0.0) for i in range(n_cities)
+        )
+        clear, rain = code_for('Clear'), code_for('Rain')
+        base = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+        WeatherData.objects.bulk_create(
+            WeatherData(
+                city=cities[i % n_cities], timestamp=base + timedelta(minutes=i),
+                condition_id=clear, temp=20.0, feels_like=19.5, humidity=50, wind_speed=3.0,
+            )
+            for i in range(rows)
+        )
+        # auto_now_add overrides the timestamps above; spread them out again so (city, timestamp) stays unique
+        for i, pk in enumerate(WeatherData.objects.filter(city__in=cities).order_by('pk').values_list('pk', flat=True)):
+            WeatherData.objects.filter(pk=pk).update(timestamp=base + timedelta(minutes=i))
+        DailySummary.objects.bulk_create(
+            DailySummary(
+                city=cities[i % n_cities], date=(base + timedelta(days=i // n_cities)).date(),
+                avg_temp=20.0, max_temp=25.0, min_temp=15.0, avg_humidity=50.0, avg_wind_speed=3.0,
+                dominant_condition='Clear', dominant_reasoning='Most frequent condition',
+            )
+            for i in range(rows)
+        )
+        ForecastData.objects.bulk_create(
+            ForecastData(
+                city=cities[i % n_cities], timestamp=base + timedelta(hours=i),
+                condition_id=rain, detail_id=rain, temp=18.0, feels_like=17.0, humidity=70, wind_speed=5.0,
+            )
+            for i in range(rows)
+        )
+        Alert.objects.bulk_create(
+            Alert(user=user, city=cities[i % n_cities], message='Temperature exceeded threshold')
+            for i in range(rows)
+        )
+
+    def _measure(self, render, repeat):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        best = None
+        for _ in range(repeat):
+            queries = 0
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                render()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return queries, best
+
+    def _report(self, rows, repeat):
+        cases = [
+            ('weather data', WeatherData.objects.filter(city__name__startswith='__bench_city_'),
+             WeatherDataSerializer, weather_data_serializer),
+            ('daily summaries', DailySummary.objects.filter(city__name__startswith='__bench_city_'),
+             DailySummarySerializer, daily_summary_serializer),
+            ('forecasts', ForecastData.objects.filter(city__name__startswith='__bench_city_'),
+             ForecastDataSerializer, forecast_data_serializer),
+            ('alerts', Alert.objects.filter(user__username='__bench_serialization__'),
+             AlertSerializer, alert_serializer),
+        ]
+        scale = 1000 / rows
+        self.stdout.write(f"{'endpoint':<16} {'path':<6} {'queries':>8} {'ms/1k rows':>11}")
+        for label, queryset, model_serializer, flat_serializer in cases:
+            queryset = queryset.order_by('-id')
+            drf_queries, drf_seconds = self._measure(
+                lambda: JSONRenderer().render(model_serializer(queryset.all(), many=True).data), repeat
+            )
+            flat_queries, flat_seconds = self._measure(
+                lambda: FastJSONRenderer().render(flat_serializer.many(flat_serializer.values(queryset.all()))),
+                repeat,
+            )
+            self.stdout.write(f"{label:<16} {'drf':<6} {drf_queries:>8} {drf_seconds * 1000 * scale:>11.1f}")
+            self.stdout.write(f"{label:<16} {'flat':<6} {flat_queries:>8} {flat_seconds * 1000 * scale:>11.1f}")
+            self.stdout.write(f"{label:<16} speedup x{drf_seconds / flat_seconds:.1f}")
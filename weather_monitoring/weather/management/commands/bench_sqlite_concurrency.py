@@ -0,0 +1,101 @@
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from weather.db import serialized_write
+from weather.models import City, WeatherData
+
+BENCH_CITY_NAME = '__bench_sqlite__'
+
+
+class Command(BaseCommand):
+    help = 'Measures read latency on the weather data endpoints while an ingest-style write storm runs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run the benchmark')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads')
+        parser.add_argument('--batch', type=int, default=50, help='update_or_create calls per write transaction')
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        self.stdout.write(f"journal_mode={journal_mode}, readers={options['readers']}, writers={options['writers']}")
+
+        city, _ = City.objects.get_or_create(name=BENCH_CITY_NAME)
+        stop = threading.Event()
+        read_latencies = []
+        stats = {'writes': 0, 'read_errors': 0, 'write_errors': 0}
+        stats_lock = threading.Lock()
+
+        def writer(offset):
+            base = datetime(2000, 1, 1, tzinfo=dt_timezone.utc) + timedelta(days=offset * 365)
+            n = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        with serialized_write():
+                            for _ in range(options['batch']):
+                                n += 1
+                                WeatherData.objects.update_or_create(
+                                    city=city,
+                                    timestamp=base + timedelta(minutes=n),
+                                    defaults={'main': 'Clear', 'temp': 20.0, 'feels_like': 20.0},
+                                )
+                        with stats_lock:
+                            stats['writes'] += options['batch']
+                    except OperationalError:
+                        with stats_lock:
+                            stats['write_errors'] += 1
+            finally:
+                connections.close_all()
+
+        def reader():
+            latencies = []
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        WeatherData.objects.filter(city=city).order_by('-timestamp').first()
+                        list(WeatherData.objects.filter(city=city).order_by('-timestamp')[:10])
+                    except OperationalError:
+                        with stats_lock:
+                            stats['read_errors'] += 1
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+                with stats_lock:
+                    read_latencies.extend(latencies)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        WeatherData.objects.filter(city=city).delete()
+        city.delete()
+
+        if not read_latencies:
+            self.stdout.write(self.style.ERROR('No successful reads recorded.'))
+            return
+
+        read_latencies.sort()
+        quantiles = statistics.quantiles(read_latencies, n=100)
+        self.stdout.write(
+            f"reads={len(read_latencies)} p50={quantiles[49]:.2f}ms p95={quantiles[94]:.2f}ms "
+            f"p99={quantiles[98]:.2f}ms max={read_latencies[-1]:.2f}ms read_errors={stats['read_errors']}"
+        )
+        self.stdout.write(
+            f"rows_written={stats['writes']} ({stats['writes'] / options['duration']:.0f}/s) "
+            f"write_errors={stats['write_errors']}"
+        )
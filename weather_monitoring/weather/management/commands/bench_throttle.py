@@ -0,0 +1,44 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from weather import throttling
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measures the per-request overhead of the rate limit check on the configured cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=5000, help='Checks per case')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        backend = type(caches['default']).__name__
+        self.stdout.write(f"cache={backend} checks per case={options['checks']}")
+        self.stdout.write(f"{'case':<10} {'p50 µs':>8} {'p95 µs':>8} {'p99 µs':>8}")
+        # A fresh client per check is always allowed; one client past its budget is always rejected
+        with override_settings(API_THROTTLE_ENABLED=True, API_THROTTLE_ENDPOINT_RATE='1/min'):
+            for case in ('allowed', 'rejected'):
+                latencies = []
+                for i in range(options['checks']):
+                    address = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" if case == 'allowed' else '10.255.255.255'
+                    request = factory.get('/api/v1/bench-throttle/', REMOTE_ADDR=address)
+                    request.resolver_match = None
+                    start = time.perf_counter()
+                    wait = throttling.check(request, None)
+                    latencies.append((time.perf_counter() - start) * 1e6)
+                    if (wait is None) != (case == 'allowed') and not (case == 'rejected' and i == 0):
+                        raise AssertionError((case, i, wait))
+                self.stdout.write(
+                    f"{case:<10} {statistics.median(latencies):>8.0f} {_percentile(latencies, 0.95):>8.0f} "
+                    f"{_percentile(latencies, 0.99):>8.0f}"
+                )
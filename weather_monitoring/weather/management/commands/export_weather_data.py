@@ -0,0 +1,53 @@
+import argparse
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import get_current_timezone, is_aware, make_aware
+
+from weather.export import EXPORTS, FORMATS, stream_export
+from weather.models import City
+
+
+def _datetime(value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.combine(parse_date(value), time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"'{value}' is not an ISO date or datetime")
+    return parsed if is_aware(parsed) else make_aware(parsed, get_current_timezone())
+
+
+class Command(BaseCommand):
+    help = 'Streams observations or forecasts to a file (or stdout) as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help='Rows to export')
+        parser.add_argument('--format', dest='file_format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--city', type=int, help='Only rows of this city ID')
+        parser.add_argument('--start', type=_datetime, help='Only rows at or after this ISO date or datetime')
+        parser.add_argument('--end', type=_datetime, help='Only rows before this ISO date or datetime')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        city_id = options['city']
+        if city_id is not None and not City.objects.filter(id=city_id).exists():
+            raise CommandError(f"City {city_id} does not exist.")
+        if options['start'] and options['end'] and options['start'] >= options['end']:
+            raise CommandError("--start must be before --end.")
+
+        chunks = stream_export(
+            options['kind'], options['file_format'], city_id,
+            options['start'], options['end'], options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                written = sum(output.write(chunk) for chunk in chunks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} characters to {options['output']}."))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
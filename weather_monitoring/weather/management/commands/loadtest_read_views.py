@@ -0,0 +1,192 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone as dj_timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from weather.models import Alert, City, CityLatestObservation, DailySummary, ForecastData, WeatherData
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the hot read endpoints through the WSGI handler (a fixed pool of worker threads) '
+        'and their async versions through the ASGI handler (one event loop)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='10,100,500', help='Comma-separated concurrent client counts')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per run')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0.0,
+            help='Added to every query, to model a remote or loaded database',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError("--concurrency must be comma-separated integers.")
+
+        # Worker threads need committed rows, so the data is created for real and deleted afterwards
+        user, city = self._seed()
+        latency = options['db_latency_ms'] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def install_latency(sender, connection, **kwargs):
+            # Fired on every reconnect of the same per-thread connection object
+            if add_latency not in connection.execute_wrappers:
+                connection.execute_wrappers.append(add_latency)
+
+        if latency:
+            connection_created.connect(install_latency)
+        try:
+            # Rate limits would turn most requests into 429s, which are not latency samples of the views
+            with override_settings(ALLOWED_HOSTS=['testserver'], RESPONSE_CACHE_ENABLED=False, API_THROTTLE_ENABLED=False):
+                self._report(user, city, levels, options)
+        finally:
+            connection_created.disconnect(install_latency)
+            city.delete()
+            user.delete()
+
+    def _seed(self):
+        user = User.objects.create(username='__loadtest_read_views__')
+        city = City.objects.create(name='__loadtest_read_views_city__', latitude=0.0, longitude=0.0)
+        now = dj_timezone.now()
+        observation = WeatherData.objects.create(city=city, main='Clear', temp=20.0, feels_like=19.0, humidity=50)
+        CityLatestObservation.record(observation)
+        DailySummary.objects.bulk_create(
+            DailySummary(
+                city=city, date=(now - timedelta(days=days)).date(), avg_temp=20.0, max_temp=25.0,
+                min_temp=15.0, avg_humidity=50.0, avg_wind_speed=3.0, dominant_condition='Clear',
+            )
+            for days in range(10)
+        )
+        for hours in range(0, 24, 3):
+            ForecastData.objects.create(
+                city=city, timestamp=now + timedelta(hours=hours), main='Rain', description='light rain',
+                temp=18.0, feels_like=17.0,
+            )
+        Alert.objects.create(user=user, city=city, message='Temperature exceeded threshold')
+        return user, city
+
+    def _report(self, user, city, levels, options):
+        token = str(AccessToken.for_user(user))
+        params = urlencode({'city': city.id})
+        endpoints = [
+            ('latest', 'weatherdata-latest', 'async-weatherdata-latest', [], params),
+            ('dashboard', 'city-dashboard', 'async-city-dashboard', [city.id], ''),
+        ]
+        self.stdout.write(
+            f"WSGI threads={options['threads']}, requests per run={options['requests']}, "
+            f"db latency={options['db_latency_ms']} ms, response cache off"
+        )
+        self.stdout.write(
+            f"{'endpoint':<10} {'server':<6} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>6}"
+        )
+        for label, sync_name, async_name, args, query in endpoints:
+            for concurrency in levels:
+                for server, name in (('wsgi', sync_name), ('asgi', async_name)):
+                    path = reverse(name, args=args)
+                    stats = asyncio.run(self._run(server, path, query, token, concurrency, options))
+                    self.stdout.write(
+                        f"{label:<10} {server:<6} {concurrency:>7} {stats['throughput']:>8.0f} "
+                        f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} {stats['errors']:>6}"
+                    )
+
+    async def _run(self, server, path, query, token, concurrency, options):
+        if server == 'wsgi':
+            handler = WSGIHandler()
+            pool = ThreadPoolExecutor(options['threads'])
+            loop = asyncio.get_running_loop()
+
+            async def request():
+                return await loop.run_in_executor(pool, self._wsgi_request, handler, path, query, token)
+        else:
+            handler = ASGIHandler()
+
+            async def request():
+                return await self._asgi_request(handler, path, query, token)
+
+        remaining = options['requests']
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                status = await request()
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        if server == 'wsgi':
+            pool.shutdown()
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': _percentile(latencies, 0.95),
+            'p99': _percentile(latencies, 0.99),
+            'errors': errors,
+        }
+
+    @staticmethod
+    def _wsgi_request(handler, path, query, token):
+        environ = RequestFactory().get(path, QUERY_STRING=query, HTTP_AUTHORIZATION=f'Bearer {token}').environ
+        status = []
+        response = handler(environ, lambda line, headers: status.append(int(line.split()[0])))
+        b''.join(response)
+        response.close()  # Fires request_finished, which closes the thread's connection as a server would
+        return status[0]
+
+    @staticmethod
+    async def _asgi_request(handler, path, query, token):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+        body_sent = False
+        disconnected = asyncio.Event()
+        messages = []
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnected.wait()  # The client stays connected until the response is complete
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        await handler(scope, receive, send)
+        disconnected.set()
+        return messages[0]['status']
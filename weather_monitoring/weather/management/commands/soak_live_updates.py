@@ -0,0 +1,106 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather import live
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Soak-tests the live update hub with thousands of concurrent subscribers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=5000, help='Concurrent subscribers')
+        parser.add_argument('--cities', type=int, default=50, help='Cities the subscribers are spread over')
+        parser.add_argument('--messages', type=int, default=20, help='Observations published per city')
+        parser.add_argument('--interval', type=float, default=0.01, help='Seconds between publish rounds')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait for delivery')
+
+    def handle(self, *args, **options):
+        hub = live.Hub(settings.LIVE_REDIS_URL, queue_size=options['messages'] + 10)
+        backend = 'redis' if settings.LIVE_REDIS_URL else 'in-memory'
+        self.stdout.write(
+            f"backend={backend}, subscribers={options['subscribers']}, cities={options['cities']}, "
+            f"messages per city={options['messages']}"
+        )
+        stats = asyncio.run(self._soak(hub, options))
+
+        expected = options['subscribers'] * options['messages']
+        self.stdout.write(
+            f"delivered={stats['delivered']}/{expected} in {stats['seconds']:.2f}s "
+            f"({stats['delivered'] / stats['seconds']:.0f} frames/s), heartbeats={stats['heartbeats']}"
+        )
+        if stats['latencies']:
+            latencies = stats['latencies']
+            self.stdout.write(
+                f"delivery latency ms: p50={statistics.median(latencies):.1f} "
+                f"p95={_percentile(latencies, 0.95):.1f} p99={_percentile(latencies, 0.99):.1f} "
+                f"max={max(latencies):.1f}"
+            )
+        if stats['delivered'] != expected or stats['remaining']:
+            raise CommandError(
+                f"{expected - stats['delivered']} frames lost; {stats['remaining']} subscriptions left open"
+            )
+
+    async def _soak(self, hub, options):
+        cities, messages = options['cities'], options['messages']
+        latencies = []
+        counts = {'delivered': 0, 'heartbeats': 0}
+
+        async def subscriber(index):
+            channel = live.city_channel(index % cities)
+            received = 0
+            stream = live.event_stream(hub, [channel], heartbeat=1.0)
+            try:
+                await stream.__anext__()  # Subscribed once the retry/connected frame is sent
+                ready.release()
+                while received < messages:
+                    frame = await stream.__anext__()
+                    if frame.startswith(':'):
+                        counts['heartbeats'] += 1
+                        continue
+                    sent_at = json.loads(frame.split('data: ', 1)[1])['sent_at']
+                    latencies.append((time.time() - sent_at) * 1000)
+                    received += 1
+            finally:
+                await stream.aclose()
+                counts['delivered'] += received
+
+        def publisher():
+            # Runs in a thread, like a Celery task publishing after its commit
+            for _ in range(messages):
+                for city_id in range(cities):
+                    hub.publish(live.city_channel(city_id), 'observation', {'city': city_id, 'sent_at': time.time()})
+                time.sleep(options['interval'])
+
+        ready = asyncio.Semaphore(0)
+        started = time.monotonic()
+        tasks = [asyncio.create_task(subscriber(index)) for index in range(options['subscribers'])]
+        for _ in tasks:
+            await ready.acquire()
+        if hub.ready is not None:
+            await hub.ready.wait()
+
+        await asyncio.get_running_loop().run_in_executor(None, publisher)
+        done, pending = await asyncio.wait(tasks, timeout=options['timeout'])
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await hub.aclose()
+
+        return {
+            'delivered': counts['delivered'],
+            'heartbeats': counts['heartbeats'],
+            'latencies': latencies,
+            'seconds': time.monotonic() - started,
+            'remaining': hub.subscriber_count(),
+        }
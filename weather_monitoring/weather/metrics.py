@@ -0,0 +1,105 @@
+"""
+Prometheus metrics for ingestion, Celery tasks, alerts and the API,
+exposed in the text format at `/metrics`.
+
+Counters and histograms are per process. Set PROMETHEUS_MULTIPROC_DIR
+to an empty directory shared by the web and Celery worker processes of a
+host (and wipe it on deploy): every process then writes its samples to
+files there, and `/metrics` on any web process aggregates them all.
+Without it, `/metrics` reports only the serving process.
+
+Labels stay bounded: nothing is labelled per city or per user, so the
+number of series does not grow with the number of cities.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+
+import prometheus_client
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+### Ingestion ###
+
+FETCH_DURATION = prometheus_client.Histogram(
+    'weather_fetch_duration_seconds',
+    'Time to fetch and store one city from OpenWeather, by outcome',
+    ['kind', 'outcome'], buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_RESPONSES = prometheus_client.Counter(
+    'weather_upstream_responses_total',
+    'OpenWeather responses by status code', ['kind', 'status'],
+)
+ROWS_WRITTEN = prometheus_client.Counter(
+    'weather_rows_written_total',
+    'Rows created or updated by tasks', ['task', 'model'],
+)
+
+### Tasks ###
+
+TASK_DURATION = prometheus_client.Histogram(
+    'weather_task_duration_seconds',
+    'Celery task run time, by final state', ['task', 'state'], buckets=TASK_BUCKETS,
+)
+
+### Alerts ###
+
+ALERT_EVALUATIONS = prometheus_client.Counter(
+    'weather_alert_evaluations_total',
+    'Threshold evaluations against new observations, by result', ['result'],
+)
+ALERT_EMAIL_DURATION = prometheus_client.Histogram(
+    'weather_alert_email_seconds',
+    'Time to deliver an alert email, by outcome', ['outcome'], buckets=LATENCY_BUCKETS,
+)
+
+### API ###
+
+REQUEST_DURATION = prometheus_client.Histogram(
+    'weather_http_request_duration_seconds',
+    'API request latency by view', ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = prometheus_client.Histogram(
+    'weather_http_request_queries',
+    'Database queries per API request by view', ['view'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+
+
+### Celery signal receivers (connected in WeatherConfig.ready) ###
+
+_task_started = {}  # task id -> perf_counter() at prerun, per worker process
+
+
+def task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+def worker_process_shutdown(pid=None, **kwargs):
+    # Lets the multiprocess collector drop the live gauges of exited worker processes
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+### Exposition ###
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires `Authorization: Bearer <METRICS_TOKEN>` when that is set."""
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponse(status=401)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -0,0 +1,182 @@
+"""
+Per-request instrumentation: database query count and time, rendering
+(serialization) time, total time and response size.
+
+Queries are counted by an execute wrapper installed on every database
+connection, which reports to the metrics of the request running in the
+current context, so queries the async ORM runs in worker threads count
+too. With DEBUG on, the numbers are returned in `X-DB-Queries`,
+`X-DB-Time-Ms`, `X-Serialization-Time-Ms`, `X-Response-Size` and
+`Server-Timing` headers; otherwise each request is logged to the
+`weather.requests` logger with the numbers as structured fields. Latency
+and query counts per view are also recorded as Prometheus histograms.
+
+Views declare the most queries they may run with `@query_budget(n)`.
+Going over budget is logged, or raises QueryBudgetExceeded when
+QUERY_BUDGET_STRICT is on (as in the test suite).
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics as prometheus
+
+logger = logging.getLogger('weather.requests')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(queries):
+    """
+    Declare the most database queries a view may run per request. Apply
+    it above `@api_view`, so it marks the view function that is routed.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.budget = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.size = None
+
+
+def current_metrics():
+    """Metrics of the request being handled in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def untracked():
+    """Leave the queries run in this block out of the current request's metrics and budget."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver; runs again on every reconnect of the same connection object."""
+    if record_query not in connection.execute_wrappers:
+        # First, so `connection.execute_wrapper()` blocks still pop their own wrapper
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = request.metrics
+        metrics.view = request.resolver_match.view_name if request.resolver_match else view_func.__name__
+        metrics.budget = getattr(view_func, 'query_budget', None)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to bytes) right after this hook
+        metrics = request.metrics
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, metrics):
+        metrics.total_time = time.perf_counter() - metrics.started
+        if not response.streaming:
+            metrics.size = len(response.content)
+        view = metrics.view or 'unmatched'
+        prometheus.REQUEST_DURATION.labels(view, request.method, response.status_code).observe(metrics.total_time)
+        prometheus.REQUEST_QUERIES.labels(view).observe(metrics.queries)
+
+        if metrics.budget is not None and metrics.queries > metrics.budget:
+            message = f"{metrics.view} ran {metrics.queries} queries, over its budget of {metrics.budget}."
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        if settings.DEBUG:
+            response['X-DB-Queries'] = metrics.queries
+            response['X-DB-Time-Ms'] = f"{metrics.db_time * 1000:.2f}"
+            response['X-Serialization-Time-Ms'] = f"{metrics.render_time * 1000:.2f}"
+            if metrics.size is not None:
+                response['X-Response-Size'] = metrics.size
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries", '
+                f'serialize;dur={metrics.render_time * 1000:.2f}, total;dur={metrics.total_time * 1000:.2f}'
+            )
+        else:
+            logger.info(
+                "%s %s %s view=%s queries=%s db_ms=%.2f serialize_ms=%.2f total_ms=%.2f bytes=%s",
+                request.method, request.path, response.status_code, metrics.view, metrics.queries,
+                metrics.db_time * 1000, metrics.render_time * 1000, metrics.total_time * 1000, metrics.size,
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'view': metrics.view,
+                    'queries': metrics.queries,
+                    'db_ms': round(metrics.db_time * 1000, 2),
+                    'serialize_ms': round(metrics.render_time * 1000, 2),
+                    'total_ms': round(metrics.total_time * 1000, 2),
+                    'bytes': metrics.size,
+                },
+            )
+        return response
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+TABLE = "weather_weatherdata"
+LEGACY_TABLE = "weather_weatherdata_legacy"
+SEQUENCE = "weather_weatherdata_part_id_seq"
+MONTHS_AHEAD = 3
+
+
+def _month(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _add_constraints(cursor, primary_key):
+    cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})')
+    cursor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_city_id_timestamp_uniq UNIQUE (city_id, "timestamp")'
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_city_id_fk_weather_city_id "
+        f"FOREIGN KEY (city_id) REFERENCES weather_city (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+
+
+def _swap_table(cursor, partition_clause):
+    """Move the rows of weather_weatherdata into a freshly created table."""
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+    cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE}")
+    cursor.execute(f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) {partition_clause}")
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+
+
+def _copy_and_drop_legacy(cursor):
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+    cursor.execute(f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)")
+    cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+
+def partition_weather_data(apps, schema_editor):
+    """
+    Convert weather_weatherdata into a table partitioned by month on
+    PostgreSQL. The primary key becomes (id, timestamp) because partitioned
+    tables require the partition key in every unique constraint; Django
+    still addresses rows by id. Other backends are left untouched.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp") FROM {TABLE}')
+        oldest = cursor.fetchone()[0]
+
+        _swap_table(cursor, 'PARTITION BY RANGE ("timestamp")')
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        now = datetime.now(dt_timezone.utc)
+        month = _month(oldest or now)
+        last = _month(now)
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+                [month, _next_month(month)],
+            )
+            month = _next_month(month)
+
+        _copy_and_drop_legacy(cursor)
+        _add_constraints(cursor, 'id, "timestamp"')
+
+
+def unpartition_weather_data(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        _swap_table(cursor, "")
+        _copy_and_drop_legacy(cursor)
+        _add_constraints(cursor, "id")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("weather", "0011_alert_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_weather_data, unpartition_weather_data),
+    ]
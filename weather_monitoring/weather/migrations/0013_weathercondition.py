@@ -0,0 +1,137 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# (model, old string field, new condition foreign key)
+CONDITION_FIELDS = [
+    ("WeatherData", "main", "condition"),
+    ("ForecastData", "main", "condition"),
+    ("ForecastData", "description", "detail"),
+]
+
+
+def populate_conditions(apps, schema_editor):
+    """Move condition strings into WeatherCondition and point rows at their codes."""
+    WeatherCondition = apps.get_model("weather", "WeatherCondition")
+    codes = {}
+    for model_name, old_field, new_field in CONDITION_FIELDS:
+        model = apps.get_model("weather", model_name)
+        for name in model.objects.values_list(old_field, flat=True).distinct():
+            if name not in codes:
+                codes[name] = WeatherCondition.objects.get_or_create(name=name)[0].pk
+            model.objects.filter(**{old_field: name}).update(**{f"{new_field}_id": codes[name]})
+
+
+def restore_condition_strings(apps, schema_editor):
+    WeatherCondition = apps.get_model("weather", "WeatherCondition")
+    for model_name, old_field, new_field in CONDITION_FIELDS:
+        model = apps.get_model("weather", model_name)
+        for code, name in WeatherCondition.objects.values_list("id", "name"):
+            model.objects.filter(**{f"{new_field}_id": code}).update(**{old_field: name})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("weather", "0012_partition_weatherdata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeatherCondition",
+            fields=[
+                ("id", models.SmallAutoField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="weatherdata",
+            name="condition",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+        migrations.AddField(
+            model_name="forecastdata",
+            name="condition",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+        migrations.AddField(
+            model_name="forecastdata",
+            name="detail",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+        # Old string columns become nullable so the reverse migration can re-add them before restoring values
+        migrations.AlterField(
+            model_name="weatherdata",
+            name="main",
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name="forecastdata",
+            name="main",
+            field=models.CharField(max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name="forecastdata",
+            name="description",
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.RunPython(populate_conditions, restore_condition_strings),
+        migrations.RemoveField(
+            model_name="weatherdata",
+            name="main",
+        ),
+        migrations.RemoveField(
+            model_name="forecastdata",
+            name="main",
+        ),
+        migrations.RemoveField(
+            model_name="forecastdata",
+            name="description",
+        ),
+        migrations.AlterField(
+            model_name="weatherdata",
+            name="condition",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forecastdata",
+            name="condition",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="forecastdata",
+            name="detail",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="weather.weathercondition",
+            ),
+        ),
+    ]
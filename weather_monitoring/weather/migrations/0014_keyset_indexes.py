@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0013_weathercondition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='alert_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailysummary',
+            index=models.Index(fields=['date', 'id'], name='dailysummary_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['timestamp', 'id'], name='weatherdata_timestamp_id_idx'),
+        ),
+    ]
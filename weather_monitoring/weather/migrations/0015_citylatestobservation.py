@@ -0,0 +1,50 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_observations(apps, schema_editor):
+    """Copy each city's most recent WeatherData row into CityLatestObservation."""
+    City = apps.get_model('weather', 'City')
+    WeatherData = apps.get_model('weather', 'WeatherData')
+    CityLatestObservation = apps.get_model('weather', 'CityLatestObservation')
+    latest = []
+    for city_id in City.objects.values_list('id', flat=True):
+        observation = WeatherData.objects.filter(city_id=city_id).order_by('-timestamp', '-id').first()
+        if observation is not None:
+            latest.append(CityLatestObservation(
+                city_id=city_id,
+                observation_id=observation.pk,
+                timestamp=observation.timestamp,
+                condition_id=observation.condition_id,
+                temp=observation.temp,
+                feels_like=observation.feels_like,
+                humidity=observation.humidity,
+                wind_speed=observation.wind_speed,
+            ))
+    CityLatestObservation.objects.bulk_create(latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0014_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityLatestObservation',
+            fields=[
+                ('city', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_observation', serialize=False, to='weather.city')),
+                ('observation_id', models.BigIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('temp', models.FloatField()),
+                ('feels_like', models.FloatField()),
+                ('humidity', models.FloatField(blank=True, null=True)),
+                ('wind_speed', models.FloatField(blank=True, null=True)),
+                ('condition', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='weather.weathercondition')),
+            ],
+        ),
+        migrations.RunPython(backfill_latest_observations, migrations.RunPython.noop),
+    ]
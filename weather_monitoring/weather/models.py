@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from . import conditions
 
 ### City Model ###
 class City(models.Model):
@@ -16,6 +17,19 @@ class City(models.Model):
     def __str__(self):
         return f"{self.name}, {self.country_code}"
 
+### WeatherCondition Model ###
+class WeatherCondition(models.Model):
+    """
+    Lookup table of weather condition strings (e.g., Clear, Rain, broken clouds).
+    Observation and forecast rows reference a condition by its small integer code,
+    which is resolved through the in-process cache in `weather.conditions`.
+    """
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
 ### WeatherData Model ###
 class WeatherData(models.Model):
     """
@@ -24,7 +38,9 @@ class WeatherData(models.Model):
     """
     city = models.ForeignKey('City', related_name='weather_data', on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)  # Timestamp when data is recorded
-    main = models.CharField(max_length=50)  # Weather condition (e.g., Clear, Rain)
+    condition = models.ForeignKey(
+        WeatherCondition, related_name='+', on_delete=models.PROTECT, db_index=False
+    )  # Weather condition (e.g., Clear, Rain)
     temp = models.FloatField()  # Temperature in Celsius
     feels_like = models.FloatField()  # Feels-like temperature in Celsius
     humidity = models.FloatField(null=True, blank=True)  # Humidity percentage
@@ -32,10 +48,67 @@ class WeatherData(models.Model):
 
     class Meta:
         unique_together = ('city', 'timestamp')  # Prevent duplicate entries
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='weatherdata_timestamp_id_idx'),  # Keyset pagination
+        ]
+
+    @property
+    def main(self):
+        return conditions.name_for(self.condition_id)
+
+    @main.setter
+    def main(self, value):
+        self.condition_id = conditions.code_for(value)
 
     def __str__(self):
         return f"{self.city.name} - {self.timestamp}"
 
+### CityLatestObservation Model ###
+class CityLatestObservation(models.Model):
+    """
+    Denormalized copy of the most recent WeatherData row for each city.
+    Upserted by the ingest task in the same transaction as the observation,
+    so "latest weather" reads are primary-key lookups independent of history size.
+    """
+    city = models.OneToOneField(City, primary_key=True, related_name='latest_observation', on_delete=models.CASCADE)
+    observation_id = models.BigIntegerField()  # WeatherData id (not a foreign key, so retention can drop history)
+    timestamp = models.DateTimeField()  # Timestamp of the observation
+    condition = models.ForeignKey(
+        WeatherCondition, related_name='+', on_delete=models.PROTECT, db_index=False
+    )  # Weather condition (e.g., Clear, Rain)
+    temp = models.FloatField()  # Temperature in Celsius
+    feels_like = models.FloatField()  # Feels-like temperature in Celsius
+    humidity = models.FloatField(null=True, blank=True)  # Humidity percentage
+    wind_speed = models.FloatField(null=True, blank=True)  # Wind speed in km/h
+
+    @classmethod
+    def record(cls, observation):
+        """
+        Upsert the row for `observation.city` unless a newer observation is
+        already stored. Call it inside the transaction that saved `observation`.
+        """
+        values = {
+            'observation_id': observation.pk,
+            'timestamp': observation.timestamp,
+            'condition_id': observation.condition_id,
+            'temp': observation.temp,
+            'feels_like': observation.feels_like,
+            'humidity': observation.humidity,
+            'wind_speed': observation.wind_speed,
+        }
+        updated = cls.objects.filter(
+            city_id=observation.city_id, timestamp__lte=observation.timestamp
+        ).update(**values)
+        if not updated:
+            cls.objects.get_or_create(city_id=observation.city_id, defaults=values)
+
+    @property
+    def main(self):
+        return conditions.name_for(self.condition_id)
+
+    def __str__(self):
+        return f"Latest observation for {self.city.name} at {self.timestamp}"
+
 ### DailySummary Model ###
 class DailySummary(models.Model):
     """
@@ -54,6 +127,9 @@ class DailySummary(models.Model):
 
     class Meta:
         unique_together = ('city', 'date')  # Ensure only one summary per city per day
+        indexes = [
+            models.Index(fields=['date', 'id'], name='dailysummary_date_id_idx'),  # Keyset pagination
+        ]
 
     def __str__(self):
         return f"Daily Summary for {self.city.name} on {self.date}"
@@ -102,6 +178,11 @@ class Alert(models.Model):
     updated_at = models.DateTimeField(auto_now=True)  # Timestamp when alert was last updated
     is_active = models.BooleanField(default=True)  # Whether the alert is active or resolved
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='alert_user_created_id_idx'),  # Keyset pagination
+        ]
+
     def __str__(self):
         return f"Alert for {self.user.username} in {self.city.name} at {self.created_at}"
 
@@ -117,11 +198,31 @@ class ForecastData(models.Model):
     feels_like = models.FloatField()  # Forecasted feels-like temperature in Celsius
     humidity = models.FloatField(null=True, blank=True)  # Forecasted humidity percentage
     wind_speed = models.FloatField(null=True, blank=True)  # Forecasted wind speed in km/h
-    main = models.CharField(max_length=50)  # Forecasted main weather condition (e.g., Clear, Rain)
-    description = models.CharField(max_length=255)  # Detailed weather description
+    condition = models.ForeignKey(
+        WeatherCondition, related_name='+', on_delete=models.PROTECT, db_index=False
+    )  # Forecasted main weather condition (e.g., Clear, Rain)
+    detail = models.ForeignKey(
+        WeatherCondition, related_name='+', on_delete=models.PROTECT, db_index=False
+    )  # Detailed weather description (e.g., broken clouds)
 
     class Meta:
         unique_together = ('city', 'timestamp')  # Prevent duplicate forecasts for the same timestamp
 
+    @property
+    def main(self):
+        return conditions.name_for(self.condition_id)
+
+    @main.setter
+    def main(self, value):
+        self.condition_id = conditions.code_for(value)
+
+    @property
+    def description(self):
+        return conditions.name_for(self.detail_id)
+
+    @description.setter
+    def description(self, value):
+        self.detail_id = conditions.code_for(value)
+
     def __str__(self):
         return f"Forecast for {self.city.name} at {self.timestamp}"
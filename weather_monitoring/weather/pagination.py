@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Count-free cursor pagination over a unique ordering such as
+    ('-timestamp', '-id'). Each page is fetched with a range condition on
+    the ordering columns instead of an OFFSET, so deep pages cost the same
+    as the first one and no COUNT(*) is issued. Cursors are opaque,
+    URL-safe base64 strings that encode the position of the last row.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering, page_size=10):
+        self.ordering = ordering
+        self.page_size = page_size
+        self.next_position = None
+        self.base_url = None
+
+    @staticmethod
+    def _split(field):
+        return (field[1:], True) if field.startswith('-') else (field, False)
+
+    def _value(self, row, name):
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    def encode_cursor(self, position):
+        payload = json.dumps(
+            [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        ).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(self._split(field)[0]).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position):
+        """Filter for rows strictly after `position` in the ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name, descending = self._split(field)
+            condition |= Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            last = rows[-1]
+            self.next_position = [self._value(last, self._split(field)[0]) for field in self.ordering]
+        return rows
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+def paginator_for(request, ordering, page_size=10):
+    """
+    Keyset pagination by default. Clients that send `?page=` or
+    `?pagination=page` keep the page-number format with `count`.
+    """
+    if 'page' in request.query_params or request.query_params.get('pagination') == 'page':
+        paginator = PageNumberPagination()
+        paginator.page_size = page_size
+        return paginator
+    return KeysetPagination(ordering, page_size=page_size)
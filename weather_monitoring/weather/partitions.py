@@ -0,0 +1,120 @@
+"""
+Monthly range partitions for time-series tables on PostgreSQL.
+
+WeatherData is stored as a table partitioned by RANGE ("timestamp") with one
+partition per calendar month (UTC) plus a DEFAULT partition, see migration
+0012. The ORM keeps talking to the parent table; these helpers only create
+upcoming partitions and drop expired ones, so retention becomes a metadata
+operation instead of a large DELETE. On other backends every helper is a
+no-op and callers fall back to regular deletes.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PARTITION_SUFFIX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def month_start(value):
+    """First instant (UTC) of the month containing `value`."""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    """Shift a month start by `count` months."""
+    index = month.year * 12 + (month.month - 1) + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(model, using=DEFAULT_DB_ALIAS):
+    """Whether the model's table is a native partitioned table."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(model, using=DEFAULT_DB_ALIAS):
+    """
+    Return {month_start: partition_name} for the model's monthly partitions.
+    The DEFAULT partition is not included.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+            [model._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def ensure_partitions(model, now, months_ahead=3, using=DEFAULT_DB_ALIAS):
+    """
+    Create monthly partitions from the current month through `months_ahead`
+    months in the future. Returns the names of the partitions created.
+    """
+    if not is_partitioned(model, using):
+        return []
+
+    connection = connections[using]
+    table = model._meta.db_table
+    existing = list_partitions(model, using)
+    created = []
+    current = month_start(now)
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(table, month)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(name)} "
+                f"PARTITION OF {connection.ops.quote_name(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            created.append(name)
+    return created
+
+
+def drop_expired_partitions(model, cutoff, using=DEFAULT_DB_ALIAS):
+    """
+    Drop every monthly partition whose upper bound is at or before `cutoff`.
+    Rows in the partially expired month are left for the caller to delete.
+    Returns the names of the partitions dropped.
+    """
+    if not is_partitioned(model, using):
+        return []
+
+    connection = connections[using]
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(list_partitions(model, using).items()):
+            if add_months(month, 1) > cutoff:
+                break
+            cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            dropped.append(name)
+    return dropped
@@ -0,0 +1,237 @@
+"""
+Opt-in profiling of single requests and Celery tasks.
+
+Two profilers are available:
+
+    cprofile   deterministic cProfile; writes a `.prof` pstats dump
+               (open with `python -m pstats` or snakeviz)
+    sample     a statistical sampler that records the profiled thread's
+               stack every PROFILING_SAMPLE_INTERVAL seconds; writes a
+               `.folded` file of collapsed stacks for flamegraph.pl or
+               speedscope
+
+Requests are profiled when a staff user sends `X-Profile: cprofile|sample`
+or `?profile=cprofile|sample`. Tasks are profiled when their name is in
+PROFILE_TASKS (or it is `*`), and SIGUSR2 toggles profiling of every task
+in a worker process. Dumps go to PROFILING_DIR, keeping the newest
+PROFILING_KEEP files. When nothing asks for a profile, the only cost is a
+header and query parameter lookup per request and a set lookup per task.
+"""
+import cProfile
+import logging
+import os
+import signal
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.text import slugify
+
+from .middleware import untracked
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sample')
+
+
+class CProfileProfiler:
+    suffix = 'prof'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path):
+        self._profile.dump_stats(path)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that called start() from a background
+    thread, counting each distinct stack. Overhead is bounded by the
+    sampling interval rather than by the number of calls.
+    """
+    suffix = 'folded'
+
+    def __init__(self, interval=None):
+        self.interval = interval or settings.PROFILING_SAMPLE_INTERVAL
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target,), name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self, target):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def start_profiler(mode):
+    """A started profiler, or None if another profiler already runs on this thread."""
+    profiler = SamplingProfiler() if mode == 'sample' else CProfileProfiler()
+    try:
+        profiler.start()
+    except ValueError as e:  # Python 3.12+ allows one cProfile per thread
+        logger.warning("Could not start the %s profiler: %s", mode, e)
+        return None
+    return profiler
+
+
+def save(profiler, name):
+    """Write a finished profile to PROFILING_DIR, rotating old dumps. Returns the path."""
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{datetime.now().strftime('%Y%m%dT%H%M%S.%f')}-{slugify(name)}.{profiler.suffix}"
+    profiler.write(path)
+    dumps = sorted(
+        (entry for entry in directory.iterdir() if entry.suffix in ('.prof', '.folded')),
+        key=lambda entry: entry.name,
+    )
+    for old in dumps[:max(0, len(dumps) - settings.PROFILING_KEEP)]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+### Requests ###
+
+def requested_mode(request):
+    mode = request.headers.get('X-Profile') or request.GET.get('profile')
+    if not mode:
+        return None
+    return mode if mode in MODES else 'cprofile'
+
+
+def _is_staff(request):
+    """
+    Staff check for a session user or, failing that, the request's JWT.
+    Its query is not counted against the view's query budget.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # Not the cached authentication: a revoked staff flag must apply at once
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+    try:
+        with untracked():
+            result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when a staff user asks for it. In async views the
+    profile also covers whatever else runs on the event loop meanwhile.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = requested_mode(request)
+        if mode is None or not _is_staff(request):
+            return self.get_response(request)
+        profiler = start_profiler(mode)
+        if profiler is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        return self._attach(request, response, profiler)
+
+    async def __acall__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not await sync_to_async(_is_staff)(request):
+            return await self.get_response(request)
+        profiler = start_profiler(mode)
+        if profiler is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        return self._attach(request, response, profiler)
+
+    def _attach(self, request, response, profiler):
+        path = save(profiler, f"{request.method}-{request.path}")
+        response['X-Profile-File'] = path.name
+        logger.info("Profiled %s %s to %s", request.method, request.path, path)
+        return response
+
+
+### Celery tasks ###
+
+_toggled = False  # Set by SIGUSR2 in a worker process
+_running = {}  # task id -> profiler
+
+
+def should_profile(task_name):
+    profiled = settings.PROFILE_TASKS
+    return _toggled or '*' in profiled or task_name in profiled
+
+
+def task_prerun(task_id=None, task=None, **kwargs):
+    if should_profile(task.name):
+        profiler = start_profiler(settings.PROFILE_TASKS_MODE)
+        if profiler is not None:
+            _running[task_id] = profiler
+
+
+def task_postrun(task_id=None, task=None, **kwargs):
+    profiler = _running.pop(task_id, None)
+    if profiler is not None:
+        profiler.stop()
+        path = save(profiler, task.name)
+        logger.info("Profiled task %s to %s", task.name, path)
+
+
+def _toggle(signum, frame):
+    global _toggled
+    _toggled = not _toggled
+    logger.warning("Task profiling %s in worker process %s.", 'enabled' if _toggled else 'disabled', os.getpid())
+
+
+def install_toggle(**kwargs):
+    """
+    worker_init / worker_process_init receiver: `kill -USR2 <pid>` toggles
+    profiling of every task in that worker process.
+    """
+    if hasattr(signal, 'SIGUSR2'):
+        signal.signal(signal.SIGUSR2, _toggle)
@@ -0,0 +1,197 @@
+"""
+Pre-serialized response cache and conditional GET for hot read endpoints.
+
+Successful JSON responses are stored as the final encoded bytes, keyed by
+resource, data version, user (for per-user resources), date (for resources
+filtered by "today") and the full request URL. Cache hits are returned as
+plain HttpResponses without touching the ORM or the serializers.
+
+Entries are never deleted one by one. Every resource has version stamps:
+one for the whole resource, one per city and one bumped by any city
+change (for requests not filtered by city). Writers call `data_changed()`,
+which bumps the stamps once the transaction commits, so the next read
+builds a new key and stale entries simply expire. The same stamps give
+each response an ETag and Last-Modified, so clients polling unchanged
+data get a 304 without the view running.
+
+When the cache is unreachable, requests are served by the view without
+caching or validators, and failed invalidations are logged; entries they
+missed expire after RESPONSE_CACHE_TIMEOUT.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import now
+from redis import RedisError
+from rest_framework.response import Response
+
+from .renderers import FastJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+CITIES = 'cities'
+LATEST = 'latest'
+DAILY_SUMMARIES = 'daily_summaries'
+FORECAST = 'forecast'
+ALERTS = 'alerts'
+DASHBOARD = 'dashboard'  # Combines latest weather, daily summaries, forecast and alerts
+RESOURCES = (CITIES, LATEST, DAILY_SUMMARIES, FORECAST, ALERTS, DASHBOARD)
+
+ANY_CITY = '*'
+
+
+def _version_key(resource, scope=None):
+    return f"rc:v:{resource}" if scope is None else f"rc:v:{resource}:{scope}"
+
+
+def versions(resource, city_id=None):
+    """
+    Current version stamps (resource-wide, city or any-city) for a request.
+    Missing stamps are initialised to the current time in nanoseconds.
+    """
+    keys = [_version_key(resource), _version_key(resource, ANY_CITY if city_id is None else city_id)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def _bump(resource, city_ids):
+    stamp = time.time_ns()
+    resources = [resource] if resource in (CITIES, DASHBOARD) else [resource, DASHBOARD]
+    keys = []
+    for name in resources:
+        if city_ids is None:
+            keys.append(_version_key(name))
+        else:
+            keys += [_version_key(name, city_id) for city_id in city_ids] + [_version_key(name, ANY_CITY)]
+    try:
+        cache.set_many({key: stamp for key in keys}, None)
+    except RedisError as e:
+        logger.warning("Could not invalidate cached %s responses for cities %s: %s", resource, city_ids, e)
+
+
+def data_changed(resource, city_ids=None):
+    """
+    Invalidate cached responses of `resource` for the given cities (or for
+    every city) once the current transaction commits.
+    """
+    city_ids = None if city_ids is None else list(city_ids)
+    transaction.on_commit(lambda: _bump(resource, city_ids))
+
+
+def city_changed(city_id):
+    """Invalidate every resource that includes the given city."""
+    data_changed(CITIES)
+    for resource in RESOURCES:
+        if resource not in (CITIES, DASHBOARD):
+            data_changed(resource, [city_id])
+
+
+def cache_key(request, resource, per_user=False, per_day=False, city_id=None):
+    """
+    Cache key and the version stamps it was built from, or (None, None) if
+    the request cannot be cached. The city comes from `city_id` (a URL
+    argument) or the `city` query parameter.
+    """
+    city_id = str(city_id) if city_id is not None else request.query_params.get('city')
+    if city_id is not None and not city_id.isdigit():
+        return None, None
+    stamps = versions(resource, city_id)
+    parts = [str(stamp) for stamp in stamps]
+    if per_user:
+        parts.append(f"u{request.user.pk}")
+    if per_day:
+        parts.append(now().date().isoformat())
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"rc:{resource}:{':'.join(parts)}:{url}", stamps
+
+
+def _validators(key, stamps, renderer_format, per_day=False):
+    """
+    ETag and Last-Modified (epoch seconds) for a cache key. Responses that
+    depend on the date were last modified no earlier than today's start,
+    so If-Modified-Since from an earlier day does not match.
+    """
+    etag = quote_etag(hashlib.md5(f"{key}:{renderer_format}".encode()).hexdigest())
+    last_modified = -(-max(stamps) // 1_000_000_000)  # Round up to whole seconds
+    if per_day:
+        # The same day as the `per_day` part of the cache key
+        day_start = now().replace(hour=0, minute=0, second=0, microsecond=0)
+        last_modified = max(last_modified, int(day_start.timestamp()))
+    return etag, last_modified
+
+
+def _add_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients may keep a copy but must revalidate it; the body depends on the caller's token
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def cached_response(resource, per_user=False, per_day=False):
+    """
+    Conditional GET and response caching for a function-based API view.
+    Apply it below @api_view so the request is already authenticated and
+    negotiated.
+
+    Responses carry an ETag and Last-Modified derived from the version
+    stamps, and matching If-None-Match / If-Modified-Since requests get a
+    304 without running the view. Successful JSON responses are cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            try:
+                key, stamps = cache_key(
+                    request, resource, per_user=per_user, per_day=per_day, city_id=kwargs.get('city_id')
+                )
+            except RedisError as e:
+                logger.warning("Response cache unavailable, serving %s uncached: %s", request.path, e)
+                return view(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = _validators(key, stamps, request.accepted_renderer.format, per_day=per_day)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return _add_validators(response, etag, last_modified) if response.status_code == 304 else response
+
+            use_cache = settings.RESPONSE_CACHE_ENABLED and request.accepted_renderer.format == 'json'
+            try:
+                content = cache.get(key) if use_cache else None
+            except RedisError as e:
+                logger.warning("Response cache unavailable, serving %s uncached: %s", request.path, e)
+                content, use_cache = None, False
+            if content is not None:
+                response = HttpResponse(content, content_type='application/json')
+                response['X-Cache'] = 'HIT'
+                return _add_validators(response, etag, last_modified)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                if use_cache and isinstance(response, Response):
+                    try:
+                        cache.set(key, FastJSONRenderer().render(response.data), settings.RESPONSE_CACHE_TIMEOUT)
+                        response['X-Cache'] = 'MISS'
+                    except RedisError as e:
+                        logger.warning("Could not cache the response to %s: %s", request.path, e)
+                _add_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
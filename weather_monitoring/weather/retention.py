@@ -0,0 +1,149 @@
+"""
+Chunked, throttled retention for time-series and alert tables.
+
+Each policy selects rows older than a given age (optionally in a given
+state) and either deletes them or updates them. Rows are processed in
+bounded primary-key batches with a pause between batches so retention
+never holds long locks or starves ingest and API traffic. The last
+processed primary key is checkpointed in the cache, so an interrupted run
+(worker restart, max runtime reached) resumes where it stopped.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone as dj_timezone
+
+from .db import serialized_write
+from .models import Alert, ForecastData, WeatherData
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TIMEOUT = 7 * 24 * 60 * 60  # Keep checkpoints for a week
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    Rows of `model` whose `date_field` is older than `max_age` and that match
+    `filters` are deleted, or updated with `values` when action is 'update'.
+    """
+    name: str
+    model: type
+    date_field: str
+    max_age: timedelta
+    filters: dict = field(default_factory=dict)
+    action: str = 'delete'
+    values: dict = field(default_factory=dict)
+
+    def queryset(self, now):
+        cutoff = now - self.max_age
+        return self.model.objects.filter(**{f"{self.date_field}__lt": cutoff}, **self.filters)
+
+    @property
+    def checkpoint_key(self):
+        return f"retention:{self.name}:last_pk"
+
+
+def default_policies():
+    """Retention policies built from the current settings, keyed by name."""
+    policies = [
+        RetentionPolicy(
+            name='weather_data',
+            model=WeatherData,
+            date_field='timestamp',
+            max_age=timedelta(days=settings.WEATHER_DATA_RETENTION_DAYS),
+        ),
+        RetentionPolicy(
+            name='forecast_data',
+            model=ForecastData,
+            date_field='timestamp',
+            max_age=timedelta(days=settings.FORECAST_DATA_RETENTION_DAYS),
+        ),
+        RetentionPolicy(
+            name='deactivate_alerts',
+            model=Alert,
+            date_field='created_at',
+            max_age=timedelta(hours=settings.ALERT_ACTIVE_HOURS),
+            filters={'is_active': True},
+            action='update',
+            values={'is_active': False},
+        ),
+        RetentionPolicy(
+            name='inactive_alerts',
+            model=Alert,
+            date_field='created_at',
+            max_age=timedelta(days=settings.INACTIVE_ALERT_RETENTION_DAYS),
+            filters={'is_active': False},
+        ),
+    ]
+    return {policy.name: policy for policy in policies}
+
+
+def apply_policy(policy, now=None, batch_size=None, pause=None, max_runtime=None):
+    """
+    Apply a retention policy in primary-key batches.
+
+    Stops early (keeping the checkpoint) once `max_runtime` seconds have
+    passed. Returns a dict with the rows processed, batch count, elapsed
+    seconds, throughput and whether the run completed.
+    """
+    now = now or dj_timezone.now()
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    pause = settings.RETENTION_BATCH_PAUSE if pause is None else pause
+    max_runtime = settings.RETENTION_MAX_RUNTIME if max_runtime is None else max_runtime
+
+    queryset = policy.queryset(now)
+    last_pk = cache.get(policy.checkpoint_key, 0)
+    if last_pk:
+        logger.info("Resuming retention policy '%s' after pk %s.", policy.name, last_pk)
+
+    rows = 0
+    batches = 0
+    completed = False
+    started = time.monotonic()
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            completed = True
+            cache.delete(policy.checkpoint_key)
+            break
+
+        with serialized_write():
+            batch = queryset.filter(pk__in=pks)
+            if policy.action == 'update':
+                rows += batch.update(**policy.values)
+            else:
+                _, deleted = batch.delete()
+                rows += deleted.get(policy.model._meta.label, 0)
+        batches += 1
+        last_pk = pks[-1]
+        cache.set(policy.checkpoint_key, last_pk, CHECKPOINT_TIMEOUT)
+
+        if len(pks) < batch_size:
+            continue  # Last partial batch: the next query confirms completion
+        if max_runtime and time.monotonic() - started >= max_runtime:
+            logger.warning("Retention policy '%s' reached its %ss budget; will resume.", policy.name, max_runtime)
+            break
+        if pause:
+            time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    rows_per_second = rows / elapsed if elapsed > 0 else float(rows)
+    logger.info(
+        "Retention policy '%s' %sd %s rows in %s batches (%.2fs, %.0f rows/s, completed=%s).",
+        policy.name, policy.action, rows, batches, elapsed, rows_per_second, completed,
+    )
+    return {
+        'policy': policy.name,
+        'rows': rows,
+        'batches': batches,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows_per_second, 1),
+        'completed': completed,
+    }
@@ -1,10 +1,30 @@
 from celery.signals import worker_ready
+from django.db.models.signals import post_delete, post_save
+from django.conf import settings
+from django.dispatch import receiver
 import os
 import logging
-import redis
+
+from weather import response_cache
+from weather.authentication import forget_user
+from weather.locks import enqueue_once
 
 logger = logging.getLogger(__name__)
 
+@receiver([post_save, post_delete], sender='weather.City')
+def invalidate_city_responses(sender, instance, **kwargs):
+    """
+    Drop cached responses that include a city when it is added, edited or deleted.
+    """
+    response_cache.city_changed(instance.pk)
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Make the next request of a changed or deleted user load it from the database again.
+    """
+    forget_user(instance.pk)
+
 @worker_ready.connect
 def at_start(sender, **kwargs):
     """
@@ -16,25 +36,9 @@ def at_start(sender, **kwargs):
     trigger_on_startup = os.getenv('CELERY_TRIGGER_ON_STARTUP', 'False').lower() == 'true'
 
     if trigger_on_startup:
-        try:
-            # Initialize Redis client (ensure Redis is running and accessible)
-            redis_client = redis.Redis(host='localhost', port=6379, db=0)
-            lock = redis_client.lock("fetch_tasks_lock", timeout=300)  # 5-minute timeout
-
-            acquired = lock.acquire(blocking=False)
-            if acquired:
-                try:
-                    logger.info("Celery worker is ready. Triggering fetch_weather_data and fetch_forecast_data tasks.")
-                    fetch_weather_data.delay()
-                    fetch_forecast_data.delay()
-                finally:
-                    lock.release()
-            else:
-                logger.info("Another worker has already triggered fetch_weather_data and fetch_forecast_data tasks.")
-        except Exception as e:
-            logger.error(f"Error acquiring lock for task triggering: {e}")
-            # Fallback to triggering without lock
-            fetch_weather_data.delay()
-            fetch_forecast_data.delay()
+        # Workers starting together queue the fetches once
+        logger.info("Celery worker is ready. Triggering fetch_weather_data and fetch_forecast_data tasks.")
+        enqueue_once(fetch_weather_data)
+        enqueue_once(fetch_forecast_data)
     else:
         logger.info("Celery worker is ready. Startup task triggering is disabled.")
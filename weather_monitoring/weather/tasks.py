@@ -1,49 +1,70 @@
 from celery import shared_task, chain
 import requests
-from .models import City, WeatherData, DailySummary, Threshold, Alert, ForecastData
-from django.db.models import Avg, Max, Min, Count
+from .models import City, CityLatestObservation, WeatherData, DailySummary, Threshold, Alert, ForecastData
+from . import conditions, live, metrics, response_cache
+from .db import serialized_write
+from .locks import SingletonTask
+from .flat_serializers import alert_serializer, instance_row, weather_data_serializer
+from .partitions import drop_expired_partitions, ensure_partitions
+from .retention import apply_policy, default_policies
+from django.db.models import Avg, Max, Min, Count, Q
 from collections import Counter
 from django.conf import settings
 from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone as dj_timezone
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
 from django.core.mail import send_mail
+from django.db import transaction
+from functools import partial
 import logging
-from dotenv import load_dotenv
-import os
+import time
+logger = logging.getLogger(__name__)
+# High-volume per-city success lines, sampled by LOG_SAMPLE_CITY_LINES
+city_logger = logging.getLogger('weather.tasks.cities')
 
-# Load environment variables
-load_dotenv()
 
-logger = logging.getLogger(__name__)
+def _api_key():
+    # Checked when a fetch runs rather than at import, so web processes and commands start without it
+    if not settings.OPENWEATHER_API_KEY:
+        raise ImproperlyConfigured("OPENWEATHER_API_KEY is not set in environment variables.")
+    return settings.OPENWEATHER_API_KEY
+
+
+def _cities(city_ids=None):
+    """All cities, or only those in `city_ids` when the task was enqueued for some of them."""
+    cities = City.objects.all()
+    if city_ids is not None:
+        cities = cities.filter(id__in=city_ids)
+    return cities
 
-# Fetch the API key from environment variables for security
-API_KEY = os.getenv("OPENWEATHER_API_KEY")
-if not API_KEY:
-    raise ValueError("OPENWEATHER_API_KEY is not set in environment variables.")
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def fetch_weather_data(self):
+@shared_task(base=SingletonTask, bind=True, max_retries=3, default_retry_delay=60, ignore_result=True)
+def fetch_weather_data(self, city_ids=None):
     """
-    Fetch current weather data for all cities and store them in the WeatherData model.
+    Fetch current weather data for all cities (or only `city_ids`) and store them in the WeatherData model.
     """
-    cities = City.objects.all()
+    api_key = _api_key()
+    cities = _cities(city_ids)
     for city in cities:
         if city.latitude and city.longitude:
             # Use latitude and longitude for more accurate data
             url = (
                 f"https://api.openweathermap.org/data/2.5/weather?"
-                f"lat={city.latitude}&lon={city.longitude}&appid={API_KEY}"
+                f"lat={city.latitude}&lon={city.longitude}&appid={api_key}"
             )
         else:
             # Fallback to city name and country code
             url = (
                 f"https://api.openweathermap.org/data/2.5/weather?"
-                f"q={city.name},{city.country_code}&appid={API_KEY}"
+                f"q={city.name},{city.country_code}&appid={api_key}"
             )
 
+        started = time.perf_counter()
+        outcome = 'error'
         try:
             response = requests.get(url, timeout=10)
+            metrics.UPSTREAM_RESPONSES.labels('weather', response.status_code).inc()
             response.raise_for_status()
             data = response.json()
 
@@ -58,7 +79,8 @@ def fetch_weather_data(self):
 
             # Validate temperature data
             if temp_kelvin is None or feels_like_kelvin is None:
-                logger.error(f"Temperature data missing for {city.name}. Data: {data}")
+                logger.error("Temperature data missing for %s. Data: %s", city.name, data)
+                outcome = 'invalid'
                 continue  # Skip this city and proceed to the next
 
             # Convert temperature from Kelvin to Celsius
@@ -67,74 +89,92 @@ def fetch_weather_data(self):
 
             # Convert UNIX timestamp to timezone-aware datetime object
             timestamp = datetime.fromtimestamp(timestamp_unix, dt_timezone.utc)
+            condition_code = conditions.code_for(weather_main)
 
             # Save to the database
-            WeatherData.objects.update_or_create(
-                city=city,
-                timestamp=timestamp,
-                defaults={
-                    'main': weather_main,
-                    'temp': temp_celsius,
-                    'feels_like': feels_like_celsius,
-                    'humidity': main_data.get('humidity'),
-                    'wind_speed': data.get('wind', {}).get('speed')
-                }
-            )
-            
-            logger.info(f"Successfully fetched weather data for {city.name}")
+            with serialized_write():
+                observation, _ = WeatherData.objects.update_or_create(
+                    city=city,
+                    timestamp=timestamp,
+                    defaults={
+                        'condition_id': condition_code,
+                        'temp': temp_celsius,
+                        'feels_like': feels_like_celsius,
+                        'humidity': main_data.get('humidity'),
+                        'wind_speed': data.get('wind', {}).get('speed')
+                    }
+                )
+                CityLatestObservation.record(observation)
+                response_cache.data_changed(response_cache.LATEST, [city.id])
+                live.publish_on_commit(live.city_channel(city.id), 'observation', {
+                    'city': city.id,
+                    'data': weather_data_serializer.to_representation(instance_row(observation), exclude=('city',)),
+                })
+            metrics.ROWS_WRITTEN.labels('fetch_weather_data', 'WeatherData').inc()
+            outcome = 'success'
+
+            city_logger.info("Successfully fetched weather data for %s", city.name)
 
             # After saving, check for alerts (Ensure 'check_alerts' is defined)
-            check_alerts(city, temp_celsius, weather_main)
+            check_alerts(city, temp_celsius, condition_code)
 
         except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error for {city.name}: {http_err}")
+            outcome = 'http_error'
+            logger.error("HTTP error for %s: %s", city.name, http_err)
             if response.status_code >= 500:
                 try:
                     self.retry(exc=http_err)
                 except self.MaxRetriesExceededError:
-                    logger.error(f"Max retries exceeded for {city.name}")
+                    logger.error("Max retries exceeded for %s", city.name)
         except requests.exceptions.ConnectionError as conn_err:
-            logger.error(f"Connection error for {city.name}: {conn_err}")
+            outcome = 'connection_error'
+            logger.error("Connection error for %s: %s", city.name, conn_err)
             try:
                 self.retry(exc=conn_err)
             except self.MaxRetriesExceededError:
-                logger.error(f"Max retries exceeded for {city.name}")
+                logger.error("Max retries exceeded for %s", city.name)
         except requests.exceptions.Timeout as timeout_err:
-            logger.error(f"Timeout error for {city.name}: {timeout_err}")
+            outcome = 'timeout'
+            logger.error("Timeout error for %s: %s", city.name, timeout_err)
             try:
                 self.retry(exc=timeout_err)
             except self.MaxRetriesExceededError:
-                logger.error(f"Max retries exceeded for {city.name}")
+                logger.error("Max retries exceeded for %s", city.name)
         except Exception as err:
-            logger.error(f"Unexpected error for {city.name}: {err}")
+            logger.error("Unexpected error for %s: %s", city.name, err)
             # Depending on the nature of the error, decide whether to retry or skip
             # For now, we'll skip to the next city
             continue
-        
-        
+        finally:
+            metrics.FETCH_DURATION.labels('weather', outcome).observe(time.perf_counter() - started)
+
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def fetch_forecast_data(self):
+@shared_task(base=SingletonTask, bind=True, max_retries=3, default_retry_delay=60, ignore_result=True)
+def fetch_forecast_data(self, city_ids=None):
     """
-    Fetch today's forecast data for all cities and store them in the ForecastData model.
+    Fetch today's forecast data for all cities (or only `city_ids`) and store them in the ForecastData model.
     """
-    cities = City.objects.all()
+    api_key = _api_key()
+    cities = _cities(city_ids)
     for city in cities:
+        started = time.perf_counter()
+        outcome = 'error'
         try:
             # Construct API URL based on available data
             if city.latitude and city.longitude:
                 url = (
                     f"https://api.openweathermap.org/data/2.5/forecast?"
-                    f"lat={city.latitude}&lon={city.longitude}&appid={API_KEY}"
+                    f"lat={city.latitude}&lon={city.longitude}&appid={api_key}"
                 )
             else:
                 # Fallback to city name and country code
                 url = (
                     f"https://api.openweathermap.org/data/2.5/forecast?"
-                    f"q={city.name},{city.country_code}&appid={API_KEY}"
+                    f"q={city.name},{city.country_code}&appid={api_key}"
                 )
 
             response = requests.get(url, timeout=10)
+            metrics.UPSTREAM_RESPONSES.labels('forecast', response.status_code).inc()
             response.raise_for_status()
             data = response.json()
 
@@ -142,7 +182,8 @@ def fetch_forecast_data(self):
             list_data = data.get('list', [])
             city_info = data.get('city', {})
             if not list_data or not city_info:
-                logger.error(f"Forecast data missing for {city.name}. Data: {data}")
+                logger.error("Forecast data missing for %s. Data: %s", city.name, data)
+                outcome = 'invalid'
                 continue  # Skip this city and proceed to the next
 
             # Get the city's timezone offset in seconds
@@ -150,9 +191,8 @@ def fetch_forecast_data(self):
             city_timezone = dt_timezone(timedelta(seconds=city_timezone_offset))
             today_date = datetime.now(city_timezone).date()
 
-            # Before saving new data, delete existing forecast data for today for this city
-            ForecastData.objects.filter(city=city, timestamp__date=today_date).delete()
-
+            # Collect today's entries first so the write transaction stays short
+            forecast_rows = []
             for entry in list_data:
                 main_data = entry.get('main', {})
                 weather_list = entry.get('weather', [])
@@ -163,7 +203,7 @@ def fetch_forecast_data(self):
 
                 # Validate temperature data
                 if temp_kelvin is None or feels_like_kelvin is None:
-                    logger.error(f"Temperature data missing in forecast for {city.name}. Entry: {entry}")
+                    logger.error("Temperature data missing in forecast for %s. Entry: %s", city.name, entry)
                     continue  # Skip this entry and proceed to the next
 
                 # Convert temperature from Kelvin to Celsius
@@ -181,41 +221,60 @@ def fetch_forecast_data(self):
                     # Skip entries not for today
                     continue
 
-                # Save to the database using update_or_create
-                ForecastData.objects.update_or_create(
-                    city=city,
-                    timestamp=timestamp,
-                    defaults={
-                        'main': weather_main,
-                        'temp': temp_celsius,
-                        'feels_like': feels_like_celsius,
-                        'humidity': main_data.get('humidity'),
-                        'wind_speed': entry.get('wind', {}).get('speed'),
-                        'description': weather_list[0].get('description', 'No description') if weather_list else 'No description',
-                    }
+                description = weather_list[0].get('description', 'No description') if weather_list else 'No description'
+                forecast_rows.append((timestamp, {
+                    'condition_id': conditions.code_for(weather_main),
+                    'temp': temp_celsius,
+                    'feels_like': feels_like_celsius,
+                    'humidity': main_data.get('humidity'),
+                    'wind_speed': entry.get('wind', {}).get('speed'),
+                    'detail_id': conditions.code_for(description),
+                }))
+
+            # Replace today's forecast for this city in a single transaction. Every incoming
+            # timestamp is deleted first, so one INSERT writes them all
+            timestamps = [timestamp for timestamp, _ in forecast_rows]
+            with serialized_write():
+                ForecastData.objects.filter(
+                    Q(timestamp__date=today_date) | Q(timestamp__in=timestamps), city=city
+                ).delete()
+                ForecastData.objects.bulk_create(
+                    ForecastData(city=city, timestamp=timestamp, **fields) for timestamp, fields in forecast_rows
                 )
+                response_cache.data_changed(response_cache.FORECAST, [city.id])
+                live.publish_on_commit(live.city_channel(city.id), 'forecast', {'city': city.id})
+            metrics.ROWS_WRITTEN.labels('fetch_forecast_data', 'ForecastData').inc(len(forecast_rows))
+            outcome = 'success'
 
-            logger.info(f"Successfully fetched today's forecast data for {city.name}")
+            city_logger.info("Successfully fetched today's forecast data for %s", city.name)
 
         except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error for {city.name}: {http_err}")
+            outcome = 'http_error'
+            logger.error("HTTP error for %s: %s", city.name, http_err)
             if response.status_code >= 500:
                 self.retry(exc=http_err)
         except requests.exceptions.ConnectionError as conn_err:
-            logger.error(f"Connection error for {city.name}: {conn_err}")
+            outcome = 'connection_error'
+            logger.error("Connection error for %s: %s", city.name, conn_err)
             self.retry(exc=conn_err)
         except requests.exceptions.Timeout as timeout_err:
-            logger.error(f"Timeout error for {city.name}: {timeout_err}")
+            outcome = 'timeout'
+            logger.error("Timeout error for %s: %s", city.name, timeout_err)
             self.retry(exc=timeout_err)
         except Exception as err:
-            logger.error(f"Unexpected error for {city.name}: {err}")
+            logger.error("Unexpected error for %s: %s", city.name, err)
             continue
+        finally:
+            metrics.FETCH_DURATION.labels('forecast', outcome).observe(time.perf_counter() - started)
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def aggregate_daily_summary(self, target_date=None):
+# Overlapping runs are queued rather than skipped, so cities added during a run still get summarized
+@shared_task(
+    base=SingletonTask, overlap='queue', bind=True, max_retries=3, default_retry_delay=60, ignore_result=True
+)
+def aggregate_daily_summary(self, target_date=None, city_ids=None):
     """
-    Aggregate daily weather data for each city and store in DailySummary model.
+    Aggregate daily weather data for each city (or only `city_ids`) and store in DailySummary model.
     """
     try:
         if target_date:
@@ -225,7 +284,7 @@ def aggregate_daily_summary(self, target_date=None):
             today = dj_timezone.now().date()
             date_to_aggregate = today - timedelta(days=1)
 
-        cities = City.objects.all()
+        cities = _cities(city_ids)
 
         for city in cities:
             # Filter WeatherData for the city and the previous day
@@ -235,7 +294,7 @@ def aggregate_daily_summary(self, target_date=None):
             )
 
             if not daily_data.exists():
-                logger.warning(f"No weather data for {city.name} on {date_to_aggregate}. Skipping summary.")
+                logger.warning("No weather data for %s on %s. Skipping summary.", city.name, date_to_aggregate)
                 continue
 
             # Calculate summary statistics
@@ -247,29 +306,33 @@ def aggregate_daily_summary(self, target_date=None):
             
             
             # Determine the dominant weather condition
-            weather_conditions = daily_data.values_list('main', flat=True)
-            condition_counts = Counter(weather_conditions)
-            dominant_condition, count = condition_counts.most_common(1)[0]
+            condition_counts = Counter(daily_data.values_list('condition_id', flat=True))
+            dominant_code, count = condition_counts.most_common(1)[0]
+            dominant_condition = conditions.name_for(dominant_code)
             dominant_reasoning = f"Most frequent condition: {dominant_condition} ({count} occurrences)"
             # Create or update DailySummary
-            DailySummary.objects.update_or_create(
-                city=city,
-                date=date_to_aggregate,
-                defaults={
-                    'avg_temp': avg_temp,
-                    'max_temp': max_temp,
-                    'min_temp': min_temp,
-                    'avg_humidity': avg_humidity,
-                    'avg_wind_speed': avg_wind_speed,
-                    'dominant_condition': dominant_condition,
-                    'dominant_reasoning': dominant_reasoning,
-                }
-            )
+            with serialized_write():
+                DailySummary.objects.update_or_create(
+                    city=city,
+                    date=date_to_aggregate,
+                    defaults={
+                        'avg_temp': avg_temp,
+                        'max_temp': max_temp,
+                        'min_temp': min_temp,
+                        'avg_humidity': avg_humidity,
+                        'avg_wind_speed': avg_wind_speed,
+                        'dominant_condition': dominant_condition,
+                        'dominant_reasoning': dominant_reasoning,
+                    }
+                )
+                response_cache.data_changed(response_cache.DAILY_SUMMARIES, [city.id])
+                live.publish_on_commit(live.city_channel(city.id), 'daily_summary', {'city': city.id})
+            metrics.ROWS_WRITTEN.labels('aggregate_daily_summary', 'DailySummary').inc()
 
-            logger.info(f"Daily summary created for {city.name} on {date_to_aggregate}.")
+            city_logger.info("Daily summary created for %s on %s.", city.name, date_to_aggregate)
 
     except Exception as e:
-        logger.error(f"Error in aggregate_daily_summary task: {e}")
+        logger.error("Error in aggregate_daily_summary task: %s", e)
         try:
             self.retry(exc=e)
         except self.MaxRetriesExceededError:
@@ -279,12 +342,18 @@ def aggregate_daily_summary(self, target_date=None):
 def check_alerts(city, current_temp, current_condition):
     """
     Check if the current weather data triggers any alerts based on thresholds.
+    `current_condition` is a WeatherCondition code.
     """
     try:
-        thresholds = Threshold.objects.filter(city=city)
+        conditions.ensure_known([current_condition])
+        thresholds = Threshold.objects.filter(city=city).select_related('user')
         for threshold in thresholds:
             alert_message = ""
             alert_needed = False
+            condition_codes = (
+                conditions.matching_codes(threshold.condition_threshold)
+                if threshold.condition_threshold else frozenset()
+            )
 
             # Temperature Threshold
             if threshold.temp_threshold is not None:
@@ -293,114 +362,165 @@ def check_alerts(city, current_temp, current_condition):
                     alert_message += f"Temperature has exceeded {threshold.temp_threshold}°C. "
 
             # Condition Threshold
-            if threshold.condition_threshold:
-                if current_condition.lower() == threshold.condition_threshold.lower():
-                    alert_needed = True
-                    alert_message += f"Weather condition '{current_condition}' detected. "
+            if current_condition in condition_codes:
+                alert_needed = True
+                alert_message += f"Weather condition '{conditions.name_for(current_condition)}' detected. "
 
-            if alert_needed:
+            if not alert_needed:
+                metrics.ALERT_EVALUATIONS.labels('no_breach').inc()
+            else:
                 # Check consecutive updates
-                recent_weather = WeatherData.objects.filter(
+                recent_weather = list(WeatherData.objects.filter(
                     city=city
-                ).order_by('-timestamp')[:threshold.consecutive_updates]
+                ).order_by('-timestamp').values_list('temp', 'condition_id')[:threshold.consecutive_updates])
+
+                # Codes written by other workers may be new to this process
+                conditions.ensure_known(code for _, code in recent_weather)
+                if threshold.condition_threshold:
+                    condition_codes = conditions.matching_codes(threshold.condition_threshold)
 
                 breach_count = 0
-                for entry in recent_weather:
+                for temp, condition_code in recent_weather:
                     breach = False
-                    if threshold.temp_threshold is not None and entry.temp > threshold.temp_threshold:
+                    if threshold.temp_threshold is not None and temp > threshold.temp_threshold:
                         breach = True
-                    if threshold.condition_threshold and entry.main.lower() == threshold.condition_threshold.lower():
+                    if condition_code in condition_codes:
                         breach = True
                     if breach:
                         breach_count += 1
                     else:
                         break
 
-                if breach_count >= threshold.consecutive_updates:
-                    # Check if an active alert already exists
-                    existing_alert = Alert.objects.filter(
-                        user=threshold.user,
-                        city=city,
-                        message=alert_message.strip(),
-                        is_active=True
-                    ).exists()
-
-                    if not existing_alert:
-                        # Trigger Alert
-                        Alert.objects.create(
+                if breach_count < threshold.consecutive_updates:
+                    metrics.ALERT_EVALUATIONS.labels('not_consecutive').inc()
+                else:
+                    # The duplicate check and the insert share one serialized write, so
+                    # concurrent ingest runs cannot both create the alert
+                    with serialized_write():
+                        # Check if an active alert already exists
+                        existing_alert = Alert.objects.filter(
                             user=threshold.user,
                             city=city,
-                            message=alert_message.strip()
-                        )
-                        logger.info(f"Alert created for {threshold.user.username} in {city.name}: {alert_message.strip()}")
-
-                        # Try to send an email notification
-                        try:
-                            send_mail(
-                                subject='Weather Alert',
-                                message=alert_message.strip(),
-                                from_email='noreply@weathermonitor.com',
-                                recipient_list=[threshold.user.email],
-                                fail_silently=False,
+                            message=alert_message.strip(),
+                            is_active=True
+                        ).exists()
+
+                        if not existing_alert:
+                            # Trigger Alert
+                            alert = Alert.objects.create(
+                                user=threshold.user,
+                                city=city,
+                                message=alert_message.strip()
                             )
-                            logger.info(f"Alert email sent to {threshold.user.email} for {city.name}")
-                        except Exception as e:
-                            logger.error(f"Error sending email to {threshold.user.email}: {e}")
-                            # If email sending fails, print the alert message to the terminal
-                            print(f"ALERT for {threshold.user.username} in {city.name}: {alert_message.strip()}")
+                            response_cache.data_changed(response_cache.ALERTS, [city.id])
+                            live.publish_on_commit(live.user_city_channel(threshold.user_id, city.id), 'alert', {
+                                'city': city.id,
+                                'data': alert_serializer.to_representation(
+                                    instance_row(alert), exclude=('city', 'user')
+                                ),
+                            })
+                            # Email from the notify queue once the alert is committed, so a slow
+                            # mail server does not hold up ingest
+                            transaction.on_commit(partial(send_alert_email.delay, alert.id))
+
+                    if existing_alert:
+                        metrics.ALERT_EVALUATIONS.labels('duplicate').inc()
+                    else:
+                        metrics.ALERT_EVALUATIONS.labels('triggered').inc()
+                        metrics.ROWS_WRITTEN.labels('fetch_weather_data', 'Alert').inc()
+                        logger.info("Alert created for %s in %s: %s", threshold.user.username, city.name, alert_message.strip())
 
     except Threshold.DoesNotExist:
-        logger.warning(f"No thresholds set for {city.name}. Skipping alert checks.")
+        logger.warning("No thresholds set for %s. Skipping alert checks.", city.name)
     except Exception as e:
-        logger.error(f"Error while checking alerts for {city.name}: {e}")
+        logger.error("Error while checking alerts for %s: %s", city.name, e)
 
 
-                    
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, ignore_result=True)
+def send_alert_email(self, alert_id):
+    """
+    Email an alert to its user. After the last retry the alert is printed to the terminal instead.
+    """
+    try:
+        alert = Alert.objects.select_related('user', 'city').get(pk=alert_id)
+    except Alert.DoesNotExist:
+        logger.warning("Alert %s no longer exists. Skipping email.", alert_id)
+        return
 
-@shared_task
+    email_started = time.perf_counter()
+    try:
+        send_mail(
+            subject='Weather Alert',
+            message=alert.message,
+            from_email='noreply@weathermonitor.com',
+            recipient_list=[alert.user.email],
+            fail_silently=False,
+        )
+        metrics.ALERT_EMAIL_DURATION.labels('sent').observe(time.perf_counter() - email_started)
+        logger.info("Alert email sent to %s for %s", alert.user.email, alert.city.name)
+    except Exception as e:
+        metrics.ALERT_EMAIL_DURATION.labels('failed').observe(time.perf_counter() - email_started)
+        logger.error("Error sending email to %s: %s", alert.user.email, e)
+        try:
+            self.retry(exc=e)
+        except self.MaxRetriesExceededError:
+            # If email sending keeps failing, print the alert message to the terminal
+            print(f"ALERT for {alert.user.username} in {alert.city.name}: {alert.message}")
+
+
+@shared_task(base=SingletonTask, ignore_result=True)
 def cleanup_old_weather_data():
     """
-    Delete WeatherData entries older than 30 days.
+    Archive and delete WeatherData entries older than the retention period (30 days by default).
+    Whole expired months are dropped as partitions where the table is partitioned.
     """
     # Get the current time in UTC (timezone-aware)
     now_utc = dj_timezone.now()
 
-    # Calculate the cutoff date 30 days ago in UTC
-    cutoff_date = now_utc - timedelta(days=30)
+    # Calculate the cutoff date in UTC
+    cutoff_date = now_utc - timedelta(days=settings.WEATHER_DATA_RETENTION_DAYS)
+
+    logger.info("Current UTC time: %s", now_utc)
+    logger.info("Cutoff date (UTC): %s", cutoff_date)
 
-    logger.info(f"Current UTC time: {now_utc}")
-    logger.info(f"Cutoff date (UTC): {cutoff_date}")
+    # Archive expired observations before anything is deleted
+    if settings.WEATHER_ARCHIVE_ENABLED:
+        from .archive import archive_weather_data  # numpy; only loaded by the worker that runs the cleanup
+        archived = archive_weather_data(cutoff_date)
+        logger.info("Archived %s WeatherData entries to %s.", archived, settings.WEATHER_ARCHIVE_DIR)
 
-    # Query using the correct timezone-aware cutoff date
-    old_entries = WeatherData.objects.filter(timestamp__lt=cutoff_date)
+    # Drop fully expired monthly partitions without touching individual rows
+    dropped = drop_expired_partitions(WeatherData, cutoff_date)
+    if dropped:
+        logger.info("Dropped expired WeatherData partitions: %s", ', '.join(dropped))
 
-    logger.info(f"Found {old_entries.count()} entries to delete.")
+    # Delete what is left before the cutoff (at most one partially expired month) in batches
+    return apply_policy(default_policies()['weather_data'], now=now_utc)
 
-    count = old_entries.count()
-    if count > 0:
-        old_entries.delete()
-        logger.info(f"Deleted {count} old WeatherData entries.")
-    else:
-        logger.info("No entries found to delete.")
 
-@shared_task
+@shared_task(base=SingletonTask, ignore_result=True)
+def maintain_weather_partitions():
+    """
+    Create the WeatherData partitions for the current and upcoming months.
+    """
+    created = ensure_partitions(
+        WeatherData, dj_timezone.now(), months_ahead=settings.PARTITION_MONTHS_AHEAD
+    )
+    if created:
+        logger.info("Created WeatherData partitions: %s", ', '.join(created))
+
+@shared_task(base=SingletonTask, ignore_result=True)
 def deactivate_old_alerts():
     """
-    Deactivate alerts that have been active for more than the specified duration.
+    Deactivate alerts that have been active for more than ALERT_ACTIVE_HOURS (24 by default).
+    """
+    return apply_policy(default_policies()['deactivate_alerts'])
+
+
+@shared_task(base=SingletonTask, ignore_result=True)
+def prune_expired_data():
+    """
+    Delete expired ForecastData rows and old deactivated alerts.
     """
-    # Define the duration after which alerts should be deactivated (e.g., 24 hours)
-    alert_active_duration = timedelta(hours=24)
-
-    # Calculate the cutoff datetime
-    cutoff_datetime = dj_timezone.now() - alert_active_duration
-
-    # Fetch alerts that are still active and were created before the cutoff datetime
-    alerts_to_deactivate = Alert.objects.filter(is_active=True, created_at__lt=cutoff_datetime)
-
-    count = alerts_to_deactivate.count()
-    if count > 0:
-        alerts_to_deactivate.update(is_active=False)
-        logger.info(f"Deactivated {count} alerts that were active for more than {alert_active_duration}.")
-    else:
-        logger.info("No alerts to deactivate at this time.")
-        
+    policies = default_policies()
+    return [apply_policy(policies[name]) for name in ('forecast_data', 'inactive_alerts')]
@@ -11,6 +11,68 @@ import pytz
 def api_client():
     return APIClient()
 
+@pytest.fixture(autouse=True)
+def clear_condition_cache():
+    # Condition rows created inside a rolled-back test transaction must not outlive it
+    from .conditions import clear_cache
+    clear_cache()
+    yield
+    clear_cache()
+
+@pytest.fixture(autouse=True)
+def local_memory_cache(settings):
+    # Tests run without Redis; one process shares the local memory cache like the processes of a deployment share Redis
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+@pytest.fixture(autouse=True)
+def clear_response_cache(local_memory_cache):
+    # Row ids are reused after each test's rollback, so cached responses must not leak between tests
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+@pytest.fixture(autouse=True)
+def openweather_api_key(settings):
+    # Upstream calls are faked, but the fetch tasks refuse to run without a key
+    settings.OPENWEATHER_API_KEY = "test-key"
+
+@pytest.fixture(autouse=True)
+def in_memory_live_hub(settings, monkeypatch):
+    # Live events stay in the test process instead of going through Redis
+    from . import live
+    settings.LIVE_REDIS_URL = None
+    monkeypatch.setattr(live, "_hub", None)
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    # Views running more queries than their @query_budget fail the test
+    settings.QUERY_BUDGET_STRICT = True
+
+class FakeOpenWeather:
+    """Stands in for `requests.get` in the fetch tasks: answers every URL with `payload`."""
+    status_code = 200
+
+    def __init__(self):
+        self.urls = []
+        self.payload = {"main": {"temp": 293.15, "feels_like": 293.15, "humidity": 40}, "weather": [{"main": "Clear"}]}
+
+    def get(self, url, timeout):
+        self.urls.append(url)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+@pytest.fixture
+def openweather(monkeypatch):
+    fake = FakeOpenWeather()
+    monkeypatch.setattr("weather.tasks.requests.get", fake.get)
+    return fake
+
 @pytest.fixture
 def create_user():
     user = User.objects.create_user(username="testuser", password="testpassword")
@@ -193,3 +255,864 @@ def test_create_city_unauthenticated(api_client):
     }
     response = api_client.post(url, data)
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+@pytest.mark.django_db(transaction=True)
+def test_serialized_write_rolls_back_on_error(settings, create_city):
+    from .db import serialized_write
+    settings.SQLITE_HIGH_CONCURRENCY = True
+    with pytest.raises(RuntimeError):
+        with serialized_write():
+            WeatherData.objects.create(city=create_city, main="Clear", temp=20.0, feels_like=20.0)
+            raise RuntimeError("boom")
+    assert not WeatherData.objects.exists()
+    with serialized_write():
+        WeatherData.objects.create(city=create_city, main="Clear", temp=20.0, feels_like=20.0)
+    assert WeatherData.objects.count() == 1
+
+def test_partition_month_helpers():
+    from .partitions import add_months, month_start, partition_name
+    month = month_start(datetime(2024, 12, 15, 10, 30, tzinfo=pytz.UTC))
+    assert month == datetime(2024, 12, 1, tzinfo=pytz.UTC)
+    assert add_months(month, 1) == datetime(2025, 1, 1, tzinfo=pytz.UTC)
+    assert add_months(month, -12) == datetime(2023, 12, 1, tzinfo=pytz.UTC)
+    assert partition_name("weather_weatherdata", month) == "weather_weatherdata_p2024_12"
+
+@pytest.mark.django_db
+def test_cleanup_old_weather_data_without_partitions(settings, tmp_path, create_city):
+    from .tasks import cleanup_old_weather_data
+    settings.WEATHER_ARCHIVE_DIR = tmp_path
+    now = datetime.now(pytz.UTC)
+    for days in (1, 40, 90):
+        entry = WeatherData.objects.create(city=create_city, main="Clear", temp=20.0, feels_like=20.0)
+        # `timestamp` is auto_now_add, so backdate it with an update
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=now - timedelta(days=days))
+    cleanup_old_weather_data()
+    assert WeatherData.objects.count() == 1
+
+@pytest.mark.django_db
+def test_retention_policy_batches_and_resumes(create_city):
+    from django.core.cache import cache
+    from .retention import RetentionPolicy, apply_policy
+    now = datetime.now(pytz.UTC)
+    for hours in range(5):
+        ForecastData.objects.create(
+            city=create_city, timestamp=now - timedelta(days=10, hours=hours),
+            temp=20.0, feels_like=20.0, main="Clear", description="clear sky"
+        )
+    ForecastData.objects.create(
+        city=create_city, timestamp=now, temp=20.0, feels_like=20.0, main="Clear", description="clear sky"
+    )
+    policy = RetentionPolicy(name="test_forecast", model=ForecastData, date_field="timestamp", max_age=timedelta(days=7))
+
+    # A zero-second budget stops after the first full batch and leaves a checkpoint
+    first = apply_policy(policy, batch_size=2, pause=0, max_runtime=1e-9)
+    assert first == {**first, "rows": 2, "batches": 1, "completed": False}
+    assert cache.get(policy.checkpoint_key)
+
+    second = apply_policy(policy, batch_size=2, pause=0, max_runtime=0)
+    assert second["rows"] == 3 and second["completed"]
+    assert cache.get(policy.checkpoint_key) is None
+    assert ForecastData.objects.count() == 1
+
+@pytest.mark.django_db
+def test_deactivate_old_alerts(create_alert):
+    from .tasks import deactivate_old_alerts
+    Alert.objects.filter(pk=create_alert.pk).update(created_at=datetime.now(pytz.UTC) - timedelta(hours=25))
+    result = deactivate_old_alerts()
+    assert result["rows"] == 1
+    assert not Alert.objects.get(pk=create_alert.pk).is_active
+
+@pytest.fixture
+def jwt_client(create_user, api_client):
+    api_client.force_authenticate(user=create_user)
+    return api_client
+
+@pytest.mark.django_db
+def test_archive_round_trip(settings, tmp_path, jwt_client, create_city):
+    from .archive import ArchiveReader, archive_weather_data
+    settings.WEATHER_ARCHIVE_DIR = tmp_path
+    day = datetime(2024, 3, 10, 12, 0, tzinfo=pytz.UTC)
+    for hour, (temp, main) in enumerate([(10.0, "Rain"), (20.0, "Rain"), (30.0, "Clear")]):
+        entry = WeatherData.objects.create(city=create_city, main=main, temp=temp, feels_like=temp, humidity=50.0)
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=day + timedelta(hours=hour))
+
+    assert archive_weather_data(day + timedelta(hours=2)) == 2
+    # Re-archiving overlapping rows replaces duplicates instead of appending them
+    assert archive_weather_data(day + timedelta(days=1)) == 3
+
+    reader = ArchiveReader()
+    assert reader.months(create_city.id) == ["2024-03"]
+    history = reader.history(create_city.id, day, day + timedelta(days=1))
+    assert list(history["temp"]) == [10.0, 20.0, 30.0]
+    assert list(history["condition"]) == ["Rain", "Rain", "Clear"]
+
+    response = jwt_client.get(
+        reverse('weatherdata-archive'), {"city": create_city.id, "start": "2024-03-10", "end": "2024-03-10"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 1
+    assert response.data[0]["avg_temp"] == 20.0
+    assert response.data[0]["max_temp"] == 30.0
+    assert response.data[0]["dominant_condition"] == "Rain"
+    assert response.data[0]["samples"] == 3
+
+@pytest.mark.django_db
+def test_conditions_are_stored_as_codes(jwt_client, create_weather_data, create_forecast_data):
+    from .models import WeatherCondition
+    assert create_weather_data.condition.name == "Clear"
+    assert WeatherData.objects.get(pk=create_weather_data.pk).main == "Clear"
+    assert ForecastData.objects.get(pk=create_forecast_data.pk).description == "Partly cloudy"
+    assert WeatherCondition.objects.filter(name__in=["Clear", "Cloudy", "Partly cloudy"]).count() == 3
+    response = jwt_client.get(reverse('weatherdata-detail', args=[create_weather_data.id]))
+    assert response.data["main"] == "Clear"
+
+@pytest.mark.django_db
+def test_check_alerts_matches_condition_codes_case_insensitively(create_user, create_city):
+    from . import conditions
+    from .tasks import check_alerts
+    Threshold.objects.create(user=create_user, city=create_city, condition_threshold="rain", consecutive_updates=2)
+    for _ in range(2):
+        entry = WeatherData.objects.create(city=create_city, main="Rain", temp=20.0, feels_like=20.0)
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=datetime.now(pytz.UTC) - timedelta(minutes=entry.pk))
+    check_alerts(create_city, 20.0, conditions.code_for("Rain"))
+    alert = Alert.objects.get(user=create_user, city=create_city)
+    assert alert.message == "Weather condition 'Rain' detected."
+
+@pytest.mark.django_db
+def test_weather_data_list_keyset_pagination(jwt_client, create_city):
+    other_city = City.objects.create(name="Other City")
+    now = datetime.now(pytz.UTC)
+    for minutes in range(25):
+        city = create_city if minutes % 2 else other_city
+        entry = WeatherData.objects.create(city=city, main="Clear", temp=float(minutes), feels_like=20.0)
+        # Both cities share timestamps so the id tie-breaker is exercised
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=now - timedelta(minutes=minutes // 2))
+
+    url, seen = reverse('weatherdata-list'), []
+    params = None
+    while url:
+        response = jwt_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        seen.extend(row["id"] for row in response.data["results"])
+        url, params = response.data["next"], None
+    expected = list(WeatherData.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+    assert seen == expected
+
+    response = jwt_client.get(reverse('weatherdata-list'), {"page": 3})
+    assert response.data["count"] == 25
+    assert len(response.data["results"]) == 5
+
+    response = jwt_client.get(reverse('weatherdata-list'), {"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+def test_flat_serializers_match_model_serializers(create_weather_data, create_daily_summary, create_forecast_data, create_alert):
+    from . import flat_serializers as flat
+    from .renderers import FastJSONRenderer
+    from .serializers import WeatherDataSerializer, DailySummarySerializer, ForecastDataSerializer, AlertSerializer
+    cases = [
+        (WeatherData, WeatherDataSerializer, flat.weather_data_serializer),
+        (DailySummary, DailySummarySerializer, flat.daily_summary_serializer),
+        (ForecastData, ForecastDataSerializer, flat.forecast_data_serializer),
+        (Alert, AlertSerializer, flat.alert_serializer),
+    ]
+    for model, model_serializer, flat_serializer in cases:
+        expected = model_serializer(model.objects.all(), many=True).data
+        rows = flat_serializer.many(flat_serializer.values(model.objects.all()))
+        assert FastJSONRenderer().render(rows) == FastJSONRenderer().render(expected)
+
+@pytest.mark.django_db
+def test_ingest_maintains_latest_observation(openweather, jwt_client, create_city):
+    from .models import CityLatestObservation
+    from .tasks import fetch_weather_data
+
+    for temp in (290.15, 300.15):
+        openweather.payload = {"main": {"temp": temp, "feels_like": temp, "humidity": 40}, "weather": [{"main": "Clear"}]}
+        fetch_weather_data()
+    newest = WeatherData.objects.filter(city=create_city).order_by('-timestamp', '-id').first()
+    latest = CityLatestObservation.objects.get(city=create_city)
+    assert latest.observation_id == newest.id
+    assert latest.temp == pytest.approx(27.0)
+
+    # An older observation arriving late does not replace the stored one
+    older = WeatherData.objects.create(city=create_city, main="Rain", temp=5.0, feels_like=5.0)
+    WeatherData.objects.filter(pk=older.pk).update(timestamp=newest.timestamp - timedelta(hours=1))
+    older.refresh_from_db()
+    CityLatestObservation.record(older)
+    assert CityLatestObservation.objects.get(city=create_city).observation_id == newest.id
+
+    response = jwt_client.get(reverse('weatherdata-latest'), {"city": create_city.id})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["id"] == newest.id
+    assert response.data["main"] == "Clear"
+    assert response.data["city"]["name"] == "Test City"
+    response = jwt_client.get(reverse('latest_weather_all_cities'))
+    assert [row["id"] for row in response.data] == [newest.id]
+
+@pytest.mark.django_db
+def test_response_cache_serves_bytes_until_data_changes(
+    jwt_client, create_city, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    from . import response_cache
+    from .models import CityLatestObservation
+    observation = WeatherData.objects.create(city=create_city, main="Clear", temp=21.0, feels_like=21.0)
+    CityLatestObservation.record(observation)
+    url = reverse('weatherdata-latest')
+
+    first = jwt_client.get(url, {"city": create_city.id})
+    assert first["X-Cache"] == "MISS"
+    with django_assert_num_queries(0):
+        second = jwt_client.get(url, {"city": create_city.id})
+    assert second["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    # Another city's ingest leaves this entry alone; this city's ingest invalidates it
+    with django_capture_on_commit_callbacks(execute=True):
+        response_cache.data_changed(response_cache.LATEST, [create_city.id + 1])
+    assert jwt_client.get(url, {"city": create_city.id})["X-Cache"] == "HIT"
+    newer = WeatherData.objects.create(city=create_city, main="Rain", temp=15.0, feels_like=14.0)
+    with django_capture_on_commit_callbacks(execute=True):
+        CityLatestObservation.record(newer)
+        response_cache.data_changed(response_cache.LATEST, [create_city.id])
+    third = jwt_client.get(url, {"city": create_city.id})
+    assert third["X-Cache"] == "MISS"
+    assert third.data["main"] == "Rain"
+
+    # City edits invalidate the city list
+    assert jwt_client.get(reverse('city-list'))["X-Cache"] == "MISS"
+    assert jwt_client.get(reverse('city-list'))["X-Cache"] == "HIT"
+    with django_capture_on_commit_callbacks(execute=True):
+        City.objects.create(name="New City")
+    response = jwt_client.get(reverse('city-list'))
+    assert response["X-Cache"] == "MISS"
+    assert len(response.data) == 2
+
+@pytest.mark.django_db
+def test_conditional_get_returns_304_until_city_data_changes(
+    jwt_client, create_daily_summary, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    from . import response_cache
+    url = reverse('dailysummary-list')
+    params = {"city": create_daily_summary.city_id}
+    first = jwt_client.get(url, params)
+    assert first.status_code == status.HTTP_200_OK
+    assert first["ETag"] and first["Last-Modified"]
+
+    with django_assert_num_queries(0):
+        response = jwt_client.get(url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == first["ETag"]
+    response = jwt_client.get(url, params, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response_cache.data_changed(response_cache.DAILY_SUMMARIES, [create_daily_summary.city_id])
+    response = jwt_client.get(url, params, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != first["ETag"]
+
+@pytest.mark.django_db
+def test_last_modified_of_daily_resources_moves_past_midnight(monkeypatch, jwt_client, create_city):
+    from django.utils import timezone
+    from . import response_cache
+    url = reverse('forecast-data-list')
+    params = {"city": create_city.id}
+    first = jwt_client.get(url, params)
+    assert jwt_client.get(url, params, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code == 304
+
+    tomorrow = timezone.now() + timedelta(days=1)
+    monkeypatch.setattr(response_cache, "now", lambda: tomorrow)
+    response = jwt_client.get(url, params, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert response.status_code == status.HTTP_200_OK  # Yesterday's forecast is not today's
+
+@pytest.mark.django_db
+def test_city_dashboard_combines_city_data(
+    jwt_client, create_weather_data, create_daily_summary, create_forecast_data, create_alert, django_assert_num_queries
+):
+    from .models import CityLatestObservation
+    from .conditions import name_for
+    CityLatestObservation.record(create_weather_data)
+    name_for(create_weather_data.condition_id)  # Warm the condition cache, as in a running process
+    city = create_weather_data.city
+    url = reverse('city-dashboard', args=[city.id])
+    with django_assert_num_queries(5):
+        response = jwt_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["city"]["name"] == "Test City"
+    assert response.data["latest_weather"]["id"] == create_weather_data.id
+    assert "city" not in response.data["latest_weather"]
+    assert [row["id"] for row in response.data["daily_summaries"]] == [create_daily_summary.id]
+    assert [row["message"] for row in response.data["alerts"]] == ["Temperature threshold exceeded."]
+    assert response.data["forecast"][0]["description"] == "Partly cloudy"
+
+    assert jwt_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == status.HTTP_304_NOT_MODIFIED
+    assert jwt_client.get(reverse('city-dashboard', args=[city.id + 1])).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+def test_live_updates_requires_token_and_known_cities(api_client, create_user, create_city):
+    from rest_framework_simplejwt.tokens import AccessToken
+    url = reverse('live-updates')
+    assert api_client.get(url, {"cities": create_city.id}).status_code == status.HTTP_401_UNAUTHORIZED
+    token = str(AccessToken.for_user(create_user))
+    assert api_client.get(url, {"cities": "x", "token": token}).status_code == status.HTTP_400_BAD_REQUEST
+    response = api_client.get(url, {"cities": create_city.id + 1, "token": token})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    # The test client is a WSGI request, which cannot hold the stream open
+    response = api_client.get(url, {"cities": create_city.id, "token": token})
+    assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+@pytest.mark.django_db
+def test_live_updates_streams_over_asgi(create_user, create_city):
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    token = str(AccessToken.for_user(create_user))
+
+    async def scenario():
+        response = await AsyncClient().get(reverse('live-updates'), {"cities": create_city.id, "token": token})
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "text/event-stream"
+        stream = aiter(response.streaming_content)
+        assert (await anext(stream)).endswith(b": connected\n\n")
+        await stream.aclose()
+
+    async_to_sync(scenario)()
+
+def test_live_event_stream_delivers_published_frames():
+    import asyncio
+    from . import live
+
+    async def scenario():
+        hub = live.Hub()
+        stream = live.event_stream(hub, [live.city_channel(1)], heartbeat=0.05)
+        assert (await stream.__anext__()).endswith(": connected\n\n")
+        hub.publish(live.city_channel(2), 'observation', {'city': 2})  # Not subscribed
+        hub.publish(live.city_channel(1), 'observation', {'city': 1, 'data': {'temp': 21.5}})
+        frame = await stream.__anext__()
+        assert frame == 'event: observation\ndata: {"city":1,"data":{"temp":21.5}}\n\n'
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        await stream.aclose()
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+def test_live_updates_soak_with_thousands_of_subscribers():
+    from django.core.management import call_command
+    # Raises CommandError if any frame is lost or a subscription is left open
+    call_command('soak_live_updates', subscribers=2000, cities=20, messages=5, interval=0)
+
+@pytest.mark.django_db
+def test_forecast_refetch_replaces_todays_rows_in_one_insert(openweather, create_city):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from .tasks import fetch_forecast_data
+    midnight = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def forecast(temp):
+        entries = [
+            {"dt": (midnight + timedelta(hours=hour)).timestamp(), "main": {"temp": temp, "feels_like": temp},
+             "weather": [{"main": "Clouds", "description": "few clouds"}]}
+            for hour in (0, 3)
+        ]
+        return {"city": {"timezone": 0}, "list": entries}
+
+    openweather.payload = forecast(290.15)
+    fetch_forecast_data()
+    openweather.payload = forecast(300.15)
+    with CaptureQueriesContext(connection) as context:
+        fetch_forecast_data()
+    writes = [query["sql"] for query in context.captured_queries if '"weather_forecastdata"' in query["sql"]]
+    assert [sql.split()[0] for sql in writes] == ["DELETE", "INSERT"]
+    assert sorted(ForecastData.objects.filter(city=create_city).values_list("temp", flat=True)) == [
+        pytest.approx(27.0), pytest.approx(27.0)
+    ]
+
+
+@pytest.mark.django_db
+def test_ingest_publishes_live_observation(monkeypatch, openweather, create_city, django_capture_on_commit_callbacks):
+    from . import live
+    from .tasks import fetch_weather_data
+    published = []
+
+    class RecordingHub:
+        def publish(self, channel, event, data):
+            published.append((channel, event, data))
+
+    openweather.payload = {"main": {"temp": 293.15, "feels_like": 293.15}, "weather": [{"main": "Rain"}]}
+    monkeypatch.setattr(live, "get_hub", RecordingHub)
+    with django_capture_on_commit_callbacks(execute=True):
+        fetch_weather_data()
+    [(channel, event, data)] = published
+    assert channel == live.city_channel(create_city.id)
+    assert event == 'observation'
+    assert data["data"]["main"] == "Rain"
+    assert data["data"]["temp"] == pytest.approx(20.0)
+
+def test_lttb_keeps_endpoints_and_extremes():
+    import numpy as np
+    from .downsample import lttb_indices
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    y[437] = 25.0  # A spike that striding or averaging would lose
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 437 in indices
+    assert list(indices) == sorted(indices)
+    assert list(lttb_indices(x[:10], y[:10], 100)) == list(range(10))
+
+@pytest.mark.django_db
+def test_timeseries_downsamples_to_point_budget(settings, tmp_path, jwt_client, create_city):
+    settings.WEATHER_ARCHIVE_DIR = tmp_path
+    start = datetime.now(pytz.UTC) - timedelta(hours=300)
+    for hours in range(300):
+        entry = WeatherData.objects.create(city=create_city, main="Clear", temp=float(hours % 17), feels_like=20.0)
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=start + timedelta(hours=hours))
+
+    url = reverse('timeseries')
+    params = {"city": create_city.id, "metric": "temp", "start": start.date().isoformat(), "max_points": 40}
+    response = jwt_client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["total_points"] == 300
+    assert len(response.data["timestamps"]) == len(response.data["values"]) == 40
+    assert response.data["timestamps"][0] == int(start.timestamp() * 1000)
+    assert max(response.data["values"]) == 16.0
+
+    assert jwt_client.get(url, {**params, "metric": "pressure"}).status_code == status.HTTP_400_BAD_REQUEST
+    assert jwt_client.get(url, {**params, "max_points": 2}).status_code == status.HTTP_400_BAD_REQUEST
+    assert jwt_client.get(url, {**params, "start": "yesterday"}).status_code == status.HTTP_400_BAD_REQUEST
+    response = jwt_client.get(url, {"city": create_city.id, "source": "forecast"})
+    assert response.data["total_points"] == 0
+
+
+@pytest.mark.django_db
+def test_export_streams_ndjson_and_csv(tmp_path, jwt_client, create_city):
+    import csv
+    import json
+    from django.core.management import call_command
+    other = City.objects.create(name="Mumbai")
+    start = datetime.now(pytz.UTC) - timedelta(hours=10)
+    for hours in range(10):
+        entry = WeatherData.objects.create(city=create_city, main="Rain", temp=float(hours), feels_like=20.0)
+        WeatherData.objects.filter(pk=entry.pk).update(timestamp=start + timedelta(hours=hours))
+    WeatherData.objects.create(city=other, main="Clear", temp=30.0, feels_like=31.0)
+
+    url = reverse('export', args=['observations'])
+    response = jwt_client.get(url, {"city": create_city.id, "start": (start + timedelta(hours=2)).isoformat()})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+    assert [row["temp"] for row in rows] == [float(hours) for hours in range(2, 10)]
+    assert rows[0]["city"] == create_city.name and rows[0]["main"] == "Rain"
+
+    response = jwt_client.get(url, {"format": "csv"})
+    assert response["Content-Type"].startswith("text/csv")
+    rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+    assert len(rows) == 11
+    assert rows[-1]["city"] == "Mumbai" and rows[-1]["temp"] == "30.0"
+
+    assert jwt_client.get(reverse('export', args=['users'])).status_code == status.HTTP_404_NOT_FOUND
+    assert jwt_client.get(url, {"start": "yesterday"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    output = tmp_path / "observations.ndjson"
+    call_command('export_weather_data', 'observations', '--city', str(other.id), '--chunk-size', '3', '--output', str(output))
+    assert [json.loads(line)["temp"] for line in output.read_text().splitlines()] == [30.0]
+
+
+@pytest.mark.django_db
+def test_async_read_views_match_sync_views(
+    jwt_client, create_user, create_weather_data, create_daily_summary, create_forecast_data, create_alert
+):
+    import json
+    from rest_framework_simplejwt.tokens import AccessToken
+    from .models import CityLatestObservation
+    CityLatestObservation.record(create_weather_data)
+    city = create_weather_data.city
+    # The async views authenticate the JWT themselves; force_authenticate only reaches DRF views
+    jwt_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(create_user)}")
+    pairs = [
+        ('city-list', 'async-city-list', [], {}),
+        ('weatherdata-latest', 'async-weatherdata-latest', [], {"city": city.id}),
+        ('latest_weather_all_cities', 'async-latest-weather-all-cities', [], {}),
+        ('forecast-data-list', 'async-forecast-data-list', [], {"city": city.id}),
+        ('city-dashboard', 'async-city-dashboard', [city.id], {}),
+    ]
+    for sync_name, async_name, args, params in pairs:
+        expected = jwt_client.get(reverse(sync_name, args=args), params)
+        response = jwt_client.get(reverse(async_name, args=args), params)
+        assert response.status_code == status.HTTP_200_OK, async_name
+        assert json.loads(response.content) == json.loads(expected.content), async_name
+
+    assert jwt_client.get(reverse('async-city-dashboard', args=[city.id + 1])).status_code == status.HTTP_404_NOT_FOUND
+    assert jwt_client.get(reverse('async-weatherdata-latest')).status_code == status.HTTP_400_BAD_REQUEST
+    jwt_client.credentials()
+    assert jwt_client.get(reverse('async-city-list')).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_request_metrics_and_query_budgets(settings, monkeypatch, caplog, jwt_client, create_user, create_city):
+    from . import views
+    from .middleware import QueryBudgetExceeded
+    for _ in range(5):
+        Alert.objects.create(user=create_user, city=create_city, message="Temperature threshold exceeded.")
+
+    # Listing alerts joins the user and city instead of querying them per row, so it stays in budget
+    settings.DEBUG = True
+    response = jwt_client.get(reverse('alert-list'), {"city": create_city.id})
+    assert response.status_code == status.HTTP_200_OK
+    assert int(response["X-DB-Queries"]) <= views.alert_list.query_budget
+    assert int(response["X-Response-Size"]) == len(response.content)
+    assert float(response["X-Serialization-Time-Ms"]) > 0
+    assert response["Server-Timing"].startswith("db;dur=")
+
+    settings.DEBUG = False
+    with caplog.at_level("INFO", logger="weather.requests"):
+        response = jwt_client.get(reverse('city-list'))
+    assert "X-DB-Queries" not in response
+    record = next(record for record in caplog.records if record.name == "weather.requests")
+    assert record.view == "city-list" and record.status == 200 and record.bytes == len(response.content)
+
+    settings.RESPONSE_CACHE_ENABLED = False  # A cache hit would run no queries
+    monkeypatch.setattr(views.city_list, "query_budget", 0)
+    with pytest.raises(QueryBudgetExceeded, match="city-list ran 1 queries, over its budget of 0"):
+        jwt_client.get(reverse('city-list'))
+
+
+@pytest.mark.django_db
+def test_prometheus_metrics_cover_ingest_alerts_tasks_and_views(
+    settings, monkeypatch, openweather, jwt_client, create_user, create_city, django_capture_on_commit_callbacks
+):
+    from prometheus_client import REGISTRY
+    from .tasks import fetch_weather_data, send_alert_email
+
+    openweather.payload = {"main": {"temp": 313.15, "feels_like": 313.15}, "weather": [{"main": "Clear"}]}
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    Threshold.objects.create(user=create_user, city=create_city, temp_threshold=35.0, consecutive_updates=1)
+    fetch_labels = {"kind": "weather", "outcome": "success"}
+    before = {
+        "fetches": sample("weather_fetch_duration_seconds_count", **fetch_labels),
+        "upstream": sample("weather_upstream_responses_total", kind="weather", status="200"),
+        "rows": sample("weather_rows_written_total", task="fetch_weather_data", model="WeatherData"),
+        "alerts": sample("weather_alert_evaluations_total", result="triggered"),
+        "emails": sample("weather_alert_email_seconds_count", outcome="sent"),
+        "tasks": sample("weather_task_duration_seconds_count", task="weather.tasks.fetch_weather_data", state="SUCCESS"),
+    }
+    monkeypatch.setattr(send_alert_email, "delay", lambda alert_id: send_alert_email.apply((alert_id,)))
+    with django_capture_on_commit_callbacks(execute=True):
+        fetch_weather_data.apply()  # Runs through Celery's tracer, which sends the prerun/postrun signals
+
+    assert sample("weather_fetch_duration_seconds_count", **fetch_labels) == before["fetches"] + 1
+    assert sample("weather_upstream_responses_total", kind="weather", status="200") == before["upstream"] + 1
+    assert sample("weather_rows_written_total", task="fetch_weather_data", model="WeatherData") == before["rows"] + 1
+    assert sample("weather_alert_evaluations_total", result="triggered") == before["alerts"] + 1
+    assert sample("weather_alert_email_seconds_count", outcome="sent") == before["emails"] + 1
+    assert sample(
+        "weather_task_duration_seconds_count", task="weather.tasks.fetch_weather_data", state="SUCCESS"
+    ) == before["tasks"] + 1
+
+    requests_before = sample("weather_http_request_duration_seconds_count", view="city-list", method="GET", status="200")
+    jwt_client.get(reverse('city-list'))
+    assert sample(
+        "weather_http_request_duration_seconds_count", view="city-list", method="GET", status="200"
+    ) == requests_before + 1
+
+    settings.METRICS_TOKEN = "scrape-secret"
+    assert jwt_client.get("/metrics").status_code == status.HTTP_401_UNAUTHORIZED
+    response = jwt_client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+    assert response.status_code == status.HTTP_200_OK
+    assert b"weather_fetch_duration_seconds_bucket" in response.content
+
+
+@pytest.mark.django_db
+def test_profiling_requests_and_tasks_on_demand(settings, tmp_path, api_client, create_user, create_city):
+    import pstats
+    import time as time_module
+    from rest_framework_simplejwt.tokens import AccessToken
+    from .profiling import SamplingProfiler
+    from .tasks import deactivate_old_alerts
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_KEEP = 2
+    url = reverse('city-list')
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(create_user)}")
+
+    # Only staff users can ask for a profile
+    assert "X-Profile-File" not in api_client.get(url, HTTP_X_PROFILE="cprofile")
+    User.objects.filter(pk=create_user.pk).update(is_staff=True)
+    response = api_client.get(url, HTTP_X_PROFILE="cprofile")
+    assert response.status_code == status.HTTP_200_OK
+    assert pstats.Stats(str(tmp_path / response["X-Profile-File"])).total_calls > 0
+    assert "X-Profile-File" not in api_client.get(url)
+
+    settings.PROFILE_TASKS = {"weather.tasks.deactivate_old_alerts"}
+    deactivate_old_alerts.apply()
+    deactivate_old_alerts.apply()
+    dumps = sorted(path.name for path in tmp_path.iterdir())
+    assert len(dumps) == 2  # Rotated down to PROFILING_KEEP
+    assert all(name.endswith("weathertasksdeactivate_old_alerts.prof") for name in dumps)
+
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    deadline = time_module.perf_counter() + 0.05
+    while time_module.perf_counter() < deadline:
+        pass
+    profiler.stop()
+    assert any("test_profiling_requests_and_tasks_on_demand" in stack for stack in profiler.stacks)
+
+
+def test_structured_sampled_background_logging():
+    import json
+    import logging
+    import logging.handlers
+    import queue
+    from .log import BackgroundQueueHandler, JSONFormatter, SamplingFilter
+
+    record = logging.LogRecord("weather.requests", logging.INFO, __file__, 1, "GET %s %s", ("/x", 200), None)
+    record.queries = 3
+    line = json.loads(JSONFormatter().format(record))
+    assert line["message"] == "GET /x 200"
+    assert line["logger"] == "weather.requests"
+    assert line["queries"] == 3
+
+    sampling = SamplingFilter(rate=10)
+    info = logging.LogRecord("weather.tasks.cities", logging.INFO, __file__, 1, "ok", None, None)
+    error = logging.LogRecord("weather.tasks.cities", logging.ERROR, __file__, 1, "failed", None, None)
+    assert sum(sampling.filter(info) for _ in range(100)) == 10
+    assert all(sampling.filter(error) for _ in range(5))
+
+    # Arguments are merged on the calling thread; the listener thread does the formatting and I/O
+    records = queue.SimpleQueue()
+    collected = []
+    target = logging.Handler()
+    target.emit = lambda record: collected.append(target.format(record))
+    target.setFormatter(JSONFormatter())
+    listener = logging.handlers.QueueListener(records, target)
+    listener.start()
+    logger = logging.getLogger("weather.tests.background")
+    logger.addHandler(BackgroundQueueHandler(records))
+    try:
+        values = ["first"]
+        logger.warning("value=%s", values)
+        values.append("changed")
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+    assert json.loads(collected[0])["message"] == "value=['first']"
+
+
+@pytest.mark.django_db
+def test_tasks_are_routed_to_queues_and_alert_emails_are_queued(
+    monkeypatch, mailoutbox, create_user, create_city, django_capture_on_commit_callbacks
+):
+    from weather_monitoring.celery import QUEUE_PROFILES, app
+    from .tasks import check_alerts, conditions, fetch_weather_data, send_alert_email
+
+    routes = {task: route["queue"] for task, route in app.conf.task_routes.items()}
+    assert set(routes.values()) == set(QUEUE_PROFILES)
+    assert set(routes) == {name for name in app.tasks if name.startswith("weather.tasks.")}
+    assert fetch_weather_data.acks_late and not send_alert_email.acks_late
+    assert all(app.tasks[name].ignore_result for name in routes)
+
+    queued = []
+    monkeypatch.setattr(send_alert_email, "delay", queued.append)
+    create_user.email = "alerts@example.com"
+    create_user.save()
+    Threshold.objects.create(user=create_user, city=create_city, temp_threshold=35.0, consecutive_updates=1)
+    WeatherData.objects.create(city=create_city, main="Clear", temp=40.0, feels_like=40.0)
+    with django_capture_on_commit_callbacks(execute=True):
+        check_alerts(create_city, 40.0, conditions.code_for("Clear"))
+        assert queued == []  # Only once the alert is committed
+    alert = Alert.objects.get()
+    assert queued == [alert.id]
+    assert mailoutbox == []
+
+    send_alert_email.apply((alert.id,))
+    assert [message.to for message in mailoutbox] == [["alerts@example.com"]]
+    assert mailoutbox[0].body == alert.message
+
+
+@pytest.mark.django_db
+def test_singleton_tasks_skip_or_queue_overlapping_runs_and_coalesce_enqueues(monkeypatch, openweather, create_city):
+    from .locks import acquire, enqueue_once, release, task_key
+    from .tasks import aggregate_daily_summary, fetch_weather_data
+
+    enqueued = []
+    monkeypatch.setattr(fetch_weather_data, "apply_async", lambda *args, **kwargs: enqueued.append(kwargs) or kwargs)
+    monkeypatch.setattr(aggregate_daily_summary, "apply_async", lambda *args, **kwargs: enqueued.append(kwargs) or kwargs)
+    assert enqueue_once(fetch_weather_data) is not None
+    assert enqueue_once(fetch_weather_data) is None
+    assert len(enqueued) == 1
+
+    lock = task_key("task-lock", fetch_weather_data.name)
+    assert acquire(lock, "other-run", 60)
+    fetch_weather_data.apply()  # Overlaps the run holding the lock: skipped
+    assert openweather.urls == []
+    release(lock, "other-run")
+    fetch_weather_data.apply(task_id=enqueued[0]["task_id"])  # The queued message is delivered
+    assert len(openweather.urls) == 1
+    # The run started, so a new enqueue is no longer a duplicate
+    assert enqueue_once(fetch_weather_data) is not None
+
+    enqueued.clear()
+    lock = task_key("task-lock", aggregate_daily_summary.name)
+    assert acquire(lock, "other-run", 60)
+    aggregate_daily_summary.apply()
+    aggregate_daily_summary.apply()
+    assert len(enqueued) == 1  # Queued to run after the current run, once
+    assert not DailySummary.objects.exists()
+
+
+@pytest.mark.django_db
+def test_add_city_fetches_only_the_new_city(monkeypatch, openweather, jwt_client, create_city):
+    from .tasks import aggregate_daily_summary, fetch_forecast_data, fetch_weather_data
+
+    enqueued = {}
+    for task in (fetch_weather_data, fetch_forecast_data, aggregate_daily_summary):
+        monkeypatch.setattr(
+            task, "apply_async", lambda args, kwargs, name=task.name, **options: enqueued.setdefault(name, kwargs)
+        )
+    response = jwt_client.post(
+        reverse('add_city'), {"name": "New City", "country_code": "US", "latitude": 40.7128, "longitude": -74.0060}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    new_city = response.data["id"]
+    assert enqueued == {
+        task.name: {"city_ids": [new_city]}
+        for task in (fetch_weather_data, fetch_forecast_data, aggregate_daily_summary)
+    }
+
+    fetch_weather_data.apply(kwargs={"city_ids": [new_city]})
+    [url] = openweather.urls
+    assert "lat=40.7128&lon=-74.006&" in url
+
+
+@pytest.mark.django_db
+def test_jwt_users_are_cached_until_they_change(api_client, create_user, create_city):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    def user_queries(url):
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url)
+        return response.status_code, sum('"auth_user"' in query["sql"] for query in context.captured_queries)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(create_user)}")
+    url = reverse('city-list')
+    assert user_queries(url) == (status.HTTP_200_OK, 1)
+    assert user_queries(url) == (status.HTTP_200_OK, 0)
+    assert user_queries(reverse('async-city-list')) == (status.HTTP_200_OK, 0)
+
+    create_user.is_active = False
+    create_user.save()
+    assert user_queries(url) == (status.HTTP_401_UNAUTHORIZED, 1)
+
+
+@pytest.mark.django_db
+def test_requests_and_invalidation_survive_a_redis_outage(api_client, create_user, django_capture_on_commit_callbacks):
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    token = AccessToken.for_user(create_user)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    # Nothing listens on port 1
+    unreachable = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:1/0"}}
+    with override_settings(CACHES=unreachable):
+        with django_capture_on_commit_callbacks(execute=True):
+            City.objects.get_or_create(name="Outage City", defaults={"latitude": 0.0, "longitude": 0.0})
+            create_user.save()
+        # Authentication, rate limits and the response cache fall back to running without the cache
+        response = api_client.get(reverse('city-list'))
+    assert response.status_code == status.HTTP_200_OK
+    assert b"Outage City" in response.content
+    assert "ETag" not in response
+
+
+@pytest.mark.django_db
+def test_weighted_sliding_window_throttling(settings, jwt_client, create_user, create_city):
+    from .throttling import _wait
+
+    # Half-way through a window, half of the previous window's 10 units still count
+    assert _wait(5, 10, 10, 60, 150.0) is None
+    assert _wait(6, 10, 10, 60, 150.0) == 30.0
+    assert _wait(6, 10, 10, 60, 165.0) is None  # A quarter of them by now
+
+    settings.API_THROTTLE_USER_RATE = "14/min"
+    settings.API_THROTTLE_ENDPOINT_RATE = "10/min"
+    forecast = reverse('forecast-data-list')
+    assert jwt_client.get(forecast).status_code == status.HTTP_200_OK
+    assert jwt_client.get(forecast).status_code == status.HTTP_200_OK
+    response = jwt_client.get(forecast)  # Costs 5: over the endpoint's 10 units
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert 0 < int(response["Retry-After"]) <= 60
+
+    # Other endpoints draw on the rest of the user's budget
+    for _ in range(4):
+        assert jwt_client.get(reverse('city-list')).status_code == status.HTTP_200_OK
+    assert jwt_client.get(reverse('city-list')).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    settings.API_THROTTLE_ENABLED = False
+    assert jwt_client.get(forecast).status_code == status.HTTP_200_OK
+
+
+def test_throttle_counters_always_expire_on_redis(settings, monkeypatch):
+    # Runs against an in-process Redis where fakeredis is installed
+    fakeredis = pytest.importorskip("fakeredis")
+    from django.core.cache import caches
+    from django.test import RequestFactory
+    from . import throttling
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://fake"}}
+    settings.API_THROTTLE_ENDPOINT_RATE = "2/min"
+    backend = caches['default']
+    server = fakeredis.FakeRedis()
+    monkeypatch.setattr(backend._cache, "get_client", lambda key=None, write=False: server)
+
+    request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1")
+    request.resolver_match = None
+    assert throttling.check(request, None) is None
+    assert throttling.check(request, None) is None
+    assert throttling.check(request, None) > 0  # Over the endpoint's budget, and given back
+    counters = server.keys("*rl:*")
+    assert len(counters) == 2
+    assert all(0 < server.ttl(key) <= 120 for key in counters)
+    assert sorted(int(server.get(key)) for key in counters) == [2, 2]
+
+
+# Cold-start import budgets for `python -X importtime` (about a third of each is used today)
+STARTUP_IMPORT_BUDGETS_MS = {
+    "web": ("import django; django.setup(); import weather_monitoring.urls", 1500),
+    "worker": ("import django; django.setup(); import weather_monitoring.celery, weather.tasks", 1500),
+}
+
+
+@pytest.mark.parametrize("process", sorted(STARTUP_IMPORT_BUDGETS_MS))
+def test_startup_imports_stay_within_budget(process):
+    import os
+    import subprocess
+    import sys
+    from django.conf import settings
+
+    code, budget_ms = STARTUP_IMPORT_BUDGETS_MS[process]
+    env = {key: value for key, value in os.environ.items() if key != "OPENWEATHER_API_KEY"}
+    env.update(DJANGO_SETTINGS_MODULE="weather_monitoring.settings", LOG_BACKGROUND="False")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]  # No API key needed to start
+
+    imported, total_us = set(), 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        if not name.startswith("  "):  # Top-level imports; nested ones are part of their cumulative time
+            total_us += int(cumulative)
+    assert "numpy" not in imported
+    if process == "web":
+        assert "weather.tasks" not in imported
+    assert total_us / 1000 < budget_ms
@@ -0,0 +1,157 @@
+"""
+Weighted sliding-window rate limits for the API.
+
+Every request spends cost units from two budgets: one per user across
+the whole API (API_THROTTLE_USER_RATE) and one per user and endpoint
+(API_THROTTLE_ENDPOINT_RATE). Anonymous clients are counted by IP
+address. Endpoints cost 1 unit unless marked with `@throttle_cost(n)`.
+
+Each budget is a sliding window approximated from two fixed-window
+counters: the current window's count plus the previous window's count
+weighted by how much of it still overlaps the sliding window.
+
+On the Redis cache a check is one round trip: a MULTI/EXEC pipeline adds
+the cost to both current counters (INCRBY, then EXPIRE NX so a counter
+always carries a TTL, even one recreated right after expiring) and reads
+both previous counters. A rejected request takes a second round trip to
+give the cost back. Other cache backends (local memory in tests) go
+through `cache.incr` and `cache.add`. While Redis is unreachable requests
+are let through.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from redis import RedisError
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def throttle_cost(units):
+    """
+    Mark a view as costing `units` of the rate limits per request. Apply
+    it above `@api_view`, so it marks the view function that is routed.
+    """
+    def decorator(view):
+        view.throttle_cost = units
+        return view
+    return decorator
+
+
+def parse_rate(rate):
+    """'600/min' -> (600, 60)"""
+    units, period = rate.split('/')
+    return int(units), PERIODS[period[0]]
+
+
+def _window_keys(key, window, now):
+    current = int(now // window)
+    return f"rl:{key}:{current}", f"rl:{key}:{current - 1}"
+
+
+def _wait(count, previous, limit, window, now):
+    """
+    None while `count` in the current window plus the overlapping part of
+    the previous window's `previous` stays within `limit`, else the seconds
+    until the current window ends.
+    """
+    elapsed = now % window
+    if previous * (1 - elapsed / window) + count <= limit:
+        return None
+    return window - elapsed
+
+
+def _redis_add(backend, counters, cost, previous_keys=()):
+    """
+    Add `cost` to each (key, window) counter and read `previous_keys`, in
+    one atomic round trip. Returns the new counts and the previous counts.
+    """
+    client = backend._cache.get_client(write=True)
+    pipeline = client.pipeline()
+    for key, window in counters:
+        key = backend.make_and_validate_key(key)
+        pipeline.incrby(key, cost)
+        # Kept through the next window, where it is the previous count
+        pipeline.expire(key, 2 * window, nx=True)
+    pipeline.mget([backend.make_and_validate_key(key) for key in previous_keys])
+    *replies, previous = pipeline.execute()
+    return replies[::2], [int(count or 0) for count in previous]
+
+
+def _cache_add(counters, cost, previous_keys=()):
+    """`_redis_add` for cache backends without Redis pipelines."""
+    counts = []
+    for key, window in counters:
+        try:
+            counts.append(cache.incr(key, cost))
+        except ValueError:
+            # First hit of the window; kept through the next window, where it is the previous count
+            if cache.add(key, cost, 2 * window):
+                counts.append(cost)
+            else:
+                counts.append(cache.incr(key, cost))
+    previous = cache.get_many(previous_keys) if previous_keys else {}
+    return counts, [previous.get(key, 0) for key in previous_keys]
+
+
+def _add(counters, cost, previous_keys=()):
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        return _redis_add(backend, counters, cost, previous_keys)
+    return _cache_add(counters, cost, previous_keys)
+
+
+def check(request, user):
+    """
+    Charge the request to `user` (or its IP address when anonymous).
+    Returns None if allowed, else the seconds to wait.
+    """
+    if not settings.API_THROTTLE_ENABLED:
+        return None
+    identity = f"u{user.pk}" if user is not None and user.is_authenticated else BaseThrottle().get_ident(request)
+    match = request.resolver_match
+    cost = getattr(match.func, 'throttle_cost', 1) if match else 1
+    endpoint = match.view_name if match else request.path
+    now = time.time()
+
+    budgets = [
+        (identity, *parse_rate(settings.API_THROTTLE_USER_RATE)),
+        (f"{identity}:{endpoint}", *parse_rate(settings.API_THROTTLE_ENDPOINT_RATE)),
+    ]
+    counters, previous_keys = [], []
+    for key, _, window in budgets:
+        current_key, previous_key = _window_keys(key, window, now)
+        counters.append((current_key, window))
+        previous_keys.append(previous_key)
+    try:
+        counts, previous = _add(counters, cost, previous_keys)
+    except RedisError as e:
+        logger.warning("Rate limit counters unavailable, letting %s through: %s", identity, e)
+        return None
+
+    waits = [
+        wait for (_, limit, window), count, previous_count in zip(budgets, counts, previous)
+        if (wait := _wait(count, previous_count, limit, window, now)) is not None
+    ]
+    if not waits:
+        return None
+    # Rejected requests are not counted against either budget
+    try:
+        _add(counters, -cost)
+    except RedisError as e:
+        logger.warning("Could not give back the rate limit cost of %s: %s", identity, e)
+    return max(waits)
+
+
+class WeightedSlidingWindowThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        self.retry_after = check(request, request.user)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,71 @@
+"""
+Chart series for one metric of a city, bounded by a point budget.
+
+Rows are read as (timestamp, value) column arrays and downsampled with
+LTTB, so the payload and the client's render cost depend on `max_points`
+and not on the length of the requested range. Observation series older
+than the retention period are read from the columnar archive.
+"""
+import numpy as np
+from django.conf import settings
+
+from .archive import ArchiveReader
+from .downsample import lttb_indices
+from .models import ForecastData, WeatherData
+
+METRICS = ('temp', 'feels_like', 'humidity', 'wind_speed')
+SOURCES = {
+    'observations': WeatherData,
+    'forecast': ForecastData,
+}
+
+
+def _database_columns(model, city_id, metric, start, end):
+    rows = list(
+        model.objects.filter(city_id=city_id, timestamp__gte=start, timestamp__lt=end)
+        .exclude(**{f"{metric}__isnull": True})
+        .order_by('timestamp')
+        .values_list('timestamp', metric)
+    )
+    timestamps = np.fromiter((row[0].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+    values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    return timestamps, values
+
+
+def load_series(source, city_id, metric, start, end):
+    """
+    (epoch seconds, values) arrays of `metric` with start <= timestamp < end,
+    sorted by time and without missing values.
+    """
+    timestamps, values = _database_columns(SOURCES[source], city_id, metric, start, end)
+    if source == 'observations' and settings.WEATHER_ARCHIVE_ENABLED:
+        # Archived rows are older than anything still in the database
+        archive_end = timestamps[0] if len(timestamps) else end.timestamp()
+        if start.timestamp() < archive_end:
+            history = ArchiveReader().history(city_id, start, end)
+            older = history['timestamp'] < archive_end
+            archived_values = history[metric][older].astype(np.float64)
+            present = ~np.isnan(archived_values)
+            timestamps = np.concatenate([history['timestamp'][older][present].astype(np.float64), timestamps])
+            values = np.concatenate([archived_values[present], values])
+    return timestamps, values
+
+
+def downsampled_series(source, city_id, metric, start, end, max_points):
+    """
+    Payload for the timeseries endpoint: parallel `timestamps` (epoch
+    milliseconds) and `values` lists of at most `max_points` points, plus
+    the number of points in the full series.
+    """
+    timestamps, values = load_series(source, city_id, metric, start, end)
+    indices = lttb_indices(timestamps, values, max_points)
+    return {
+        'city': city_id,
+        'source': source,
+        'metric': metric,
+        'start': start,
+        'end': end,
+        'total_points': len(timestamps),
+        'timestamps': (timestamps[indices] * 1000).astype(np.int64).tolist(),
+        'values': np.round(values[indices], 2).tolist(),
+    }
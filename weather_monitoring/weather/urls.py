@@ -1,10 +1,12 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
     # WeatherData Endpoints
     path('weather-data/latest/', views.weather_data_latest, name='weatherdata-latest'),  # Moved up
+    path('weather-data/archive/', views.weather_data_archive, name='weatherdata-archive'),
+    path('timeseries/', views.timeseries, name='timeseries'),
     path('weather-data/<int:pk>/', views.weather_data_detail, name='weatherdata-detail'),
     path('weather-data/', views.weather_data_list, name='weatherdata-list'),
     path('weather-data/latest/all/', views.latest_weather_all_cities, name='latest_weather_all_cities'),
@@ -35,4 +37,20 @@ urlpatterns = [
 
     # Forecast Data
     path('forecast/', views.forecast_data_list, name='forecast-data-list'),
+
+    # Dashboard
+    path('dashboard/<int:city_id>/', views.city_dashboard, name='city-dashboard'),
+
+    # Bulk export (streamed NDJSON or CSV)
+    path('export/<str:kind>/', views.export_data, name='export'),
+
+    # Live updates (Server-Sent Events, served over ASGI)
+    path('live/', async_views.live_updates, name='live-updates'),
+
+    # Async versions of the hot read endpoints (served over ASGI)
+    path('async/cities/', async_views.city_list, name='async-city-list'),
+    path('async/weather-data/latest/', async_views.weather_data_latest, name='async-weatherdata-latest'),
+    path('async/weather-data/latest/all/', async_views.latest_weather_all_cities, name='async-latest-weather-all-cities'),
+    path('async/forecast/', async_views.forecast_data_list, name='async-forecast-data-list'),
+    path('async/dashboard/<int:city_id>/', async_views.city_dashboard, name='async-city-dashboard'),
 ]
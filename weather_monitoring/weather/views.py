@@ -1,17 +1,22 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.utils.timezone import now
+from rest_framework.exceptions import NotFound
+from django.utils.timezone import now, get_current_timezone, is_aware, make_aware
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 from django.contrib.auth.models import User
-from .tasks import fetch_weather_data, fetch_forecast_data, aggregate_daily_summary
+from .locks import enqueue_once
 from .models import (
-    City, WeatherData, DailySummary, Threshold, Alert, UserPreference, ForecastData
+    City, CityLatestObservation, WeatherData, DailySummary, Threshold, Alert, UserPreference, ForecastData
 )
 from django.shortcuts import get_object_or_404
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.db.models import Avg, Max, Min, OuterRef, Subquery
+from django.db.models import Avg, Max, Min
 from rest_framework.pagination import PageNumberPagination
 from .serializers import (
     CitySerializer,
@@ -23,6 +28,21 @@ from .serializers import (
     UserPreferenceSerializer,
     ForecastDataSerializer,
 )
+from .pagination import paginator_for
+from .export import EXPORTS, FORMATS as EXPORT_FORMATS, stream_export
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer
+from . import dashboard, response_cache
+from .response_cache import cached_response
+from .middleware import query_budget
+from .throttling import throttle_cost
+from .flat_serializers import (
+    city_serializer,
+    weather_data_serializer,
+    latest_observation_serializer,
+    daily_summary_serializer,
+    alert_serializer,
+    forecast_data_serializer,
+)
 import logging
 
 logger = logging.getLogger('weather')
@@ -34,28 +54,29 @@ class NoPagination(PageNumberPagination):
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def register(request):
-    logger.debug(f"Received registration data: {request.data}")
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save()
-        logger.info(f"User registered successfully: {serializer.data['username']}")
+        logger.info("User registered successfully: %s", serializer.data['username'])
         return Response({"message": "User registered successfully."}, status=status.HTTP_201_CREATED)
-    logger.warning(f"Registration failed: {serializer.errors}")
+    logger.warning("Registration failed: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # City Views
 
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response(response_cache.CITIES)
 def city_list(request):
     try:
         cities = City.objects.all()
         serializer = CitySerializer(cities, many=True)
-        logger.info(f"User {request.user.username} fetched city list.")
+        logger.info("User %s fetched city list.", request.user.username)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
-        logger.error(f"Error fetching city list: {str(e)}", exc_info=True)
+        logger.error("Error fetching city list: %s", str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['POST'])
@@ -64,15 +85,18 @@ def add_city(request):
     """
     Add a new city record.
     """
+    # Task modules (and the HTTP client they use) are only needed here, not at web process startup
+    from .tasks import fetch_weather_data, fetch_forecast_data, aggregate_daily_summary
+
     serializer = CitySerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save()
-        fetch_weather_data.delay()
-        fetch_forecast_data.delay()
-        aggregate_daily_summary.delay()
-        logger.info(f"City {serializer.data['name']} added successfully.")
+        city = serializer.save()
+        # Populate only the new city instead of re-fetching every city
+        for task in (fetch_weather_data, fetch_forecast_data, aggregate_daily_summary):
+            enqueue_once(task, kwargs={'city_ids': [city.id]})
+        logger.info("City %s added successfully.", serializer.data['name'])
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-    logger.warning(f"Failed to add city: {serializer.errors}")
+    logger.warning("Failed to add city: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['DELETE'])
@@ -84,21 +108,22 @@ def delete_city(request, pk):
     try:
         city = City.objects.get(pk=pk)
         city.delete()
-        logger.info(f"City with ID {pk} deleted successfully.")
+        logger.info("City with ID %s deleted successfully.", pk)
         return Response({"message": "City deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
     except City.DoesNotExist:
-        logger.warning(f"Attempted to delete non-existent city with ID {pk}.")
+        logger.warning("Attempted to delete non-existent city with ID %s.", pk)
         return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
     
     
 
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def city_detail(request, pk):
     try:
         city = City.objects.get(pk=pk)
     except City.DoesNotExist:
-        logger.warning(f"User {request.user.username} requested non-existent city with id {pk}.")
+        logger.warning("User %s requested non-existent city with id %s.", request.user.username, pk)
         return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = CitySerializer(city)
@@ -106,35 +131,39 @@ def city_detail(request, pk):
 
 # WeatherData Views
 
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def weather_data_list(request):
     """
     List all weather data with pagination and optional filtering by city.
+    Uses keyset pagination on (timestamp, id) unless `?page=` is given.
     """
     try:
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
+        paginator = paginator_for(request, ('-timestamp', '-id'))
         city_id = request.query_params.get('city', None)
         if city_id:
             # Validate if the city exists
             if not City.objects.filter(id=city_id).exists():
-                logger.warning(f"User {request.user.username} attempted to filter with non-existent city_id={city_id}")
+                logger.warning("User %s attempted to filter with non-existent city_id=%s", request.user.username, city_id)
                 return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
-            weather_data = WeatherData.objects.filter(city_id=city_id).order_by('-timestamp')
-            logger.debug(f"Filtering weather data for city_id={city_id}")
+            weather_data = WeatherData.objects.filter(city_id=city_id).order_by('-timestamp', '-id')
+            logger.debug("Filtering weather data for city_id=%s", city_id)
         else:
-            weather_data = WeatherData.objects.all().order_by('-timestamp')
+            weather_data = WeatherData.objects.all().order_by('-timestamp', '-id')
             logger.debug("Fetching all weather data without city filter.")
-        result_page = paginator.paginate_queryset(weather_data, request)
-        serializer = WeatherDataSerializer(result_page, many=True)
-        logger.info(f"User {request.user.username} fetched weather data list.")
-        return paginator.get_paginated_response(serializer.data)
+        result_page = paginator.paginate_queryset(weather_data_serializer.values(weather_data), request)
+        logger.info("User %s fetched weather data list.", request.user.username)
+        return paginator.get_paginated_response(weather_data_serializer.many(result_page))
+    except NotFound as e:
+        logger.warning("User %s sent an invalid pagination cursor.", request.user.username)
+        return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        logger.error(f"Error fetching weather data list: {str(e)}", exc_info=True)
+        logger.error("Error fetching weather data list: %s", str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def weather_data_detail(request, pk):
@@ -142,17 +171,19 @@ def weather_data_detail(request, pk):
     Retrieve a specific weather data point by ID.
     """
     try:
-        weather_data = WeatherData.objects.get(pk=pk)
+        weather_data = WeatherData.objects.select_related('city').get(pk=pk)
     except WeatherData.DoesNotExist:
-        logger.warning(f"User {request.user.username} requested non-existent weather data with id {pk}.")
+        logger.warning("User %s requested non-existent weather data with id %s.", request.user.username, pk)
         return Response({"error": "Weather data not found."}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = WeatherDataSerializer(weather_data)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.LATEST)
 def weather_data_latest(request):
     """
     Retrieve the latest weather data for a specific city.
@@ -161,72 +192,229 @@ def weather_data_latest(request):
     if city_id is None:
         return Response({"error": "City ID not provided."}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        weather = WeatherData.objects.filter(city_id=city_id).order_by('-timestamp').first()
+        weather = latest_observation_serializer.values(
+            CityLatestObservation.objects.filter(city_id=city_id)
+        ).first()
         if weather is None:
             return Response({"error": "No weather data found for the specified city."}, status=status.HTTP_404_NOT_FOUND)
-        serializer = WeatherDataSerializer(weather)
-        logger.info(f"User {request.user.username} fetched latest weather data for city_id={city_id}.")
-        return Response(serializer.data, status=status.HTTP_200_OK)  # Return as a single object
+        logger.info("User %s fetched latest weather data for city_id=%s.", request.user.username, city_id)
+        return Response(latest_observation_serializer.to_representation(weather), status=status.HTTP_200_OK)  # Return as a single object
     except Exception as e:
-        logger.error(f"Error fetching latest weather data for city_id={city_id}: {str(e)}", exc_info=True)
+        logger.error("Error fetching latest weather data for city_id=%s: %s", city_id, str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 
+@throttle_cost(2)
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.LATEST)
 def latest_weather_all_cities(request):
     """
     Retrieve the latest weather data for all cities.
     """
     try:
-        # Subquery to get the latest timestamp for each city
-        latest_weather_subquery = WeatherData.objects.filter(
-            city=OuterRef('city_id')
-        ).order_by('-timestamp').values('id')[:1]
+        # One row per city, maintained by the ingest task
+        latest_weathers = CityLatestObservation.objects.order_by('city_id')
+        data = latest_observation_serializer.many(latest_observation_serializer.values(latest_weathers))
+        logger.info("User %s fetched latest weather data for all cities.", request.user.username)
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error("Error fetching latest weather data for all cities: %s", str(e), exc_info=True)
+        return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Fetch WeatherData objects that match the latest timestamp for each city
-        latest_weathers = WeatherData.objects.filter(id__in=Subquery(latest_weather_subquery))
 
-        serializer = WeatherDataSerializer(latest_weathers, many=True)
-        logger.info(f"User {request.user.username} fetched latest weather data for all cities.")
-        return Response(serializer.data, status=status.HTTP_200_OK)
+@throttle_cost(5)
+@query_budget(2)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def weather_data_archive(request):
+    """
+    Daily rollups of archived (expired) weather data for a city between two dates.
+    Served from the memory-mapped archive without querying the database.
+    """
+    from .archive import ArchiveReader  # numpy, loaded on first use
+
+    city_id = request.query_params.get('city', None)
+    start = parse_date(request.query_params.get('start', '') or '')
+    end = parse_date(request.query_params.get('end', '') or '')
+    if city_id is None or not city_id.isdigit():
+        return Response({"error": "City ID not provided."}, status=status.HTTP_400_BAD_REQUEST)
+    if start is None or end is None or start > end:
+        return Response(
+            {"error": "Provide 'start' and 'end' dates as YYYY-MM-DD with start <= end."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        tz = get_current_timezone()
+        rollup = ArchiveReader().daily_rollup(
+            int(city_id),
+            datetime.combine(start, time.min, tzinfo=tz),
+            datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz),
+        )
+        logger.info("User %s fetched archived weather data for city_id=%s.", request.user.username, city_id)
+        return Response(rollup, status=status.HTTP_200_OK)
     except Exception as e:
-        logger.error(f"Error fetching latest weather data for all cities: {str(e)}", exc_info=True)
+        logger.error("Error reading archived weather data for city_id=%s: %s", city_id, str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@throttle_cost(3)
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def timeseries(request):
+    """
+    One metric of a city's observations or forecast over a time range,
+    downsampled with LTTB to at most `max_points` points for charts.
+    `start`/`end` accept ISO dates or datetimes; observations default to
+    the last 7 days and forecasts to the next 5 days.
+    """
+    from .timeseries import METRICS as TIMESERIES_METRICS, SOURCES as TIMESERIES_SOURCES, downsampled_series  # numpy
+
+    params = request.query_params
+    city_id = params.get('city', None)
+    metric = params.get('metric', 'temp')
+    source = params.get('source', 'observations')
+    if city_id is None or not city_id.isdigit():
+        return Response({"error": "City ID not provided."}, status=status.HTTP_400_BAD_REQUEST)
+    if metric not in TIMESERIES_METRICS:
+        return Response(
+            {"error": f"'metric' must be one of: {', '.join(TIMESERIES_METRICS)}."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if source not in TIMESERIES_SOURCES:
+        return Response(
+            {"error": f"'source' must be one of: {', '.join(TIMESERIES_SOURCES)}."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        max_points = int(params.get('max_points', settings.TIMESERIES_DEFAULT_POINTS))
+    except ValueError:
+        max_points = 0
+    if not 3 <= max_points <= settings.TIMESERIES_MAX_POINTS:
+        return Response(
+            {"error": f"'max_points' must be between 3 and {settings.TIMESERIES_MAX_POINTS}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    current = now()
+    default_start, default_end = (
+        (current - timedelta(days=7), current) if source == 'observations' else (current, current + timedelta(days=5))
+    )
+    start = _parse_bound(params.get('start'), default_start)
+    end = _parse_bound(params.get('end'), default_end)
+    if start is None or end is None or start >= end:
+        return Response(
+            {"error": "Provide 'start' and 'end' as ISO dates or datetimes with start < end."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not City.objects.filter(id=city_id).exists():
+        return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        data = downsampled_series(source, int(city_id), metric, start, end, max_points)
+        logger.info(
+            "User %s fetched %s %s series for city_id=%s (%s of %s points).",
+            request.user.username, source, metric, city_id, len(data['values']), data['total_points'],
+        )
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error("Error building %s %s series for city_id=%s: %s", source, metric, city_id, str(e), exc_info=True)
+        return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _parse_bound(value, default):
+    """An aware datetime from an ISO date or datetime string, `default` if missing, None if invalid."""
+    if not value:
+        return default
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    return parsed if is_aware(parsed) else make_aware(parsed, get_current_timezone())
+
+
+@throttle_cost(20)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([FastJSONRenderer, NDJSONRenderer, CSVRenderer])
+def export_data(request, kind):
+    """
+    Stream every observation or forecast row as NDJSON (default) or CSV,
+    chosen with `?format=csv` or the Accept header. Optional filters:
+    `city`, and `start`/`end` as ISO dates or datetimes.
+    """
+    if kind not in EXPORTS:
+        return Response({"error": f"'{kind}' cannot be exported."}, status=status.HTTP_404_NOT_FOUND)
+    params = request.query_params
+    city_id = params.get('city', None)
+    if city_id is not None and not city_id.isdigit():
+        return Response({"error": "'city' must be a city ID."}, status=status.HTTP_400_BAD_REQUEST)
+    start = _parse_bound(params.get('start'), None)
+    end = _parse_bound(params.get('end'), None)
+    invalid = (params.get('start') and start is None) or (params.get('end') and end is None)
+    if invalid or (start and end and start >= end):
+        return Response(
+            {"error": "'start' and 'end' must be ISO dates or datetimes with start < end."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if city_id is not None and not City.objects.filter(id=city_id).exists():
+        return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    file_format = request.accepted_renderer.format
+    if file_format not in EXPORT_FORMATS:
+        file_format = 'ndjson'
+    city_id = int(city_id) if city_id is not None else None
+    response = StreamingHttpResponse(
+        stream_export(kind, file_format, city_id, start, end),
+        content_type=f"{EXPORT_FORMATS[file_format]}; charset=utf-8",
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{city_id or "all"}.{file_format}"'
+    logger.info("User %s started a %s export of %s for city_id=%s.", request.user.username, file_format, kind, city_id)
+    return response
+
+
 # DailySummary Views
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.DAILY_SUMMARIES)
 def daily_summary_list(request):
     """
     List all daily summaries with optional filtering by city and pagination.
+    Uses keyset pagination on (date, id) unless `?page=` is given.
     """
     try:
-        paginator = PageNumberPagination()
-        paginator.page_size = 10  # Adjust as needed
+        paginator = paginator_for(request, ('-date', '-id'))
         city_id = request.query_params.get('city', None)
         if city_id:
             # Validate if the city exists
             if not City.objects.filter(id=city_id).exists():
                 logger.warning(
-                    f"User {request.user.username} attempted to filter daily summaries with non-existent city_id={city_id}"
+                    "User %s attempted to filter daily summaries with non-existent city_id=%s", request.user.username, city_id
                 )
                 return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
-            summaries = DailySummary.objects.filter(city_id=city_id).order_by('-date')
+            summaries = DailySummary.objects.filter(city_id=city_id).order_by('-date', '-id')
         else:
-            summaries = DailySummary.objects.all().order_by('-date')
-        result_page = paginator.paginate_queryset(summaries, request)
-        serializer = DailySummarySerializer(result_page, many=True)
-        logger.info(f"User {request.user.username} fetched daily summaries.")
-        return paginator.get_paginated_response(serializer.data)
+            summaries = DailySummary.objects.all().order_by('-date', '-id')
+        result_page = paginator.paginate_queryset(daily_summary_serializer.values(summaries), request)
+        logger.info("User %s fetched daily summaries.", request.user.username)
+        return paginator.get_paginated_response(daily_summary_serializer.many(result_page))
+    except NotFound as e:
+        logger.warning("User %s sent an invalid pagination cursor.", request.user.username)
+        return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        logger.error(f"Error fetching daily summaries: {str(e)}", exc_info=True)
+        logger.error("Error fetching daily summaries: %s", str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     
     
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def daily_summary_detail(request, pk):
@@ -234,9 +422,9 @@ def daily_summary_detail(request, pk):
     Retrieve a specific daily summary by ID.
     """
     try:
-        summary = DailySummary.objects.get(pk=pk)
+        summary = DailySummary.objects.select_related('city').get(pk=pk)
     except DailySummary.DoesNotExist:
-        logger.warning(f"User {request.user.username} requested non-existent daily summary with id {pk}.")
+        logger.warning("User %s requested non-existent daily summary with id %s.", request.user.username, pk)
         return Response({"error": "Daily summary not found."}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = DailySummarySerializer(summary)
@@ -256,19 +444,19 @@ def threshold_list_create(request):
         try:
             thresholds = Threshold.objects.filter(user=request.user)
             serializer = ThresholdSerializer(thresholds, many=True)
-            logger.info(f"User {request.user.username} fetched their thresholds.")
+            logger.info("User %s fetched their thresholds.", request.user.username)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error fetching thresholds for user {request.user.username}: {str(e)}", exc_info=True)
+            logger.error("Error fetching thresholds for user %s: %s", request.user.username, str(e), exc_info=True)
             return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     elif request.method == 'POST':
         serializer = ThresholdSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(user=request.user)
-            logger.info(f"User {request.user.username} created a new threshold.")
+            logger.info("User %s created a new threshold.", request.user.username)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        logger.warning(f"User {request.user.username} failed to create a threshold: {serializer.errors}")
+        logger.warning("User %s failed to create a threshold: %s", request.user.username, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -283,7 +471,7 @@ def threshold_detail(request, pk):
     try:
         threshold = Threshold.objects.get(pk=pk, user=request.user)
     except Threshold.DoesNotExist:
-        logger.warning(f"User {request.user.username} requested non-existent threshold with id {pk}.")
+        logger.warning("User %s requested non-existent threshold with id %s.", request.user.username, pk)
         return Response({"error": "Threshold not found."}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
@@ -294,24 +482,27 @@ def threshold_detail(request, pk):
         serializer = ThresholdSerializer(threshold, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            logger.info(f"User {request.user.username} updated threshold with id {pk}.")
+            logger.info("User %s updated threshold with id %s.", request.user.username, pk)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        logger.warning(f"User {request.user.username} failed to update threshold with id {pk}: {serializer.errors}")
+        logger.warning("User %s failed to update threshold with id %s: %s", request.user.username, pk, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
         threshold.delete()
-        logger.info(f"User {request.user.username} deleted threshold with id {pk}.")
+        logger.info("User %s deleted threshold with id %s.", request.user.username, pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # Alert Views
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.ALERTS, per_user=True, per_day=True)
 def alert_list(request):
     """
     List all alerts for the authenticated user, with optional filtering by city.
     Only fetches alerts created today or later.
+    Uses keyset pagination on (created_at, id) unless `?page=` is given.
     """
     try:
         city_id = request.query_params.get('city', None)
@@ -321,7 +512,7 @@ def alert_list(request):
             # Validate if the city exists
             if not City.objects.filter(id=city_id).exists():
                 logger.warning(
-                    f"User {request.user.username} attempted to filter alerts with non-existent city_id={city_id}"
+                    "User %s attempted to filter alerts with non-existent city_id=%s", request.user.username, city_id
                 )
                 return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -330,29 +521,31 @@ def alert_list(request):
                 user=request.user, 
                 city_id=city_id, 
                 created_at__date__gte=today
-            ).order_by('-created_at')
-            logger.debug(f"Filtering alerts for user {request.user.username} and city_id={city_id}")
+            ).order_by('-created_at', '-id')
+            logger.debug("Filtering alerts for user %s and city_id=%s", request.user.username, city_id)
         else:
             # Fetch alerts for the user from today onwards
             alerts = Alert.objects.filter(
                 user=request.user, 
                 created_at__date__gte=today
-            ).order_by('-created_at')
-            logger.debug(f"Fetching all alerts for user {request.user.username}")
+            ).order_by('-created_at', '-id')
+            logger.debug("Fetching all alerts for user %s", request.user.username)
 
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
-        result_page = paginator.paginate_queryset(alerts, request)
-        serializer = AlertSerializer(result_page, many=True)
+        paginator = paginator_for(request, ('-created_at', '-id'))
+        result_page = paginator.paginate_queryset(alert_serializer.values(alerts), request)
 
-        logger.info(f"User {request.user.username} fetched their alerts.")
-        return paginator.get_paginated_response(serializer.data)
+        logger.info("User %s fetched their alerts.", request.user.username)
+        return paginator.get_paginated_response(alert_serializer.many(result_page))
 
+    except NotFound as e:
+        logger.warning("User %s sent an invalid pagination cursor.", request.user.username)
+        return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        logger.error(f"Error fetching alerts for user {request.user.username}: {str(e)}", exc_info=True)
+        logger.error("Error fetching alerts for user %s: %s", request.user.username, str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def alert_detail(request, pk):
@@ -360,9 +553,9 @@ def alert_detail(request, pk):
     Retrieve a specific alert by ID.
     """
     try:
-        alert = Alert.objects.get(pk=pk, user=request.user)
+        alert = Alert.objects.select_related('city', 'user').get(pk=pk, user=request.user)
     except Alert.DoesNotExist:
-        logger.warning(f"User {request.user.username} requested non-existent alert with id {pk}.")
+        logger.warning("User %s requested non-existent alert with id %s.", request.user.username, pk)
         return Response({"error": "Alert not found."}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = AlertSerializer(alert)
@@ -382,16 +575,19 @@ def user_preferences(request):
         serializer = UserPreferenceSerializer(preference, data=request.data)
         if serializer.is_valid():
             serializer.save()
-            logger.info(f"User {request.user.username} updated their preferences.")
+            logger.info("User %s updated their preferences.", request.user.username)
             return Response(serializer.data)
-        logger.warning(f"User {request.user.username} failed to update preferences: {serializer.errors}")
+        logger.warning("User %s failed to update preferences: %s", request.user.username, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ForecastData Views
 
+@throttle_cost(5)
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.FORECAST, per_day=True)
 def forecast_data_list(request):
     """
     List all forecast data from today onwards with optional filtering by city.
@@ -404,24 +600,52 @@ def forecast_data_list(request):
             # Validate if the city exists
             if not City.objects.filter(id=city_id).exists():
                 logger.warning(
-                    f"User {request.user.username} attempted to filter forecasts with non-existent city_id={city_id}"
+                    "User %s attempted to filter forecasts with non-existent city_id=%s", request.user.username, city_id
                 )
                 return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
 
             # Filter forecasts for the specified city and from today onwards
             forecasts = ForecastData.objects.filter(city_id=city_id, timestamp__date__gte=today).order_by('timestamp')
-            logger.debug(f"Filtering forecast data for city_id={city_id} from today onwards.")
+            logger.debug("Filtering forecast data for city_id=%s from today onwards.", city_id)
         else:
             # Fetch all forecasts from today onwards
             forecasts = ForecastData.objects.filter(timestamp__date__gte=today).order_by('timestamp')
             logger.debug("Fetching all forecast data from today onwards without city filter.")
 
-        serializer = ForecastDataSerializer(forecasts, many=True)
-        logger.info(f"User {request.user.username} fetched forecast data list.")
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = forecast_data_serializer.many(forecast_data_serializer.values(forecasts))
+        logger.info("User %s fetched forecast data list.", request.user.username)
+        return Response(data, status=status.HTTP_200_OK)
 
     except Exception as e:
-        logger.error(f"Error fetching forecast data list: {str(e)}", exc_info=True)
+        logger.error("Error fetching forecast data list: %s", str(e), exc_info=True)
         return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+
+
+# Dashboard Views
+@throttle_cost(3)
+@query_budget(7)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@cached_response(response_cache.DASHBOARD, per_user=True, per_day=True)
+def city_dashboard(request, city_id):
+    """
+    Everything the dashboard shows for one city in a single response: the
+    city, its latest weather, recent daily summaries, today's alerts for
+    the user and the forecast from today onwards. The city is included
+    once at the top instead of in every row.
+    """
+    try:
+        city = dashboard.city_rows(city_id).first()
+        if city is None:
+            logger.warning("User %s requested a dashboard for non-existent city_id=%s", request.user.username, city_id)
+            return Response({"error": "City not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        latest, summaries, alerts, forecasts = dashboard.dashboard_rows(city_id, request.user, now().date())
+        data = dashboard.dashboard_payload(city, latest.first(), summaries, alerts, forecasts)
+        logger.info("User %s fetched the dashboard for city_id=%s.", request.user.username, city_id)
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error("Error fetching dashboard for city_id=%s: %s", city_id, str(e), exc_info=True)
+        return Response({"error": "Internal server error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
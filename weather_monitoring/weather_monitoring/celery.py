@@ -1,5 +1,7 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import celeryd_init
+from kombu import Queue
 import os
 
 # Set the default Django settings module for the 'celery' program.
@@ -14,6 +16,56 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-discover tasks from all registered Django app configs.
 app.autodiscover_tasks()
 
+# Queues, each served by its own worker so that a long aggregation, cleanup or a slow
+# mail server never holds up the 15-minute fetch. Every queue has a worker profile:
+#   concurrency          pool processes
+#   prefetch_multiplier  messages reserved per process; 1 for long or uneven tasks
+#   acks_late            acknowledge after the task ran, so a task lost with its worker
+#                        is redelivered; only for tasks that are safe to run twice
+QUEUE_PROFILES = {
+    'ingest': {'concurrency': 4, 'prefetch_multiplier': 1, 'acks_late': True},
+    'forecast': {'concurrency': 2, 'prefetch_multiplier': 1, 'acks_late': True},
+    'aggregate': {'concurrency': 1, 'prefetch_multiplier': 1, 'acks_late': True},
+    'maintenance': {'concurrency': 1, 'prefetch_multiplier': 1, 'acks_late': True},
+    # Emails are not idempotent: a redelivered task would send the alert twice
+    'notify': {'concurrency': 4, 'prefetch_multiplier': 4, 'acks_late': False},
+}
+
+TASK_QUEUES = {
+    'weather.tasks.fetch_weather_data': 'ingest',
+    'weather.tasks.fetch_forecast_data': 'forecast',
+    'weather.tasks.aggregate_daily_summary': 'aggregate',
+    'weather.tasks.cleanup_old_weather_data': 'maintenance',
+    'weather.tasks.maintain_weather_partitions': 'maintenance',
+    'weather.tasks.prune_expired_data': 'maintenance',
+    'weather.tasks.deactivate_old_alerts': 'maintenance',
+    'weather.tasks.send_alert_email': 'notify',
+}
+
+app.conf.task_queues = [Queue(name) for name in QUEUE_PROFILES]
+# Tasks missing from TASK_QUEUES
+app.conf.task_default_queue = 'maintenance'
+app.conf.task_routes = {task: {'queue': queue} for task, queue in TASK_QUEUES.items()}
+app.conf.task_annotations = {
+    task: {'acks_late': QUEUE_PROFILES[queue]['acks_late']} for task, queue in TASK_QUEUES.items()
+}
+
+# `WEATHER_WORKER_PROFILE=ingest celery -A weather_monitoring worker` starts a worker tuned
+# for that queue and consuming only it (unless -Q says otherwise). -c and --prefetch-multiplier
+# still override the profile. Without a profile a worker consumes every queue.
+WORKER_PROFILE = os.getenv('WEATHER_WORKER_PROFILE')
+if WORKER_PROFILE:
+    if WORKER_PROFILE not in QUEUE_PROFILES:
+        raise ValueError(f"WEATHER_WORKER_PROFILE must be one of: {', '.join(QUEUE_PROFILES)}.")
+    app.conf.worker_concurrency = QUEUE_PROFILES[WORKER_PROFILE]['concurrency']
+    app.conf.worker_prefetch_multiplier = QUEUE_PROFILES[WORKER_PROFILE]['prefetch_multiplier']
+
+
+@celeryd_init.connect
+def consume_profile_queue(sender=None, instance=None, options=None, **kwargs):
+    if WORKER_PROFILE and not options.get('queues'):
+        instance.app.amqp.queues.select([WORKER_PROFILE])
+
 # Define periodic tasks (beat schedule) for the Celery Beat Scheduler.
 app.conf.beat_schedule = {
     # Task: Fetch weather data every 15 minutes
@@ -34,6 +86,18 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
     },
 
+    # Task: Prune expired forecasts and old deactivated alerts daily at 1:30 AM
+    'prune-expired-data-daily': {
+        'task': 'weather.tasks.prune_expired_data',
+        'schedule': crontab(hour=1, minute=30),  # Daily at 1:30 AM
+    },
+
+    # Task: Create upcoming WeatherData partitions daily at 00:30
+    'maintain-weather-partitions-daily': {
+        'task': 'weather.tasks.maintain_weather_partitions',
+        'schedule': crontab(hour=0, minute=30),  # Daily at 00:30
+    },
+
     # Task: Fetch forecast data every 3 hours (at the start of each 3-hour block)
     'fetch-forecast-data-every-3-hours': {
         'task': 'weather.tasks.fetch_forecast_data',
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "weather.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -39,6 +40,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "weather.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "weather_monitoring.urls"
@@ -69,13 +71,77 @@ DATABASES = {
     }
 }
 
+# SQLite high-concurrency mode (opt-in, for single-node deployments)
+# WAL lets DRF reads run while Celery ingest writes; IMMEDIATE transactions take
+# the write lock up front instead of failing on a read-to-write lock upgrade.
+SQLITE_HIGH_CONCURRENCY = os.getenv("SQLITE_HIGH_CONCURRENCY", "False") == "True"
+if SQLITE_HIGH_CONCURRENCY:
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": ";".join([
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+            # Negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))}",
+        ]),
+        # Busy timeout (seconds) before "database is locked" is raised
+        "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 30)),
+        "transaction_mode": "IMMEDIATE",
+    }
+
 # CORS configuration
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
+# Redis used by Celery, and by live updates unless LIVE_REDIS_URL is set
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Cache shared by all web and worker processes: Redis at REDIS_CACHE_URL, or REDIS_URL when unset. Response
+# cache invalidation, ETags, task locks, cached users and rate limits all rely on it being shared
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL") or REDIS_URL
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+    }
+}
+
+# Pre-serialized responses of hot read endpoints (invalidated on ingest; the timeout is a safety net)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 15 * 60))
+
+# Point budget of the chart timeseries endpoint (default and maximum `max_points`)
+TIMESERIES_DEFAULT_POINTS = int(os.getenv("TIMESERIES_DEFAULT_POINTS", 500))
+TIMESERIES_MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", 2000))
+
+# Raise instead of logging when a view runs more queries than its @query_budget (enabled in tests)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "False") == "True"
+
+# Bearer token required to scrape /metrics (open when unset). Set PROMETHEUS_MULTIPROC_DIR to aggregate processes
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Profiles of requests (staff, `X-Profile` header or `?profile=`) and tasks, newest PROFILING_KEEP kept
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", BASE_DIR / "profiles"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", 50))
+PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", 0.005))
+# Task names to profile on every run (`*` for all; SIGUSR2 toggles all tasks in a worker) and the profiler used
+PROFILE_TASKS = {name for name in os.getenv("PROFILE_TASKS", "").split(",") if name}
+PROFILE_TASKS_MODE = os.getenv("PROFILE_TASKS_MODE", "cprofile")
+
+# Rows fetched per database round trip (and encoded per streamed chunk) by bulk exports
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Live updates (Server-Sent Events, ASGI only). Events fan out to every web process through Redis pub/sub;
+# set LIVE_REDIS_URL empty to keep them within the publishing process
+LIVE_REDIS_URL = os.getenv("LIVE_REDIS_URL", REDIS_URL)
+LIVE_HEARTBEAT_SECONDS = int(os.getenv("LIVE_HEARTBEAT_SECONDS", 15))
+LIVE_RETRY_MS = int(os.getenv("LIVE_RETRY_MS", 5000))  # Client reconnect delay
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", 100))  # Frames buffered per client before the oldest are dropped
+LIVE_MAX_CITIES = int(os.getenv("LIVE_MAX_CITIES", 20))
+
 # Celery Configuration
-CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
@@ -84,7 +150,14 @@ CELERY_TIMEZONE = "Asia/Kolkata"
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "weather.authentication.CachedJWTAuthentication",
+    ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "weather.throttling.WeightedSlidingWindowThrottle",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "weather.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ),
 }
 
@@ -98,9 +171,39 @@ SIMPLE_JWT = {
     ),
 }
 
+# API rate limits in cost units per sliding window ("<units>/<s|min|hour|day>"), per user across
+# all endpoints and per user and endpoint; expensive endpoints cost more than 1 unit per request
+API_THROTTLE_ENABLED = os.getenv("API_THROTTLE_ENABLED", "True") == "True"
+API_THROTTLE_USER_RATE = os.getenv("API_THROTTLE_USER_RATE", "600/min")
+API_THROTTLE_ENDPOINT_RATE = os.getenv("API_THROTTLE_ENDPOINT_RATE", "120/min")
+
+# Seconds a JWT's user is served from the cache instead of the database (dropped on save/delete)
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60))
+
+# OpenWeatherMap API key, required by the fetch tasks only (checked when they run)
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+
 # Weather fetch interval (in minutes)
 WEATHER_FETCH_INTERVAL = int(os.getenv("WEATHER_FETCH_INTERVAL", 15))
 
+# WeatherData retention (in days) and monthly partitions created ahead of time (PostgreSQL)
+WEATHER_DATA_RETENTION_DAYS = int(os.getenv("WEATHER_DATA_RETENTION_DAYS", 30))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", 3))
+
+# Columnar archive of expired WeatherData (written before retention deletes rows)
+WEATHER_ARCHIVE_ENABLED = os.getenv("WEATHER_ARCHIVE_ENABLED", "True") == "True"
+WEATHER_ARCHIVE_DIR = Path(os.getenv("WEATHER_ARCHIVE_DIR", BASE_DIR / "archive"))
+
+# Retention of other tables
+FORECAST_DATA_RETENTION_DAYS = int(os.getenv("FORECAST_DATA_RETENTION_DAYS", 7))
+ALERT_ACTIVE_HOURS = int(os.getenv("ALERT_ACTIVE_HOURS", 24))
+INACTIVE_ALERT_RETENTION_DAYS = int(os.getenv("INACTIVE_ALERT_RETENTION_DAYS", 30))
+
+# Retention batching: rows per batch, pause between batches (seconds), max runtime per run (seconds)
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", 1000))
+RETENTION_BATCH_PAUSE = float(os.getenv("RETENTION_BATCH_PAUSE", 0.1))
+RETENTION_MAX_RUNTIME = int(os.getenv("RETENTION_MAX_RUNTIME", 600))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -122,9 +225,37 @@ STATIC_URL = "/static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Logging Configuration
+# Level of the weather loggers; DEBUG adds per-query and per-entry detail on hot paths
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Format of weather_app.log: "json" (one object per line, with extra fields) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Write log records from a background thread instead of on the request/task thread
+LOG_BACKGROUND = os.getenv("LOG_BACKGROUND", "True") == "True"
+# Keep 1 in N info lines of the high-volume loggers (per-city task lines, per-request metrics)
+LOG_SAMPLE_CITY_LINES = int(os.getenv("LOG_SAMPLE_CITY_LINES", 10))
+LOG_SAMPLE_REQUESTS = int(os.getenv("LOG_SAMPLE_REQUESTS", 1))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "json": {
+            "()": "weather.log.JSONFormatter",
+        },
+        "text": {
+            "format": "%(asctime)s %(levelname)s %(name)s %(message)s",
+        },
+    },
+    "filters": {
+        "sample_city_lines": {
+            "()": "weather.log.SamplingFilter",
+            "rate": LOG_SAMPLE_CITY_LINES,
+        },
+        "sample_requests": {
+            "()": "weather.log.SamplingFilter",
+            "rate": LOG_SAMPLE_REQUESTS,
+        },
+    },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
@@ -132,6 +263,7 @@ LOGGING = {
         "file": {
             "class": "logging.FileHandler",
             "filename": "weather_app.log",
+            "formatter": LOG_FORMAT,
         },
     },
     "loggers": {
@@ -141,8 +273,14 @@ LOGGING = {
         },
         "weather": {
             "handlers": ["console", "file"],
-            "level": "DEBUG",
+            "level": LOG_LEVEL,
             "propagate": False,
         },
+        "weather.tasks.cities": {
+            "filters": ["sample_city_lines"],
+        },
+        "weather.requests": {
+            "filters": ["sample_requests"],
+        },
     },
 }
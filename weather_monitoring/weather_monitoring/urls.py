@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
+from weather.metrics import metrics_view
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -13,4 +14,7 @@ urlpatterns = [
     # JWT Authentication Endpoints
     path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # Obtain JWT
     path('api/v1/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Refresh JWT
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]